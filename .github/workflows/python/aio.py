@@ -0,0 +1,141 @@
+"""This is the asyncio API of the release scripts -- @manscaped-dev/<repo>
+
+The functions of common.py (and the promotion planner) as coroutines, for services and bots that run an event loop:
+
+    import aio
+    etag, releases = await aio.get_release_snapshot("manscaped-dev/<repo>")
+    plans = await aio.plan_promotions(["manscaped-dev/a", "manscaped-dev/b"], "release") # Every repo at the same time
+
+Each call runs the blocking function on a worker thread (asyncio.to_thread) -- the transport is thread-safe and shares its
+connection pool, rate limit budget and metrics with the scripts. Calls on different repos overlap, and so do independent
+calls on the same repo (i.e. ~> the release listing and a tag lookup).
+
+Where the scripts exit (sys.exit) the coroutines raise ReleaseError instead, so one failure does not stop the event loop.
+Outside of a loop, `run(...)` is the blocking facade, i.e. ~> aio.run(aio.get_release_index(repo)).
+
+The CLI scripts never import this module -- asyncio alone costs ~90ms of startup.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import asyncio
+import functools
+
+import common
+from releases import ReleaseIndex
+
+
+class ReleaseError(RuntimeError):
+    """A release call failed -- the scripts print the reason and exit, the reason is on stdout."""
+
+
+async def _call(func, *args, **kwargs):
+    try:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    except SystemExit as e: # A script error, not a reason to stop the caller's event loop
+        raise ReleaseError(f"{func.__name__}() failed (exit {e.code}), see the output above.") from None
+
+
+def _coroutine(func):
+    # The async counterpart of a blocking function, with its signature and docstring
+    @functools.wraps(func)
+    async def _wrapper(*args, **kwargs):
+        return await _call(func, *args, **kwargs)
+    return _wrapper
+
+
+get_releases = _coroutine(common.get_releases)
+get_release_snapshot = _coroutine(common.get_release_snapshot)
+get_release_index = _coroutine(common.get_release_index)
+get_release_changes = _coroutine(common.get_release_changes)
+get_releases_by_tag = _coroutine(common.get_releases_by_tag)
+get_release_id = _coroutine(common.get_release_id)
+get_release_commit_sha = _coroutine(common.get_release_commit_sha)
+edit_release = _coroutine(common.edit_release)
+wait_for_releases = _coroutine(common.wait_for_releases)
+
+
+async def preflight(stage: str, repo: str = None) -> tuple:
+    """This function will check the repo is ready for the promotion, and resolve the commit of the release to promote.
+
+    The release id and the commit SHA do not depend on each other, so both lookups run at the same time --
+    served from the release index when it has them, which is the common case.
+
+    Args:
+        stage (str): The promotion -- prerelease (draft to pre-release) or release (pre-release to latest).
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+
+    Returns:
+        tuple: The release to promote, its node id and its commit SHA (None for a draft, its tag does not exist yet).
+
+    Raises:
+        ReleaseError: If the repo is not ready for the promotion.
+    """
+    import promote # The planner, imported on first use
+
+    _index = await get_release_index(repo=repo)
+    try:
+        _release = promote.preflight(stage, repo=repo, releases=_index) # In memory -- the index is already fetched
+    except Exception as e:
+        raise ReleaseError(str(e)) from None
+
+    _id, _sha = await asyncio.gather(
+        get_release_id(_release.tagName, releases=_index, repo=repo),
+        get_release_commit_sha(_release, repo=repo) if not _release.isDraft else _none(),
+    )
+    return (_release, _id, _sha)
+
+
+async def _none():
+    return None
+
+
+async def plan_promotions(repos: list[str], stage: str) -> dict:
+    """This function will plan the promotion of every repo at the same time, each from one revalidated snapshot.
+
+    Args:
+        repos (list[str]): The repositories, i.e. ~> ["manscaped-dev/<repo>"].
+        stage (str): The promotion -- prerelease or release.
+
+    Returns:
+        dict: repo --> the plan (see `promote.build_plan`), or the ReleaseError/Exception that stopped it.
+    """
+    import promote
+
+    async def _plan(repo: str):
+        try:
+            return await _call(promote.plan_promotion, [stage], repo=repo)
+        except Exception as e: # Recorded per repo, like the --manifest results
+            return e
+
+    return dict(zip(repos, await asyncio.gather(*(_plan(r) for r in repos))))
+
+
+async def apply_plan(plan: dict) -> ReleaseIndex:
+    """This function will apply a plan from `plan_promotions` -- see `promote.apply_plan`.
+
+    Args:
+        plan (dict): The plan.
+
+    Returns:
+        ReleaseIndex: The promoted releases, as confirmed.
+    """
+    import promote
+    try:
+        return await _call(promote.apply_plan, plan)
+    except ReleaseError:
+        raise
+    except Exception as e:
+        raise ReleaseError(str(e)) from None
+
+
+def run(awaitable):
+    """This function will run a coroutine of this module to completion, for callers without an event loop.
+
+    Args:
+        awaitable: The coroutine, i.e. ~> aio.get_release_index(repo).
+
+    Returns:
+        The result of the coroutine.
+    """
+    return asyncio.run(awaitable)
+
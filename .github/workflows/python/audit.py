@@ -0,0 +1,211 @@
+"""This python script will audit the release history of repos for semver monotonicity -- @manscaped-dev/<repo>
+
+The history is streamed newest first (common.iter_releases) in a single pass, only the compact Version of every tag is kept,
+and the versions are sorted once (O(n log n)) to find the duplicates (adjacent equal versions), illegal bumps and gaps.
+
+Findings:
+    - invalid: The tag is not a semantic version.
+    - duplicate: The version was released more than once.
+    - non-monotonic: The release was created after a release with a higher version.
+    - illegal-bump: A major/minor bump that did not reset the lower fields, i.e. ~> 1.2.3 --> 1.3.1.
+    - gap: A version was skipped, i.e. ~> 1.2.0 --> 1.4.0.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from concurrent.futures import ProcessPoolExecutor
+
+import transport
+
+from debug import ic
+from common import iter_releases, get_repository
+from fleet import get_org_repos
+from version import parse_version
+from tracing import span
+
+BASE = os.path.dirname(os.path.abspath(__file__)) # Get the base directory of the script
+PROCESSES = int(os.environ.get("SRE_AUDIT_PROCESSES", str(os.cpu_count() or 1))) # Repos audited in parallel
+ic.disable() # Disable debug mode
+
+
+def _finding(kind: str, tag: str, detail: str) -> dict:
+    return {"kind": kind, "tag": tag, "detail": detail}
+
+
+def audit_history(releases) -> list[dict]:
+    """This function will audit a release history in one streaming pass.
+
+    Args:
+        releases (iterable): The releases, newest first -- i.e. ~> common.iter_releases(full=True). Drafts are skipped.
+
+    Returns:
+        list[dict]: The findings -- kind, tag, detail.
+    """
+    _findings = []
+    _versions = [] # (Version, tag) in stream order, sorted once after the pass
+    _lowest = None # The lowest version created after the current release (we stream newest first)
+    _blamed = None
+
+    for i in releases:
+        _tag = i.get("tagName")
+        if i.get("isDraft"):
+            continue # Not released yet
+
+        _version = parse_version(_tag)
+        if _version is None:
+            _findings.append(_finding("invalid", _tag, "The tag is not a semantic version."))
+            continue
+
+        _versions.append((_version, _tag))
+
+        # An older release with a higher version than a newer one -- blame the newer (lower) release once
+        if _lowest is not None and _version > _lowest[0] and _blamed is not _lowest:
+            _findings.append(_finding("non-monotonic", _lowest[1], f"Created after {_tag}, but {_lowest[0]} < {_version}."))
+            _blamed = _lowest
+
+        if _lowest is None or _version < _lowest[0]:
+            _lowest = (_version, _tag)
+
+    # The sort is stable, so the first tag of equal versions is the newest -- the later ones are the duplicates
+    _previous = None
+    _first = None
+    for _version, _tag in sorted(_versions, key=lambda i: i[0]):
+        if _first is not None and _version == _first[0]:
+            _findings.append(_finding("duplicate", _tag, f"The version {_version} was already released as {_first[1]}."))
+            continue
+        _first = (_version, _tag)
+
+        # The bump and gap checks only look at the final releases -- pre-release identifiers are not bumps
+        if _version.prerelease:
+            continue
+        if _previous is not None:
+            if not _version.is_reset_bump(_previous):
+                _findings.append(_finding("illegal-bump", _tag, f"{_previous} --> {_version} is a {_version.bump(_previous)} bump that does not reset the lower fields."))
+            elif (
+                _version.major > _previous.major + 1
+                or (_version.major == _previous.major and _version.minor > _previous.minor + 1)
+                or (_version.release[:2] == _previous.release[:2] and _version.patch > _previous.patch + 1)
+            ):
+                _findings.append(_finding("gap", _tag, f"{_previous} --> {_version} skips a version."))
+        _previous = _version
+
+    return _findings
+
+
+def audit_repo(repo: str) -> dict:
+    """This function will audit the whole release history of the repo.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+
+    Returns:
+        dict: The audit -- repo, releases, findings, error, seconds.
+    """
+    _start = time.perf_counter()
+    _count = 0
+    _audit = {"repo": repo, "releases": 0, "findings": [], "error": None}
+
+    def _counted(releases):
+        nonlocal _count
+        for i in releases:
+            _count += 1
+            yield i
+
+    try:
+        _audit["findings"] = audit_history(_counted(iter_releases(repo, full=True)))
+    except SystemExit:
+        _audit["error"] = "Unable to fetch the releases."
+    except Exception as e:
+        _audit["error"] = str(e)
+
+    _audit["releases"] = _count
+    _audit["seconds"] = round(time.perf_counter() - _start, 3)
+    return _audit
+
+
+def _init_worker() -> None:
+    # A forked worker inherits the parent's pooled keep-alive connections (i.e. ~> warmed by --org) -- one socket, and one
+    # TLS session, shared by processes interleaves their requests. Every worker opens its own connections instead.
+    transport._transport = None
+
+
+def audit_repos(repos: list[str], processes: int = PROCESSES) -> list[dict]:
+    """This function will audit many repos in parallel, one process per repo at a time.
+
+    Args:
+        repos (list[str]): The repositories, i.e. ~> manscaped-dev/<repo>.
+        processes (int): The number of worker processes.
+
+    Returns:
+        list[dict]: The audit of every repository, in the order given.
+    """
+    if processes <= 1 or len(repos) <= 1:
+        return [audit_repo(i) for i in repos]
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+        return list(pool.map(audit_repo, repos))
+
+
+# Let's create an argument parser
+parser = argparse.ArgumentParser(
+    prog='SRE Release History Audit',
+    description='Audits the whole release history of repos for semver monotonicity, illegal bumps, duplicates and gaps.'
+)
+parser.add_argument("--repos", nargs="*", help="Repositories, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.", default=[])
+parser.add_argument("--repos-file", type=str, help="File with one repository per line.", default=None)
+parser.add_argument("--org", type=str, help="Audit every (non-archived) repository of the organization.", default=None)
+parser.add_argument("--template", type=str, help="With --org, only audit repos created from this template.", default=None)
+parser.add_argument("--processes", type=int, help="Repositories audited in parallel.", default=PROCESSES)
+parser.add_argument("--json", type=str, help="Write the JSON report to this file (- for stdout).", default=None)
+parser.add_argument("--debug", action="store_true", help="Enable debug mode.", default=False) # Debug mode
+
+
+def main(argv: list = None) -> int:
+    """This function will print the audit findings of the repos.
+
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: The exit code -- 1 if there are findings or errors.
+    """
+    with span("args.parse"):
+        args = parser.parse_args(argv) # Parse the arguments
+
+    if args.debug:
+        ic.enable() # Enable debug mode
+
+    _repos = list(args.repos)
+    if args.repos_file:
+        with open(args.repos_file, "r", encoding="utf-8") as f:
+            _repos.extend(i.strip() for i in f if i.strip() and not i.startswith("#"))
+    if args.org:
+        _repos.extend(get_org_repos(args.org, template=args.template))
+    if not _repos:
+        _repos.append(get_repository())
+
+    _audits = audit_repos(list(dict.fromkeys(_repos)), processes=args.processes)
+
+    if args.json == "-":
+        print(json.dumps(_audits, indent=2))
+    else:
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(_audits, f, indent=2)
+
+        for a in _audits:
+            _status = "ERROR" if a["error"] else "WARNING" if a["findings"] else "OK"
+            print(f"[{_status}] - {a['repo']}: {a['releases']} releases, {len(a['findings'])} findings ({a['seconds']:.2f}s) {a['error'] or ''}".rstrip())
+            for f in a["findings"]:
+                print(f"    {f['kind']:<14} {f['tag']:<16} {f['detail']}")
+
+    return 1 if any(a["error"] or a["findings"] for a in _audits) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
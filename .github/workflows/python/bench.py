@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""This python script is the benchmark suite for the release scripts -- @manscaped-dev/<repo>
+
+Every scenario runs the real script end-to-end (a fresh interpreter, so startup is included) against the replay.py stand-in server,
+for synthetic release histories of every size. Nothing touches GitHub, and the on-disk caches and local refs are disabled,
+so the same tree gives the same API calls on every run.
+
+    - bench.py: Print the median/min wall time and the API calls of every scenario and size.
+    - bench.py --save: Store the results as the baseline (bench/baseline.json).
+    - bench.py --check: Fail if a scenario makes more API calls than the baseline -- per method, as counted by the stand-in server
+      (GET/PATCH are REST calls, POST is a GraphQL round-trip). The counts are deterministic, so the gate is the same on any machine.
+      Wall time only warns: the baseline is scaled by a reference run (a bare interpreter start) on both machines, and a scenario
+      warns when it is slower than that by more than SRE_BENCH_TOLERANCE (relative, default 0.25) plus SRE_BENCH_SLACK_MS (default 25ms).
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+
+from replay import StubGitHub, serve
+
+BASE = os.path.dirname(os.path.abspath(__file__)) # Get the base directory of the script
+BASELINE = os.path.join(BASE, "bench", "baseline.json")
+SIZES = (10, 1000, 50000) # Releases in the synthetic history
+RUNS = int(os.environ.get("SRE_BENCH_RUNS", "5")) # Runs per scenario and size, the median is compared
+TOLERANCE = float(os.environ.get("SRE_BENCH_TOLERANCE", "0.25"))
+SLACK_MS = float(os.environ.get("SRE_BENCH_SLACK_MS", "25"))
+
+# Scenario --> the script arguments, {draft} is the draft version of the synthetic history
+SCENARIOS = {
+    "startup:sha": ["release_sha.py", "--help"],
+    "startup:promote": ["promote.py", "--help"],
+    "startup:validate-version": ["registrant-github-version.py", "--help"],
+    "sha:release": ["release_sha.py", "--release"],
+    "sha:prerelease": ["release_sha.py", "--prerelease"],
+    "promote:release": ["promote.py", "--release"],
+    "validate-version": ["registrant-github-version.py", "--version", "{draft}"],
+    "audit": ["audit.py", "--processes", "1"], # The whole history -- the one scenario that grows with the size
+}
+
+
+def _env(api_url: str, transport: str, query: str) -> dict:
+    _env = dict(
+        os.environ,
+        GITHUB_API_URL=api_url,
+        GITHUB_REPOSITORY="bench/repo",
+        GH_TOKEN="bench",
+        SRE_TRANSPORT=transport,
+        SRE_RELEASE_QUERY=query,
+        SRE_RELEASE_CACHE="0", # Every run pays for its own listing
+        SRE_LOCAL_REFS="0",
+    )
+    _env.pop("SRE_TRACE", None)
+    _env.pop("SRE_RECORD", None)
+    if transport == "gh":
+        _env["PATH"] = os.pathsep.join([os.path.join(BASE, "bench"), _env.get("PATH", "")]) # The fake gh
+    return _env
+
+
+def reference_ms(runs: int = RUNS) -> float:
+    """This function will time the reference run -- a bare interpreter start, which no change to the scripts can slow down.
+
+    Args:
+        runs (int): The number of runs.
+
+    Returns:
+        float: The median, in milliseconds.
+    """
+    _times = []
+    for _ in range(max(runs, 5)):
+        _start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        _times.append((time.perf_counter() - _start) * 1000)
+    return round(statistics.median(_times), 1)
+
+
+def run_scenario(stub: StubGitHub, args: list, env: dict, runs: int = RUNS) -> dict:
+    """This function will run one scenario against the stub, resetting the releases before every run.
+
+    Args:
+        stub (StubGitHub): The stand-in repository.
+        args (list): The script and its arguments.
+        env (dict): The environment of the script.
+        runs (int): The number of runs.
+
+    Returns:
+        dict: median_ms, min_ms, requests and calls (the API calls of one run, in total and per method -- the most of any run).
+    """
+    _times = []
+    _requests = 0
+    _calls = {}
+    for _ in range(runs):
+        stub.reset()
+        _start = time.perf_counter()
+        r = subprocess.run([sys.executable, os.path.join(BASE, args[0]), *args[1:]], env=env, capture_output=True)
+        _times.append((time.perf_counter() - _start) * 1000)
+
+        if r.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed ({r.returncode}): {r.stdout.decode()}{r.stderr.decode()}")
+        _requests = max(_requests, sum(stub.calls.values()))
+        for k, v in stub.calls.items():
+            _calls[k] = max(v, _calls.get(k, 0))
+
+    return {"median_ms": round(statistics.median(_times), 1), "min_ms": round(min(_times), 1), "requests": _requests, "calls": dict(sorted(_calls.items()))}
+
+
+def run_suite(sizes: tuple = SIZES, transport: str = "http", query: str = "graphql", runs: int = RUNS, only: str = None) -> dict:
+    """This function will run every scenario for every history size.
+
+    Args:
+        sizes (tuple): The release history sizes.
+        transport (str): The API transport -- http or gh.
+        query (str): The release listing query -- graphql or rest.
+        runs (int): The runs per scenario and size.
+        only (str): Only run the scenarios starting with this prefix.
+
+    Returns:
+        dict: "<scenario>@<size>" --> median_ms, min_ms, requests, calls.
+    """
+    _results = {}
+    for _size in sizes:
+        _stub = StubGitHub(_size)
+        _server = serve(_stub)
+        _scenario_env = _env(f"http://127.0.0.1:{_server.server_address[1]}", transport, query)
+        try:
+            for _name, _args in SCENARIOS.items():
+                if only and not _name.startswith(only):
+                    continue
+                _args = [i.format(draft=_stub.releases[0]["tag_name"]) for i in _args]
+                _results[f"{_name}@{_size}"] = run_scenario(_stub, _args, _scenario_env, runs=runs)
+                print(f"  {_name + '@' + str(_size):<34} {_results[f'{_name}@{_size}']}")
+        finally:
+            _server.shutdown()
+
+    return _results
+
+
+def check(results: dict, baseline: dict, scale: float = 1.0, tolerance: float = TOLERANCE, slack_ms: float = SLACK_MS) -> tuple:
+    """This function will compare the results with the baseline.
+
+    Args:
+        results (dict): The results of `run_suite`.
+        baseline (dict): The baseline results of the same suite.
+        scale (float): How much slower this machine is than the baseline's -- the ratio of the reference runs.
+        tolerance (float): The relative slowdown allowed.
+        slack_ms (float): The absolute slowdown allowed, in milliseconds -- absorbs the noise of short scenarios.
+
+    Returns:
+        tuple: The regressions (more API calls, in total or for a method), and the warnings (a median over the scaled budget).
+    """
+    _regressions = []
+    _warnings = []
+    for _name, _result in results.items():
+        _base = baseline.get(_name)
+        if not _base:
+            continue
+        if _result["requests"] > _base["requests"]:
+            _regressions.append(f"{_name}: {_result['requests']} API calls, the baseline is {_base['requests']}.")
+        for _method, _count in sorted(_result.get("calls", {}).items()):
+            if "calls" in _base and _count > _base["calls"].get(_method, 0):
+                _regressions.append(f"{_name}: {_count} {_method} calls, the baseline is {_base['calls'].get(_method, 0)}.")
+
+        _budget = _base["median_ms"] * scale * (1 + tolerance) + slack_ms
+        if _result["median_ms"] > _budget:
+            _warnings.append(f"{_name}: {_result['median_ms']:.1f}ms, the baseline is {_base['median_ms']:.1f}ms (x{scale:.2f} on this machine, budget {_budget:.1f}ms).")
+    return (_regressions, _warnings)
+
+
+# Let's create an argument parser
+parser = argparse.ArgumentParser(
+    prog='SRE Release Benchmarks',
+    description='Benchmarks the release scripts end-to-end against a stand-in GitHub API, at 10, 1k and 50k releases.'
+)
+parser.add_argument("--sizes", type=int, nargs="*", help="Release history sizes.", default=list(SIZES))
+parser.add_argument("--runs", type=int, help="Runs per scenario and size.", default=RUNS)
+parser.add_argument("--transport", choices=["http", "gh"], help="The API transport (gh uses the fake bench/gh).", default="http")
+parser.add_argument("--query", choices=["graphql", "rest"], help="The release listing query.", default="graphql")
+parser.add_argument("--only", type=str, help="Only run the scenarios starting with this prefix, i.e. ~> sha.", default=None)
+parser.add_argument("--save", action="store_true", help="Store the results as the baseline.", default=False)
+parser.add_argument("--check", action="store_true", help="Fail on a regression against the baseline.", default=False)
+parser.add_argument("--baseline", type=str, help="The baseline file.", default=BASELINE)
+
+
+def main(argv: list = None) -> int:
+    """This function will run the benchmarks, and store or check the baseline.
+
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: The exit code -- 1 on a regression with --check.
+    """
+    args = parser.parse_args(argv)
+    _suite = f"{args.transport}/{args.query}"
+
+    print(f"[INFO] - Benchmarking {_suite}, {args.runs} runs per scenario...")
+    _reference = reference_ms(args.runs)
+    _results = run_suite(tuple(args.sizes), transport=args.transport, query=args.query, runs=args.runs, only=args.only)
+
+    _baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            _baseline = json.load(f)
+
+    if args.save:
+        _baseline.setdefault("suites", {})[_suite] = _results
+        _baseline["meta"] = {"python": platform.python_version(), "platform": platform.platform(), "runs": args.runs, "reference_ms": _reference}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(_baseline, f, indent=2, sort_keys=True)
+        print(f"[SUCCESS] - Stored the {_suite} baseline in {args.baseline}.")
+
+    if args.check:
+        _base = _baseline.get("suites", {}).get(_suite)
+        if not _base:
+            print(f"[ERROR] - There is no {_suite} baseline in {args.baseline}, run with --save first.")
+            return 1
+
+        _base_reference = _baseline.get("meta", {}).get("reference_ms")
+        _scale = _reference / _base_reference if _base_reference else 1.0
+        _regressions, _warnings = check(_results, _base, scale=_scale)
+        for i in _warnings:
+            print(f"[WARNING] - {i}")
+        for i in _regressions:
+            print(f"[ERROR] - {i}")
+        if _regressions:
+            return 1
+        print(f"[SUCCESS] - No API call regressions against the {_suite} baseline{f' ({len(_warnings)} timing warnings)' if _warnings else ''}.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
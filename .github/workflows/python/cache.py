@@ -0,0 +1,314 @@
+"""This is the on-disk release snapshot cache for the repo -- @manscaped-dev/<repo>
+
+The snapshot is keyed by repository and validated with a conditional request (ETag / If-None-Match),
+so repeated calls to `common.get_releases` across steps and jobs do not re-list every release.
+
+The tag cache maps (repo, tag) --> (release id, commit sha) for published releases, whose tags practically never move.
+It is one compact file for every repo, keyed by a digest of repo@tag, kept in LRU order and capped at TAG_CACHE_SIZE entries.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+
+from collections import OrderedDict
+
+from debug import ic
+from schema import loads
+
+# Where the snapshots live - RUNNER_TEMP is wiped between jobs, so use SRE_RELEASE_CACHE_DIR with actions/cache to share
+CACHE_DIR = os.environ.get(
+    "SRE_RELEASE_CACHE_DIR",
+    os.path.join(os.environ.get("RUNNER_TEMP", os.path.expanduser("~/.cache")), "sre-releases"),
+)
+CACHE_TTL = int(os.environ.get("SRE_RELEASE_CACHE_TTL", "300")) # Seconds a snapshot is trusted without revalidation
+CACHE_ENABLED = os.environ.get("SRE_RELEASE_CACHE", "1") != "0" # Set SRE_RELEASE_CACHE=0 to bypass the cache
+SNAPSHOT_VERSION = 3 # Bump when the shape of the cached releases changes
+TAG_CACHE_SIZE = int(os.environ.get("SRE_TAG_CACHE_SIZE", "4096")) # Entries kept, the least recently used are evicted
+TAG_CACHE_VERSION = 2 # Bump when the shape (or the meaning) of the tag cache changes -- 2: annotated tags are peeled
+
+_tags = None # digest --> [repo, tag, release id, commit sha], in LRU order (oldest first)
+_tag_etags = {} # repo --> ETag of the releases listing the entries were last checked against
+_tags_lock = threading.Lock() # The fleet and manifest runs look tags up from worker threads
+
+
+def _snapshot_path(repo: str) -> str:
+    """This function will return the snapshot file path for the repo -- @manscaped-dev/<repo>.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+
+    Returns:
+        str: The path of the snapshot file.
+    """
+    return os.path.join(CACHE_DIR, f"{repo.replace('/', '__')}.json")
+
+
+def load_snapshot(repo: str) -> dict:
+    """This function will return the cached release snapshot for the repo -- @manscaped-dev/<repo>.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+
+    Returns:
+        dict: The snapshot (etag, fetchedAt, event, releases), or None if there is no usable snapshot.
+    """
+    if not CACHE_ENABLED or not repo:
+        return None
+
+    try:
+        with open(_snapshot_path(repo), "rb") as f:
+            _data = loads(f.read())
+    except (OSError, ValueError):
+        return None # A missing or corrupt snapshot is just a cache miss
+
+    if not isinstance(_data, dict) or _data.get("version") != SNAPSHOT_VERSION:
+        return None # An older snapshot format is just a cache miss
+
+    return _data
+
+
+def save_snapshot(repo: str, releases: list[dict], etag: str = None, event: str = None, fetched_at: float = None) -> None:
+    """This function will store the release snapshot for the repo -- @manscaped-dev/<repo>.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        releases (list[dict]): The releases to store.
+        etag (str): The ETag of the releases listing the snapshot was built from.
+        event (str): The key of the release event (events.py) the snapshot already includes, if any.
+        fetched_at (float): When the listing was fetched (or revalidated) -- defaults to now. The TTL (`is_fresh`) runs from it.
+    """
+    if not CACHE_ENABLED or not repo:
+        return
+
+    _path = _snapshot_path(repo)
+    _tmp = f"{_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "etag": etag, "fetchedAt": time.time() if fetched_at is None else fetched_at, "event": event, "releases": releases}, f)
+        os.replace(_tmp, _path) # Atomic swap so a concurrent job never reads half a snapshot
+    except OSError as e:
+        ic(f"save_snapshot() - Unable to write the snapshot {_path}: {e}")
+
+
+def touch_snapshot(repo: str, snapshot: dict) -> None:
+    """This function will mark a revalidated (304) snapshot as fresh again.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        snapshot (dict): The snapshot that was revalidated.
+    """
+    save_snapshot(repo, releases=snapshot.get("releases"), etag=snapshot.get("etag"), event=snapshot.get("event"))
+
+
+def is_fresh(snapshot: dict) -> bool:
+    """This function will check if the snapshot is still within the TTL.
+
+    Args:
+        snapshot (dict): The snapshot to check.
+
+    Returns:
+        bool: True if the snapshot can be used without revalidation, False otherwise.
+    """
+    return (time.time() - snapshot.get("fetchedAt", 0)) < CACHE_TTL
+
+
+def invalidate_snapshot(repo: str) -> None:
+    """This function will drop the snapshot for the repo -- @manscaped-dev/<repo>, i.e. ~> after a release edit.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+    """
+    if not repo:
+        return
+
+    try:
+        os.remove(_snapshot_path(repo))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        ic(f"invalidate_snapshot() - Unable to remove the snapshot for {repo}: {e}")
+
+
+def _tag_key(repo: str, tagName: str) -> str:
+    # Content-addressed -- fixed size keys, no escaping of repo or tag names
+    return hashlib.sha1(f"{repo}@{tagName}".encode("utf-8")).hexdigest()[:20]
+
+
+def _tags_path() -> str:
+    return os.path.join(CACHE_DIR, "tags.json")
+
+
+def _load_tags() -> OrderedDict:
+    """This function will load the tag cache once per run -- a missing, corrupt or older file is an empty cache."""
+    global _tags
+    if _tags is not None:
+        return _tags
+
+    _tags = OrderedDict()
+    if not CACHE_ENABLED:
+        return _tags
+
+    try:
+        with open(_tags_path(), "rb") as f:
+            _data = loads(f.read())
+    except (OSError, ValueError):
+        return _tags
+
+    if isinstance(_data, dict) and _data.get("version") == TAG_CACHE_VERSION:
+        _tag_etags.update(_data.get("etags") or {})
+        for i in _data.get("entries") or []:
+            if isinstance(i, list) and len(i) == 4:
+                _tags[_tag_key(i[0], i[1])] = i
+
+    return _tags
+
+
+def _save_tags() -> None:
+    """This function will write the tag cache -- compact JSON, entries in LRU order, swapped in atomically."""
+    if not CACHE_ENABLED:
+        return
+
+    _path = _tags_path()
+    _tmp = f"{_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    _repos = {i[0] for i in _tags.values()}
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": TAG_CACHE_VERSION,
+                    "etags": {k: v for k, v in _tag_etags.items() if k in _repos},
+                    "entries": list(_tags.values()),
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(_tmp, _path)
+    except OSError as e:
+        ic(f"_save_tags() - Unable to write the tag cache {_path}: {e}")
+
+
+def tags_etag(repo: str) -> str:
+    """This function will return the ETag of the releases listing the cached tags of the repo were last checked against.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+
+    Returns:
+        str: The ETag, or None if the repo has no cached tags.
+    """
+    with _tags_lock:
+        _load_tags()
+        return _tag_etags.get(repo)
+
+
+def lookup_tag(repo: str, tagName: str) -> tuple:
+    """This function will return the cached release id and commit sha of the tag.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        tagName (str): The tag name, i.e. ~> v1.2.3.
+
+    Returns:
+        tuple: The release id and the commit sha (either may be None), or None on a miss.
+    """
+    if not CACHE_ENABLED or not repo or not tagName:
+        return None
+
+    with _tags_lock:
+        _entries = _load_tags()
+        _key = _tag_key(repo, tagName)
+        if _key not in _entries:
+            return None
+
+        _entries.move_to_end(_key) # Most recently used -- only persisted with the next write
+        return (_entries[_key][2], _entries[_key][3])
+
+
+def _remember(repo: str, tagName: str, release_id: str, sha: str) -> bool:
+    # Merge into the entry, returns True if anything changed
+    _key = _tag_key(repo, tagName)
+    _entry = _tags.get(_key) or [repo, tagName, None, None]
+    _new = [repo, tagName, release_id or _entry[2], sha or _entry[3]]
+    _tags[_key] = _new
+    _tags.move_to_end(_key)
+
+    while len(_tags) > TAG_CACHE_SIZE:
+        _tags.popitem(last=False) # Evict the least recently used
+
+    return _new != _entry
+
+
+def remember_tag(repo: str, tagName: str, release_id: str = None, sha: str = None) -> None:
+    """This function will cache the release id and/or commit sha of a published release's tag.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        tagName (str): The tag name, i.e. ~> v1.2.3.
+        release_id (str): The release node id.
+        sha (str): The commit sha of the tag.
+    """
+    if not CACHE_ENABLED or not repo or not tagName or not (release_id or sha):
+        return
+
+    with _tags_lock:
+        _load_tags()
+        if _remember(repo, tagName, release_id, sha):
+            _save_tags()
+
+
+def forget_tag(repo: str, tagName: str) -> None:
+    """This function will drop the cached release id and commit sha of a tag, i.e. ~> after its release was deleted.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        tagName (str): The tag name, i.e. ~> v1.2.3.
+    """
+    if not CACHE_ENABLED or not repo or not tagName:
+        return
+
+    with _tags_lock:
+        if _load_tags().pop(_tag_key(repo, tagName), None) is not None:
+            _save_tags()
+
+
+def refresh_tags(repo: str, etag: str, releases: list[dict] = None) -> None:
+    """This function will reconcile the cached tags of the repo with a releases listing.
+
+    On a 304 (no releases) the entries are confirmed as they are. On a 200 the published releases are (re)cached,
+    and entries whose release id no longer matches the listing, or whose tag is now a draft, are dropped.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        etag (str): The ETag of the releases listing.
+        releases (list[dict]): The releases of the listing, None if it was not modified.
+    """
+    if not CACHE_ENABLED or not repo:
+        return
+
+    with _tags_lock:
+        _entries = _load_tags()
+        _changed = _tag_etags.get(repo) != etag
+        _tag_etags[repo] = etag
+
+        for i in releases or []:
+            _key = _tag_key(repo, i.get("tagName"))
+            if i.get("isDraft"):
+                # A draft's tag follows the branch until it is published
+                _changed = _entries.pop(_key, None) is not None or _changed
+                continue
+
+            _cached = _entries.get(_key)
+            if _cached and i.get("id") and _cached[2] and _cached[2] != i.get("id"):
+                del _entries[_key] # The release was re-created, the tag may point elsewhere
+                _changed = True
+
+            _changed = _remember(repo, i.get("tagName"), i.get("id"), i.get("commitSha")) or _changed
+
+        if _changed:
+            _save_tags()
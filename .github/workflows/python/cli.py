@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""This python script is the single entry point for the release scripts -- sre-release <command> [options]
+
+The subcommand modules are only imported once the command is known, and importing them has no side effects.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import sys
+import time
+import argparse
+import importlib
+import subprocess
+
+BASE = os.path.dirname(os.path.abspath(__file__)) # Get the base directory of the script
+STARTUP_BUDGET_MS = float(os.environ.get("SRE_STARTUP_BUDGET_MS", "250")) # Cold start budget per subcommand (--help)
+
+# Subcommand --> (module, description) -- the module is imported lazily and must expose main(argv)
+COMMANDS = {
+    "sha": ("release_sha", "Print the commit sha of the draft, pre-release or latest release."),
+    "promote": ("promote", "Promote draft to pre-release, or pre-release to latest."),
+    "preflight": ("preflight", "Run the pre-promotion checks concurrently, and plan the promotion from the same snapshot."),
+    "validate-version": ("registrant-github-version", "Validate the registrant version against the releases."),
+    "fleet": ("fleet", "Print the release state of many repositories."),
+    "audit": ("audit", "Audit the release history of repositories for semver monotonicity."),
+    "dispatch": ("dispatch", "Dispatch the deploy workflows of the services of a release, and wait for the runs."),
+    "daemon": ("daemon", "Serve sha, validate-version and promote from a warm process over a Unix socket."),
+}
+
+
+def run(command: str, argv: list) -> int:
+    """This function will import the subcommand module and run it.
+
+    Args:
+        command (str): The subcommand, i.e. ~> sha.
+        argv (list): The arguments for the subcommand.
+
+    Returns:
+        int: The exit code.
+    """
+    if BASE not in sys.path:
+        sys.path.insert(0, BASE) # The scripts import each other as top-level modules
+
+    from tracing import span # Next to the scripts, so only importable once BASE is on the path
+
+    with span(f"sre-release.{command}", argv=" ".join(argv)):
+        _module = importlib.import_module(COMMANDS[command][0])
+        return _module.main(argv) or 0
+
+
+def check_startup(budget_ms: float = STARTUP_BUDGET_MS, runs: int = 5, commands: list = None) -> int:
+    """This function will measure the cold start of every subcommand (`<command> --help` in a fresh interpreter).
+
+    Args:
+        budget_ms (float): The budget for the best of the runs, in milliseconds.
+        runs (int): The number of runs per subcommand.
+        commands (list): The subcommands to measure, defaults to all of them.
+
+    Returns:
+        int: 0 if every subcommand starts within the budget, 1 otherwise.
+    """
+    _failed = False
+    for _command in commands or COMMANDS:
+        _times = []
+        for _ in range(runs):
+            _start = time.perf_counter()
+            subprocess.run([sys.executable, __file__, _command, "--help"], check=True, capture_output=True)
+            _times.append((time.perf_counter() - _start) * 1000)
+
+        _best = min(_times)
+        _status = "OK" if _best <= budget_ms else "FAILED"
+        _failed = _failed or _best > budget_ms
+        print(f"[{_status}] - {_command}: {_best:.1f}ms (budget {budget_ms:.0f}ms)")
+
+    return 1 if _failed else 0
+
+
+def main(argv: list = None) -> int:
+    """This function will dispatch to the subcommand.
+
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: The exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="sre-release",
+        description="Release tooling for the repo -- @manscaped-dev/<repo>.",
+        epilog="\n".join(f"  {k:<18}{v[1]}" for k, v in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=[*COMMANDS, "startup-check"], help="The subcommand to run.")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="The arguments for the subcommand (see <command> --help).")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "startup-check":
+        return check_startup()
+
+    return run(args.command, args.args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,92 +3,613 @@
 # Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
 """
 import os
-import json
 import sys
+import json
+import time
 import subprocess # We will use subprocess to run the gh command to get the deployment pipelines
 
-from icecream import ic
+from debug import ic
+from cache import load_snapshot, save_snapshot, touch_snapshot, is_fresh, invalidate_snapshot, lookup_tag, remember_tag, refresh_tags, forget_tag
+from events import EVENT_MAX_AGE, load_release_event, apply_release_delta, with_latest
+from transport import get_transport
+from gitrefs import resolve_tag
+from releases import Release, ReleaseIndex, as_index
+from schema import SchemaError, decode_releases, decode_release, decode_ref, decode_tag, release_from_rest, release_from_node
+from tracing import span, traced, annotate
 
 BASE = os.path.dirname(os.path.abspath(__file__)) # Get the base directory of the script
+RELEASE_QUERY = os.environ.get("SRE_RELEASE_QUERY", "graphql") # graphql (one batched round-trip) or rest
+PAGE_SIZE = int(os.environ.get("SRE_RELEASE_PAGE_SIZE", "100")) # Releases per page -- 100 is the API maximum
+WAIT_TIMEOUT = float(os.environ.get("SRE_WAIT_TIMEOUT", "600")) # Seconds --wait watches the releases before giving up
+WAIT_INTERVAL = float(os.environ.get("SRE_WAIT_INTERVAL", "2")) # First poll interval, in seconds
+WAIT_INTERVAL_MAX = float(os.environ.get("SRE_WAIT_INTERVAL_MAX", "30")) # The interval grows up to this while nothing changes
+PEEL_DEPTH = 4 # Annotated tags followed to the commit -- a tag of a tag is rare, a longer chain is an error
 ic.disable() # Disable debug mode
 
+_checked_tags = set() # Repos whose cached tags were reconciled with the releases listing in this run
+
+# One round-trip for the release flags, node ids and peeled tag commit SHAs of the repository
+RELEASE_STATE_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    releases(first: $first, after: $after, orderBy: {field: CREATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        id
+        databaseId
+        name
+        tagName
+        createdAt
+        publishedAt
+        isDraft
+        isPrerelease
+        isLatest
+        tagCommit { oid }
+      }
+    }
+  }
+}
+"""
+
+
+def get_repository() -> str:
+    """This function will return the repository name -- i.e. ~> manscaped-dev/<repo>.
+
+    Returns:
+        str: The repository, from GITHUB_REPOSITORY or the checkout's gh remote.
+    """
+    if os.environ.get("GITHUB_REPOSITORY"):
+        return os.environ.get("GITHUB_REPOSITORY")
+
+    _cmd = ["gh", "repo", "view", "--json", "nameWithOwner", "--jq", ".nameWithOwner"]
+    r = subprocess.run(_cmd, capture_output=True)
+    if r.returncode != 0:
+        ic(f"get_repository() - Unable to resolve the repository: {r.stderr}")
+        return None
+
+    return r.stdout.decode("utf-8").strip() or None
+
+
+def _decode(repo: str, decoder, data: bytes, **kwargs):
+    # The boundary -- a response of the wrong shape ends the script like any other API error
+    try:
+        return decoder(data, **kwargs)
+    except ValueError as e: # SchemaError, or a body that is not JSON at all
+        print(f"[ERROR] - Unexpected API response for {repo}: {e}")
+        sys.exit(1)
+
+
+def _release_pages_graphql(repo: str, per_page: int = PAGE_SIZE):
+    """This function will yield the release pages for the repo -- @manscaped-dev/<repo> from the GraphQL API.
+
+    Every page carries the release flags, node ids and peeled tag commit SHAs together, so later lookups are free.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        per_page (int): The releases per page.
+
+    Yields:
+        list[Release]: The releases of one page -- commitSha is None for a draft without a tag yet.
+    """
+    _owner, _, _name = repo.partition("/")
+    _cursor = None
+
+    while True:
+        with span("releases.list.page", repo=repo, api="graphql"):
+            _data = get_transport().graphql(RELEASE_STATE_QUERY, {"owner": _owner, "name": _name, "first": per_page, "after": _cursor})
+
+        if not _data or not _data.get("repository"):
+            print(f"[ERROR] - Unable to query the release state for {repo}.")
+            sys.exit(1)
+
+        _releases = _data["repository"]["releases"]
+        try:
+            yield [release_from_node(i, path=f"releases.nodes[{n}]") for n, i in enumerate(_releases["nodes"])]
+        except SchemaError as e:
+            print(f"[ERROR] - Unexpected release state for {repo}: {e}")
+            sys.exit(1)
+
+        if not _releases["pageInfo"]["hasNextPage"]:
+            return
+
+        _cursor = _releases["pageInfo"]["endCursor"]
+
+
+def _release_pages_rest(repo: str, per_page: int = PAGE_SIZE, first_page=None):
+    """This function will yield the release pages for the repo -- @manscaped-dev/<repo> from the REST API.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        per_page (int): The releases per page.
+        first_page (Response): The first page, if it was already fetched (i.e. ~> by the conditional request).
+
+    Yields:
+        list[Release]: The releases of one page.
+    """
+    _transport = get_transport()
+    with span("releases.view", repo=repo, tag="latest"):
+        _latest = _transport.request("GET", f"repos/{repo}/releases/latest") # 404 when nothing has been released yet
+    _latest_tag = _decode(repo, decode_release, _latest.body).tagName if _latest.status == 200 else None
+
+    _page = 1
+    r = first_page
+    while True:
+        if r is None:
+            with span("releases.list.page", repo=repo, api="rest", page=_page):
+                r = _transport.request("GET", f"repos/{repo}/releases?per_page={per_page}&page={_page}")
+
+        if r.status != 200:
+            print(f"[ERROR] - Unable to list the releases for {repo} (HTTP {r.status}): {r.body}")
+            sys.exit(1)
+
+        yield _decode(repo, decode_releases, r.body, latest_tag=_latest_tag) # Only one page is decoded and held at a time
+
+        if 'rel="next"' not in r.headers.get("link", ""):
+            return
+
+        _page += 1
+        r = None
+
+
+def iter_releases(repo: str = None, full: bool = False, per_page: int = PAGE_SIZE, first_page=None):
+    """This function will stream the releases for the repo -- @manscaped-dev/<repo>, page by page, newest first.
+
+    By default the listing stops after the page on which the draft, prerelease and latest releases have all been seen.
+    With full=True every page of the history is streamed -- only one page is held in memory at a time.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+        full (bool): Stream the whole release history, defaults to False.
+        per_page (int): The releases per page.
+        first_page (Response): The first REST page, if it was already fetched.
+
+    Yields:
+        Release: The releases -- `Release.to_dict()` has the `get_releases` fields.
+    """
+    _repo = repo or get_repository()
+    if RELEASE_QUERY == "graphql":
+        _pages = _release_pages_graphql(_repo, per_page=per_page)
+    else:
+        _pages = _release_pages_rest(_repo, per_page=per_page, first_page=first_page)
+
+    _found = set()
+    for _page in _pages:
+        for i in _page:
+            yield i
+            _found.update(k for k in ("isDraft", "isPrerelease", "isLatest") if getattr(i, k))
+
+        if not full and len(_found) == 3:
+            ic(f"iter_releases() - Draft, prerelease and latest found for {_repo}, stopping the listing.")
+            _pages.close()
+            return
+
+
+@traced("releases.list")
+def _fetch_releases(repo: str, etag: str = None, probe: bool = True) -> tuple:
+    """This function will list the releases with a conditional request -- 304s do not count against the rate limit.
 
-def get_releases() -> list[dict]:
+    The REST probe (If-None-Match) is what revalidates -- the GraphQL listing only follows a 200, so it is at least as new as
+    the ETag it is stored with. Without anything to revalidate (probe=False) the GraphQL listing alone is the one call,
+    and the snapshot gets its ETag the first time it is revalidated.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        etag (str): The ETag of the cached snapshot, if any.
+        probe (bool): Send the REST probe -- False for a cold read, where it could only be a 200 (GraphQL listing only).
+
+    Returns:
+        tuple: The HTTP status code, the current ETag (None without the probe), and the draft/prerelease/latest releases (None on a 304).
+    """
+    annotate("repo", repo)
+    r = None
+    if probe or RELEASE_QUERY != "graphql": # The REST listing's first page is the probe
+        r = get_transport().request("GET", f"repos/{repo}/releases?per_page={PAGE_SIZE}", headers={"If-None-Match": etag} if etag else None)
+        annotate("http.status", r.status)
+
+        if r.status == 304:
+            return (304, etag, None)
+
+        if r.status != 200:
+            print(f"[ERROR] - Unable to list the releases for {repo} (HTTP {r.status}): {r.body}")
+            sys.exit(1)
+
+    _scanned = iter_releases(repo, first_page=r)
+    _releases = [i.to_dict() for i in _scanned if i.isDraft or i.isPrerelease or i.isLatest] # The snapshot keeps dicts
+
+    return (200, r.headers.get("etag") if r is not None else None, _releases)
+
+
+def get_releases(repo: str = None, use_cache: bool = True) -> list[dict]:
     """This function will return the releases for the repo -- @manscaped-dev/<repo>.
-    
+
+    The releases are served from the on-disk snapshot (cache.py) while it is within its TTL, and revalidated
+    with a conditional request once it expires -- only a changed listing pays for a full listing.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+        use_cache (bool): Use the on-disk release snapshot, defaults to True.
+
     Returns:
         list[dict]: The releases for the repo -- @manscaped-dev/manscaped-sre-deploy
     """
-    # Let's get a JSON objects of the name, id of the workflows
-    _cmd = [
-            "gh",
-            "release",
-            "list",
-            "--json",
-            "createdAt,isDraft,isLatest,isPrerelease,name,publishedAt,tagName",
-        ]
-    
-    r = subprocess.run(_cmd, check=True, capture_output=True)
-    
-    if r.returncode != 0:
-        print(f"[ERROR] - {r.stderr}")
+    return get_release_snapshot(repo=repo, use_cache=use_cache)[1]
+
+
+@traced("releases.get")
+def get_release_snapshot(repo: str = None, use_cache: bool = True, revalidate: bool = False) -> tuple:
+    """This function will return the releases for the repo -- @manscaped-dev/<repo>, with the ETag of the listing they came from.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+        use_cache (bool): Use the on-disk release snapshot, defaults to True.
+        revalidate (bool): Revalidate the snapshot even within its TTL, i.e. ~> before planning a promotion.
+
+    Returns:
+        tuple: The ETag of the listing and the releases (see `get_releases`).
+    """
+    _repo = repo or get_repository()
+    if not _repo:
+        print("[ERROR] - Unable to determine the repository, please set GITHUB_REPOSITORY.")
+        sys.exit(1)
+
+    _snapshot = load_snapshot(_repo) if use_cache else None
+    annotate("repo", _repo)
+
+    if _snapshot and not revalidate:
+        _snapshot = _apply_release_event(_repo, _snapshot) or _snapshot
+
+    if _snapshot and is_fresh(_snapshot) and not revalidate:
+        ic(f"get_releases() - Serving the releases for {_repo} from the snapshot.")
+        annotate("source", "snapshot")
+        _check_tags(_repo, _snapshot.get("etag"), _snapshot.get("releases"))
+        return (_snapshot.get("etag"), _snapshot.get("releases"))
+
+    # A cold read has nothing to revalidate -- a promotion plan (revalidate) still needs the ETag, to check it when applied
+    _status, _etag, _data = _fetch_releases(_repo, etag=_snapshot.get("etag") if _snapshot else None, probe=bool(_snapshot) or revalidate)
+    if _status == 304:
+        ic(f"get_releases() - The snapshot for {_repo} is still valid (304).")
+        annotate("source", "revalidated")
+        touch_snapshot(_repo, _snapshot)
+        _check_tags(_repo, _etag, _snapshot.get("releases"))
+        return (_etag, _snapshot.get("releases"))
+
+    if use_cache:
+        save_snapshot(_repo, releases=_data, etag=_etag, event=_event_key(_repo)) # A listing includes the event of this run
+
+    annotate("source", "api")
+    _check_tags(_repo, _etag, _data)
+    return (_etag, _data)
+
+
+def _event_key(repo: str) -> str:
+    _event = load_release_event(repo)
+    return _event["key"] if _event else None
+
+
+@traced("releases.event")
+def _apply_release_event(repo: str, snapshot: dict) -> dict:
+    """This function will bring the snapshot up to date with the release event that triggered the run (events.py).
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        snapshot (dict): The cached snapshot.
+
+    Returns:
+        dict: The updated snapshot, or None if there is no event to apply (the caller goes on with the snapshot as it is).
+    """
+    _event = load_release_event(repo)
+    if _event is None or snapshot.get("event") == _event["key"]:
+        return None # No release event, or the snapshot already includes it
+
+    if time.time() - snapshot.get("fetchedAt", 0) > EVENT_MAX_AGE:
+        ic(f"_apply_release_event() - The snapshot for {repo} is too old to apply the {_event['action']} event to.")
+        return None
+
+    annotate("action", _event["action"])
+    try:
+        _release = release_from_rest(_event["release"], path="release").to_dict()
+    except SchemaError as e:
+        ic(f"_apply_release_event() - Unexpected event payload for {repo} ({e}), listing the releases.")
+        return None
+    _releases, _moved = apply_release_delta(snapshot.get("releases") or [], _event["action"], _release)
+
+    if _moved: # The payload does not say which release is the latest now -- one call instead of a listing
+        r = get_transport().request("GET", f"repos/{repo}/releases/latest")
+        if r.status not in (200, 404):
+            ic(f"_apply_release_event() - Unable to get the latest release for {repo} (HTTP {r.status}), listing the releases.")
+            return None
+        _latest = _decode(repo, decode_release, r.body).to_dict() if r.status == 200 else None # with_latest sets the flag
+        _releases = with_latest(_releases, _latest)
+
+    if _event["action"] == "deleted":
+        forget_tag(repo, _release.get("tagName"))
+
+    ic(f"get_releases() - Applied the {_event['action']} event of {_release.get('tagName')} to the snapshot for {repo}.")
+    # The delta covers one release only -- the others are as old as the listing, so the TTL still runs from its fetch
+    _fetched = snapshot.get("fetchedAt", 0)
+    save_snapshot(repo, releases=_releases, etag=snapshot.get("etag"), event=_event["key"], fetched_at=_fetched)
+    return load_snapshot(repo) or dict(snapshot, releases=_releases, fetchedAt=_fetched, event=_event["key"])
+
+
+@traced("releases.by_tag")
+def get_releases_by_tag(tags: list[str], repo: str = None) -> list[dict]:
+    """This function will read the given releases only -- one GraphQL query for every tag (REST: one call per tag, plus latest).
+
+    Args:
+        tags (list[str]): The tag names, i.e. ~> ["v1.2.3"]. Drafts are only found with the GraphQL query.
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+
+    Returns:
+        list[dict]: The releases found (see `get_releases`), in the order of the tags.
+    """
+    _repo = repo or get_repository()
+    annotate("repo", _repo)
+
+    if RELEASE_QUERY == "graphql":
+        _owner, _, _name = _repo.partition("/")
+        _fields = "id databaseId name tagName createdAt publishedAt isDraft isPrerelease isLatest tagCommit { oid }"
+        _aliases = " ".join(f"r{i}: release(tagName: {json.dumps(t)}) {{ {_fields} }}" for i, t in enumerate(tags))
+        _data = get_transport().graphql(f"query($owner: String!, $name: String!) {{ repository(owner: $owner, name: $name) {{ {_aliases} }} }}", {"owner": _owner, "name": _name})
+        if not _data or not _data.get("repository"):
+            print(f"[ERROR] - Unable to read the releases {', '.join(tags)} for {_repo}.")
+            sys.exit(1)
+        _nodes = [(f"r{i}", _data["repository"].get(f"r{i}")) for i in range(len(tags))]
+        return [_decode(_repo, release_from_node, n, path=f"repository.{k}").to_dict() for k, n in _nodes if n]
+
+    _transport = get_transport()
+    _latest = _transport.request("GET", f"repos/{_repo}/releases/latest")
+    _latest_tag = _decode(_repo, decode_release, _latest.body).tagName if _latest.status == 200 else None
+    _releases = []
+    for t in tags:
+        r = _transport.request("GET", f"repos/{_repo}/releases/tags/{t}")
+        if r.status == 200:
+            _releases.append(_decode(_repo, decode_release, r.body, latest_tag=_latest_tag).to_dict())
+    return _releases
+
+
+def get_release_changes(repo: str = None, etag: str = None) -> tuple:
+    """This function will check if the releases changed since the listing with this ETag -- one conditional request.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+        etag (str): The ETag of the listing to compare with.
+
+    Returns:
+        tuple: The current ETag, and the releases -- None if nothing changed (304).
+    """
+    _repo = repo or get_repository()
+    _status, _etag, _data = _fetch_releases(_repo, etag=etag)
+    if _status == 304:
+        return (_etag, None)
+
+    save_snapshot(_repo, releases=_data, etag=_etag, event=_event_key(_repo)) # The snapshot follows the newest listing
+    _check_tags(_repo, _etag, _data)
+    return (_etag, _data)
+
+
+@traced("releases.wait")
+def wait_for_releases(ready, repo: str = None, timeout: float = WAIT_TIMEOUT, interval: float = WAIT_INTERVAL, max_interval: float = WAIT_INTERVAL_MAX) -> ReleaseIndex:
+    """This function will watch the releases until they are ready, i.e. ~> until release-drafter created the draft.
+
+    Every poll is a conditional request against the ETag of the last listing -- a 304 costs no rate limit.
+    The interval grows while nothing changes, and drops back once the releases move (the drafter is mid-update).
+
+    Args:
+        ready (callable): ReleaseIndex --> bool, True once the expected releases are there.
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+        timeout (float): The deadline, in seconds.
+        interval (float): The first poll interval, in seconds.
+        max_interval (float): The longest poll interval, in seconds.
+
+    Returns:
+        ReleaseIndex: The ready releases, or None if the deadline passed first.
+    """
+    _repo = repo or get_repository()
+    _deadline = time.monotonic() + timeout
+    _etag, _releases = get_release_snapshot(repo=_repo, revalidate=True)
+    _interval = interval
+    _polls = 0
+
+    while True:
+        _index = ReleaseIndex(_releases)
+        if ready(_index):
+            annotate("polls", _polls)
+            return _index
+
+        _remaining = _deadline - time.monotonic()
+        if _remaining <= 0:
+            annotate("polls", _polls)
+            annotate("timeout", True)
+            return None
+
+        ic(f"wait_for_releases() - The releases of {_repo} are not ready, polling again in {min(_interval, _remaining):.1f}s.")
+        time.sleep(min(_interval, _remaining))
+        _polls += 1
+
+        _etag, _changed = get_release_changes(repo=_repo, etag=_etag)
+        if _changed is None:
+            _interval = min(_interval * 1.5, max_interval) # Nothing moved -- back off
+        else:
+            _releases = _changed
+            _interval = interval
+
+
+def _check_tags(repo: str, etag: str, releases: list[dict]) -> None:
+    # Reconcile the tag cache with the listing we just served -- no extra request
+    refresh_tags(repo, etag, releases)
+    _checked_tags.add(repo)
+
+
+def get_cached_tag(tagName: str, repo: str = None) -> tuple:
+    """This function will return the cached release id and commit sha of a published release's tag (cache.py).
+
+    The cached tags of a repo are only served once they were checked against the releases listing in this run,
+    which costs at most one conditional request (or none, if the listing was already served).
+
+    Args:
+        tagName (str): The tag name, i.e. ~> v1.2.3.
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+
+    Returns:
+        tuple: The release id and the commit sha (either may be None), or None on a miss.
+    """
+    _repo = repo or get_repository()
+    if lookup_tag(_repo, tagName) is None:
+        return None # Nothing to verify
+
+    if _repo not in _checked_tags:
+        get_releases(repo=_repo)
+
+    return lookup_tag(_repo, tagName)
+
+
+def _is_checkout(repo: str) -> bool:
+    # The checkout only holds the tags of its own repository -- a same-named tag of another repo is another commit
+    return not repo or repo.lower() == (get_repository() or "").lower()
+
+
+@traced("refs.resolve")
+def get_release_commit_sha(obj: dict, repo: str = None) -> str:
+    """This function will return the commit sha of the release's tag -- listing, tag cache, local checkout, then the API.
+
+    The local checkout is only read for its own repository (GITHUB_REPOSITORY), other repos go to the API.
+
+    Args:
+        obj (dict): The release, from the release index.
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+
+    Returns:
+        str: The commit sha for the release
+    """
+    _tag = obj.get("tagName") # Get the tag name for the draft release
+
+    if not _tag or _tag == "":
+        print("Error: The tag name is empty.")
+        sys.exit(1)
+
+    _repo = repo or get_repository()
+    annotate("tag", _tag)
+    if obj.get("commitSha"):
+        annotate("source", "listing")
+        return obj.get("commitSha") # Already resolved by the batched release query
+
+    # A draft's tag follows the branch until it is published, so only published tags are cached
+    _cached = None if obj.get("isDraft") else get_cached_tag(_tag, repo=_repo)
+    if _cached and _cached[1]:
+        annotate("source", "tag-cache")
+        return _cached[1]
+
+    _sha = resolve_tag(_tag) if _is_checkout(repo) else None # The local checkout -- no API call when the tag was fetched
+    if _sha:
+        annotate("source", "checkout")
+        if not obj.get("isDraft"):
+            remember_tag(_repo, _tag, sha=_sha)
+        return _sha
+
+    annotate("source", "api")
+    r = get_transport().request("GET", f"repos/{_repo}/git/refs/tags/{_tag}")
+    if r.status != 200:
+        print(f"Error: {r.body}")
         sys.exit(1)
 
-    _data = json.loads(r.stdout.decode("utf-8")) # JSON data for ALL the releases in the repository
+    _ref = _decode(_repo, decode_ref, r.body) # The tag ref -- validated once, the sha is always a str
+    ic(f"Ref: {_ref}") # Print the ref for the release - debugging purposes
+
+    # An annotated tag's ref points to the tag object -- peel it to the commit, like the listing and the checkout do
+    for _ in range(PEEL_DEPTH):
+        if _ref.type != "tag":
+            break
+        r = get_transport().request("GET", f"repos/{_repo}/git/tags/{_ref.sha}")
+        if r.status != 200:
+            print(f"Error: {r.body}")
+            sys.exit(1)
+        _ref = _decode(_repo, decode_tag, r.body)
+
+    if _ref.type != "commit":
+        print(f"[ERROR] - The tag {_tag} of {_repo} does not point to a commit ({_ref.type} {_ref.sha}).")
+        sys.exit(1)
 
-    return [i for i in _data if any(i.get(k) for k in ("isDraft", "isPrerelease", "isLatest"))]
+    if not obj.get("isDraft"):
+        remember_tag(_repo, _tag, sha=_ref.sha)
 
+    return _ref.sha
 
-def get_draft_release(obj: list) -> dict:
+
+def get_release_index(repo: str = None, use_cache: bool = True) -> ReleaseIndex:
+    """This function will return the release index for the repo -- @manscaped-dev/<repo>, built in one pass over `get_releases`.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+        use_cache (bool): Use the on-disk release snapshot, defaults to True.
+
+    Returns:
+        ReleaseIndex: The releases, indexed by role and by tag.
+    """
+    return ReleaseIndex(get_releases(repo=repo, use_cache=use_cache))
+
+
+def get_draft_release(obj: list) -> Release:
     """This function will return the draft release for the repo -- @manscaped-dev/<repo>.
     
+    Args:
+        obj (ReleaseIndex|list): The release index, or the releases from `get_releases`.
+
     Returns:
-        dict: The draft release for the SRE Deployments Repo -- @manscaped-dev/<repo>.
+        Release: The draft release for the SRE Deployments Repo -- @manscaped-dev/<repo>.
     """
-    _data = [i for i in obj if i.get("isDraft") == True]
+    _index = as_index(obj)
     
-    if len(_data) > 1:
+    if "draft" in _index.multiple:
         print("[ERROR] - There are multiple draft releases.")
         sys.exit(1)
 
-    return _data[0] if _data else None # Return the draft release
+    return _index.draft # Return the draft release
 
 
-def get_pre_release(obj: list) -> dict:
+def get_pre_release(obj: list) -> Release:
     """This function will return the prerelease for the Repo -- @manscaped-dev/<repo>.
     
+    Args:
+        obj (ReleaseIndex|list): The release index, or the releases from `get_releases`.
+
     Returns:
-        dict: The prerelease for the repo -- @manscaped-dev/<repo>.
+        Release: The prerelease for the repo -- @manscaped-dev/<repo>.
     """
-    _data = [i for i in obj if i.get("isPrerelease") == True]
+    _index = as_index(obj)
 
-    if len(_data) > 1:
+    if "prerelease" in _index.multiple:
         print("[ERROR] - There are multiple pre-releases.")
         sys.exit(1)
 
-    return _data[0] if _data else None # Return the pre-release
+    return _index.prerelease # Return the pre-release
 
 
-def latest_release(obj: list) -> dict:
+def latest_release(obj: list) -> Release:
     """This function will return the release for the repo -- @manscaped-dev/<repo>.
     
+    Args:
+        obj (ReleaseIndex|list): The release index, or the releases from `get_releases`.
+
     Returns:
-        dict: The release for the repo -- @manscaped-dev/<repo>.
+        Release: The release for the repo -- @manscaped-dev/<repo>.
     """
-    _data = [i for i in obj if i.get("isLatest") == True]
+    _index = as_index(obj)
 
-    if len(_data) > 1:
+    if "latest" in _index.multiple:
         print("[ERROR] - There are multiple latest releases.")
         sys.exit(1)
 
-    return _data[0] if _data else None # Return the pre-release
+    return _index.latest # Return the latest release
 
 
-def get_release_id(tagName: str) -> str:
+@traced("releases.view")
+def get_release_id(tagName: str, releases: list = None, repo: str = None) -> str:
     """This function will return the draft release id for the repo -- @manscaped-dev/<repo>.
     
     Args:
         tagName (str): The tag name for the draft release.
+        releases (ReleaseIndex|list): The releases from `get_releases` -- the id is served from them when present.
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
 
     Returns:
         str: The draft release id for the manscaped-5-server -- @manscaped-dev/<repo>.
@@ -98,25 +619,79 @@ def get_release_id(tagName: str) -> str:
         print("[ERROR] - The tag name is empty.")
         sys.exit(1)
 
-    _cmd = [
-        "gh",
-        "release",
-        "view",
-        tagName,
-        "--json",
-        "id",
-    ]
-    r = subprocess.run(_cmd, check=True, capture_output=True)
-    if r.returncode != 0:
-        print(f"[ERROR] - {r.stderr}")
-        sys.exit(1)
-    
-    _data = json.loads(r.stdout.decode("utf-8")) # JSON data for the release
-    
-    if _data.get("id"):
-        _id = _data.get("id")
+    annotate("tag", tagName)
+    _known = as_index(releases).tag(tagName) if releases else None
+    if _known and _known.id:
+        return _known.id # Already resolved by the release listing, no round-trip needed
+
+    _repo = repo or get_repository()
+    _cached = get_cached_tag(tagName, repo=_repo)
+    if _cached and _cached[0]:
+        return _cached[0] # Cached by an earlier job
+
+    r = get_transport().request("GET", f"repos/{_repo}/releases/tags/{tagName}")
+
+    if r.status == 200:
+        _id = _decode(_repo, decode_release, r.body).id # The release view -- its node id is validated at the boundary
+        remember_tag(_repo, tagName, release_id=_id) # Only published releases are served by the tags endpoint
+    elif r.status == 404:
+        # Draft releases are not served by the tags endpoint, so look for them in the listing
+        _known = get_release_index(repo=_repo).tag(tagName)
+        _id = _known.id if _known else None
     else:
+        print(f"[ERROR] - Unable to view the release {tagName} (HTTP {r.status}): {r.body}")
+        sys.exit(1)
+
+    if not _id:
         print("[ERROR] - The id is empty.")
         sys.exit(1)
 
     return _id # Return the draft release id
+
+
+@traced("releases.edit")
+def edit_release(release: Release, repo: str = None, **fields) -> dict:
+    """This function will edit a release for the repo -- @manscaped-dev/<repo>, i.e. ~> draft to prerelease.
+
+    Args:
+        release (Release): The release to edit, from the release index.
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+        **fields: The REST fields to set, i.e. ~> draft=False, prerelease=True, make_latest="true".
+
+    Returns:
+        dict: The edited release.
+    """
+    if not release or not release.get("databaseId"):
+        print("[ERROR] - The release to edit is empty.")
+        sys.exit(1)
+
+    _repo = repo or get_repository()
+    annotate("repo", _repo)
+    annotate("tag", release.get("tagName"))
+    r = get_transport().request("PATCH", f"repos/{_repo}/releases/{release.get('databaseId')}", body=fields)
+    if r.status != 200:
+        print(f"[ERROR] - Unable to edit the release {release.get('tagName')} (HTTP {r.status}): {r.body}")
+        sys.exit(1)
+
+    invalidate_snapshot(_repo) # The cached release snapshot is stale now
+
+    return r.json()
+
+
+def get_rate_limit(resource: str = None) -> dict:
+    """This function will return the rate limit for the token -- the `rate_limit` endpoint itself is free.
+
+    Args:
+        resource (str): The rate limit resource, i.e. ~> core, graphql. Defaults to the resource of SRE_RELEASE_QUERY.
+
+    Returns:
+        dict: The rate limit -- limit, remaining, reset (epoch seconds), or None if it could not be read.
+    """
+    with span("rate_limit"):
+        r = get_transport().request("GET", "rate_limit")
+    if r.status != 200:
+        ic(f"get_rate_limit() - Unable to read the rate limit (HTTP {r.status}).")
+        return None
+
+    _resource = resource or ("graphql" if RELEASE_QUERY == "graphql" else "core")
+    return r.json().get("resources", {}).get(_resource)
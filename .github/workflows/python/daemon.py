@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""This python script is the release-state daemon for the release scripts -- @manscaped-dev/<repo>
+
+One warm process answers `sha`, `validate-version` and `promote` over a local Unix socket, so repeated calls in a job
+skip the interpreter startup, the imports, the transport setup and (mostly) the release listing:
+
+    - daemon.py start: Start the daemon in the background, and wait until it answers.
+    - daemon.py sha --release: Run the command in the daemon -- or in this process, if no daemon is running.
+    - daemon.py status / stop: Print the daemon metrics / stop the daemon.
+
+Between requests the daemon revalidates the release snapshot with a conditional request (a 304 costs no quota),
+at most every SRE_DAEMON_REFRESH seconds -- only a changed listing is listed again. Requests run one at a time.
+
+The client side only imports the standard library -- the scripts are imported by the daemon (or the in-process fallback).
+
+Every request runs in the client's working directory and environment (ENV -- i.e. ~> GITHUB_OUTPUT of the calling step,
+GITHUB_REPOSITORY and the token), restored once it is done. The variables read when the scripts are imported (PINNED_ENV) cannot
+change per request -- a client with different values is refused, restart the daemon in that environment instead.
+
+Protocol: one JSON line per connection, {"argv": ["sha", "--release"], "cwd": "...", "env": {...}} --> {"code": 0, "stdout": "...", "stderr": "..."}
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import io
+import os
+import sys
+import json
+import time
+import socket
+import contextlib
+import traceback
+import subprocess
+import socketserver
+
+BASE = os.path.dirname(os.path.abspath(__file__)) # Get the base directory of the script
+SOCKET = os.environ.get("SRE_DAEMON_SOCKET") or os.path.join(
+    os.environ.get("RUNNER_TEMP") or "/tmp", f"sre-release-{os.getuid()}.sock"
+)
+REFRESH = float(os.environ.get("SRE_DAEMON_REFRESH", "10")) # Seconds between snapshot revalidations
+IDLE_TIMEOUT = float(os.environ.get("SRE_DAEMON_IDLE", "900")) # The daemon exits after this many idle seconds
+COMMAND_TIMEOUT = float(os.environ.get("SRE_DAEMON_TIMEOUT", "3600")) # Seconds the client waits for a command
+COMMANDS = ("sha", "validate-version", "promote") # Served by the daemon -- the rest of cli.py runs in-process
+
+# Read by the scripts on every call -- sent by the client, and applied for its request only
+ENV = (
+    "GITHUB_OUTPUT", "GITHUB_STEP_SUMMARY", "GITHUB_ENV", "GITHUB_EVENT_NAME", "GITHUB_EVENT_PATH", "GITHUB_REF",
+    "GITHUB_REPOSITORY", "GITHUB_RUN_ID", "GITHUB_RUN_ATTEMPT", "GH_TOKEN", "GITHUB_TOKEN",
+)
+PINNED_ENV = ("GITHUB_WORKSPACE", "GITHUB_API_URL") # Read once, when the scripts are imported by the daemon
+
+
+def request(payload: dict, path: str = SOCKET, timeout: float = COMMAND_TIMEOUT) -> dict:
+    """This function will send one request to the daemon.
+
+    Args:
+        payload (dict): The request -- argv, cwd and env, or cmd (status, stop).
+        path (str): The daemon socket.
+        timeout (float): The seconds to wait for the answer -- the whole command, for argv.
+
+    Returns:
+        dict: The response.
+
+    Raises:
+        ConnectionError: If no daemon is listening on the socket -- the request was not sent.
+        OSError: If the daemon did not answer (TimeoutError after timeout seconds) -- the request may have run.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        try:
+            s.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise ConnectionError(f"No daemon is listening on {path}: {e}") from e
+        s.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        s.shutdown(socket.SHUT_WR)
+        _data = b"".join(iter(lambda: s.recv(65536), b""))
+
+    return json.loads(_data)
+
+
+def client_env() -> dict:
+    """This function will return the environment sent with a command -- ENV and PINNED_ENV, None if unset."""
+    return {k: os.environ.get(k) for k in (*ENV, *PINNED_ENV)}
+
+
+@contextlib.contextmanager
+def _environment(env: dict):
+    # The client's variables for one request -- unset in the daemon if the client does not have them
+    if env is None: # A request without an environment (status), or from an older client -- the daemon's own
+        yield
+        return
+
+    _saved = {k: os.environ.get(k) for k in ENV}
+    try:
+        for k in ENV:
+            if env.get(k) is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = env[k]
+        yield
+    finally:
+        for k, v in _saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+
+
+def _run_command(argv: list) -> int:
+    # The in-process path, shared by the daemon and the fallback
+    if BASE not in sys.path:
+        sys.path.insert(0, BASE)
+    import cli
+    return cli.run(argv[0], argv[1:])
+
+
+class _State:
+    """The daemon state -- the requests served, and when each repo's snapshot was last revalidated."""
+    __slots__ = ("requests", "refreshes", "refreshed", "started", "token")
+
+    def __init__(self):
+        self.requests = 0
+        self.refreshes = 0
+        self.refreshed = {} # repo --> time.monotonic() of the last revalidation
+        self.started = time.monotonic()
+        self.token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN") or None # The token of the shared transport
+
+
+def _use_token(state: _State) -> None:
+    """This function will replace the shared transport when the request's token is not the one it was built with."""
+    import transport
+
+    _token = transport.get_token()
+    if _token != state.token:
+        with transport._transport_lock:
+            if transport._transport is not None:
+                transport._transport.close()
+            transport._transport = None # Built again on the next call, with this token
+        state.token = _token
+
+
+def _refresh(state: _State) -> None:
+    """This function will revalidate the release snapshot of the current repository, if it was not done recently."""
+    from cache import CACHE_ENABLED
+    from common import get_repository, get_release_snapshot
+
+    _repo = get_repository()
+    if not CACHE_ENABLED or not _repo or time.monotonic() - state.refreshed.get(_repo, float("-inf")) < REFRESH:
+        return
+
+    get_release_snapshot(repo=_repo, revalidate=True) # One conditional request, the snapshot is written for the scripts
+    state.refreshed[_repo] = time.monotonic()
+    state.refreshes += 1
+
+
+def handle(payload: dict, state: _State) -> dict:
+    """This function will run one request in the daemon, capturing its output.
+
+    Args:
+        payload (dict): The request.
+        state (_State): The daemon state.
+
+    Returns:
+        dict: code, stdout and stderr -- or the status for {"cmd": "status"}.
+    """
+    from debug import ic
+    from transport import get_transport
+
+    if payload.get("cmd") == "status":
+        return {"code": 0, "pid": os.getpid(), "requests": state.requests, "refreshes": state.refreshes, "uptime": round(time.monotonic() - state.started, 1), "transport": get_transport().metrics()}
+
+    _argv = payload.get("argv") or []
+    if not _argv or _argv[0] not in COMMANDS:
+        return {"code": 2, "stdout": "", "stderr": f"[ERROR] - The daemon serves {', '.join(COMMANDS)}, not {_argv[:1]}.\n"}
+    if "--profile" in _argv:
+        return {"code": 2, "stdout": "", "stderr": "[ERROR] - --profile is written when the process exits, run the script directly to profile it.\n"}
+
+    _env = payload.get("env") or {}
+    _pinned = [k for k in PINNED_ENV if k in _env and _env[k] != os.environ.get(k)]
+    if _pinned:
+        return {"code": 2, "stdout": "", "stderr": f"[ERROR] - The daemon was started with a different {', '.join(_pinned)}, restart it in this environment (daemon.py stop / start).\n"}
+
+    state.requests += 1
+    _stdout, _stderr = io.StringIO(), io.StringIO()
+    _code = 0
+    _cwd = os.getcwd()
+    with contextlib.redirect_stdout(_stdout), contextlib.redirect_stderr(_stderr), _environment(payload.get("env")):
+        try:
+            os.chdir(payload.get("cwd") or _cwd)
+            _use_token(state)
+            _refresh(state)
+            _code = _run_command(_argv)
+        except SystemExit as e:
+            _code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            if e.code is not None and not isinstance(e.code, int):
+                print(e.code, file=sys.stderr)
+        except Exception:
+            traceback.print_exc()
+            _code = 1
+        finally:
+            os.chdir(_cwd)
+            ic.disable() # --debug is per request
+
+    return {"code": _code, "stdout": _stdout.getvalue(), "stderr": _stderr.getvalue()}
+
+
+def serve(path: str = SOCKET, idle_timeout: float = IDLE_TIMEOUT) -> int:
+    """This function will serve requests on the Unix socket until stopped, or idle for idle_timeout seconds.
+
+    Args:
+        path (str): The socket path -- only the current user can connect (0600).
+        idle_timeout (float): The idle seconds before the daemon exits.
+
+    Returns:
+        int: The exit code.
+    """
+    if BASE not in sys.path:
+        sys.path.insert(0, BASE)
+    import cli # Warm every module once -- the transport, caches and parsers stay loaded between requests
+    for _command in COMMANDS:
+        __import__(cli.COMMANDS[_command][0])
+
+    _state = _State()
+    _stop = []
+
+    class _Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            try:
+                _payload = json.loads(self.rfile.readline() or b"{}")
+            except ValueError:
+                _payload = {}
+
+            if _payload.get("cmd") == "stop":
+                _stop.append(True)
+                _response = {"code": 0}
+            else:
+                _response = handle(_payload, _state)
+            self.wfile.write(json.dumps(_response).encode("utf-8") + b"\n")
+
+    if os.path.exists(path):
+        try:
+            request({"cmd": "status"}, path=path, timeout=1)
+            print(f"[ERROR] - A daemon is already listening on {path}.")
+            return 1
+        except OSError:
+            os.remove(path) # A stale socket of a daemon that did not exit cleanly
+
+    _old_umask = os.umask(0o177) # The socket is created 0600
+    try:
+        _server = socketserver.UnixStreamServer(path, _Handler)
+    finally:
+        os.umask(_old_umask)
+
+    _server.timeout = idle_timeout
+    _idle = []
+    _server.handle_timeout = lambda: _idle.append(True)
+    print(f"[INFO] - The release-state daemon ({os.getpid()}) is listening on {path}.", flush=True)
+
+    try:
+        while not _stop and not _idle:
+            _server.handle_request() # One request at a time -- the scripts share module state
+    finally:
+        _server.server_close()
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    print(f"[INFO] - The release-state daemon stopped after {_state.requests} requests{' (idle)' if _idle else ''}.", flush=True)
+    return 0
+
+
+def start(path: str = SOCKET, timeout: float = 10) -> int:
+    """This function will start the daemon in the background, and wait until it answers.
+
+    Args:
+        path (str): The socket path.
+        timeout (float): The seconds to wait for the daemon.
+
+    Returns:
+        int: The exit code.
+    """
+    try:
+        request({"cmd": "status"}, path=path, timeout=1)
+        print(f"[INFO] - The release-state daemon is already running on {path}.")
+        return 0
+    except OSError:
+        pass
+
+    _log = open(f"{path}.log", "ab")
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve", "--socket", path], stdin=subprocess.DEVNULL, stdout=_log, stderr=_log, start_new_session=True)
+    _log.close()
+
+    _deadline = time.monotonic() + timeout
+    while time.monotonic() < _deadline:
+        try:
+            _status = request({"cmd": "status"}, path=path, timeout=1)
+            print(f"[SUCCESS] - The release-state daemon ({_status['pid']}) is listening on {path}.")
+            return 0
+        except (OSError, ValueError):
+            time.sleep(0.02)
+
+    print(f"[ERROR] - The release-state daemon did not start within {timeout:.0f}s, see {path}.log.")
+    return 1
+
+
+def main(argv: list = None) -> int:
+    """This function will run the daemon (serve, start, stop, status), or send a command to it.
+
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: The exit code of the command.
+    """
+    _argv = list(sys.argv[1:] if argv is None else argv)
+    _path = SOCKET
+    if len(_argv) >= 2 and _argv[0] in ("serve", "start", "stop", "status") and _argv[1] == "--socket":
+        _path = _argv[2] if len(_argv) > 2 else _path
+        _argv = _argv[:1] + _argv[3:]
+
+    if not _argv or _argv[0] in ("-h", "--help"):
+        print(__doc__.split("# Author")[0].strip())
+        return 0
+
+    if _argv[0] == "serve":
+        return serve(path=_path)
+
+    if _argv[0] == "start":
+        return start(path=_path)
+
+    if _argv[0] in ("stop", "status"):
+        try:
+            _response = request({"cmd": _argv[0]}, path=_path, timeout=5)
+        except OSError:
+            print(f"[INFO] - No release-state daemon is listening on {_path}.")
+            return 0 if _argv[0] == "stop" else 1
+        print(json.dumps(_response, indent=2) if _argv[0] == "status" else "[SUCCESS] - The release-state daemon stopped.")
+        return 0
+
+    try:
+        _response = request({"argv": _argv, "cwd": os.getcwd(), "env": client_env()}, path=_path, timeout=COMMAND_TIMEOUT)
+    except ConnectionError:
+        return _run_command(_argv) # No daemon -- same result, without the warm state
+    except (OSError, ValueError) as e:
+        # Sent, but no answer -- running it again here could promote twice
+        print(f"[ERROR] - The release-state daemon did not answer {' '.join(_argv)} within {COMMAND_TIMEOUT:g}s (SRE_DAEMON_TIMEOUT): {e}", file=sys.stderr)
+        return 1
+
+    sys.stdout.write(_response.get("stdout", ""))
+    sys.stderr.write(_response.get("stderr", ""))
+    return _response.get("code", 1)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+"""This is the debug output module for the release scripts -- @manscaped-dev/<repo>
+
+`ic` behaves like icecream's `ic`, but icecream (and its dependencies) is only imported once debug mode is enabled,
+so the scripts do not pay for it on every start.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+
+
+class _LazyIc:
+    """A stand-in for icecream's `ic` that imports icecream on first enable."""
+    __slots__ = ("_enabled", "_ic")
+
+    def __init__(self):
+        self._enabled = False
+        self._ic = None
+
+    def _load(self):
+        if self._ic is None:
+            from icecream import ic as _ic # Only imported when debug mode is enabled
+            self._ic = _ic
+        return self._ic
+
+    def __call__(self, *args):
+        if self._enabled:
+            return self._load()(*args)
+
+        # Same return value as icecream -- the argument(s) are passed through
+        if not args:
+            return None
+        return args[0] if len(args) == 1 else args
+
+    def enable(self) -> None:
+        self._enabled = True
+        self._load().enable()
+
+    def disable(self) -> None:
+        self._enabled = False
+        if self._ic is not None:
+            self._ic.disable()
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+
+ic = _LazyIc() # Shared by every module, so --debug enables the output everywhere
@@ -0,0 +1,366 @@
+"""This python script will deploy the services that depend on a release, and wait for their deploy runs -- @manscaped-dev/<repo>
+
+Every service gets its `workflow_dispatch` at the same time, and every run is then watched by one polling loop:
+    - Finding the runs: one conditional listing (If-None-Match) per workflow, shared by the services dispatched to it --
+      a 304 costs no quota. The runs that existed before the dispatch are ignored, and services that share a workflow
+      (and ref) are dispatched one after the other, and matched to the new runs in that order.
+    - Tracking the runs: one GraphQL query for every run found (SRE_RELEASE_QUERY=rest keeps using the listings).
+The interval grows while nothing changes, like --wait.
+
+The services file is a JSON list -- "manscaped-dev/<repo>" strings (SRE_DISPATCH_WORKFLOW on main), or objects:
+    {"repo": "manscaped-dev/<repo>", "workflow": "deploy.yml", "ref": "main", "inputs": {"tag": "{tag}"}, "name": "api"}
+"{tag}" in an input is replaced with the released tag.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import http.client
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from debug import ic
+from common import get_release_index, latest_release, RELEASE_QUERY, WAIT_INTERVAL, WAIT_INTERVAL_MAX
+from transport import get_transport
+from tracing import span, traced, annotate
+
+BASE = os.path.dirname(os.path.abspath(__file__)) # Get the base directory of the script
+WORKFLOW = os.environ.get("SRE_DISPATCH_WORKFLOW", "sre-auto-core-app-dispatch.yml") # The deploy workflow of a service
+TIMEOUT = float(os.environ.get("SRE_DISPATCH_TIMEOUT", "1800")) # Seconds to wait for the deploy runs
+WORKERS = int(os.environ.get("SRE_DISPATCH_WORKERS", "8")) # Services dispatched (and listings polled) concurrently
+RUNS_PER_PAGE = 20 # Newest runs of a workflow read per listing -- enough for the runs dispatched in one go
+ic.disable() # Disable debug mode
+
+# The state of every tracked run, in one round-trip
+RUN_STATE_QUERY = """
+query($ids: [ID!]!) {
+  nodes(ids: $ids) {
+    ... on WorkflowRun {
+      id
+      databaseId
+      url
+      checkSuite { status conclusion }
+    }
+  }
+}
+"""
+
+
+def load_services(path: str) -> list[dict]:
+    """This function will load the services file.
+
+    Args:
+        path (str): The services file (see the module docstring).
+
+    Returns:
+        list[dict]: The services -- name, repo, workflow, ref and inputs.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        _data = json.load(f)
+
+    _services = []
+    for i in _data if isinstance(_data, list) else []:
+        _entry = {"repo": i} if isinstance(i, str) else dict(i) if isinstance(i, dict) else {}
+        if not _entry.get("repo"):
+            print(f"[ERROR] - Invalid service {i} - every service needs a repo.")
+            sys.exit(1)
+        _services.append(
+            {
+                "name": _entry.get("name") or _entry["repo"],
+                "repo": _entry["repo"],
+                "workflow": _entry.get("workflow") or WORKFLOW,
+                "ref": _entry.get("ref") or "main",
+                "inputs": {str(k): str(v) for k, v in (_entry.get("inputs") or {}).items()},
+            }
+        )
+
+    if not _services:
+        print(f"[ERROR] - No services in {path}.")
+        sys.exit(1)
+
+    return _services
+
+
+def _runs_path(repo: str, workflow: str, ref: str) -> str:
+    return f"repos/{repo}/actions/workflows/{quote(workflow, safe='')}/runs?event=workflow_dispatch&branch={quote(ref, safe='')}&per_page={RUNS_PER_PAGE}"
+
+
+def _list_runs(listing: dict) -> bool:
+    """This function will read the newest runs of a workflow -- a conditional request, a 304 costs no quota.
+
+    Args:
+        listing (dict): The listing -- path, etag and runs (updated in place).
+
+    Returns:
+        bool: True if the runs changed.
+    """
+    r = get_transport().request("GET", listing["path"], headers={"If-None-Match": listing["etag"]} if listing["etag"] else None)
+    if r.status == 304:
+        return False
+    if r.status != 200:
+        ic(f"_list_runs() - Unable to list the runs of {listing['path']} (HTTP {r.status}): {r.body}")
+        return False
+
+    listing["etag"] = r.headers.get("etag")
+    listing["runs"] = (r.json() or {}).get("workflow_runs") or []
+    return True
+
+
+def _result(service: dict) -> dict:
+    return dict(service, status="pending", conclusion=None, run_id=None, node_id=None, url=None, error=None, seconds={}, _marks={})
+
+
+def _mark(result: dict, event: str, start: float) -> None:
+    # The first time a run is seen in a state, relative to the start of the dispatch
+    result["_marks"].setdefault(event, time.monotonic() - start)
+
+
+@traced("dispatch.send")
+def _dispatch(result: dict, start: float) -> None:
+    """This function will send the workflow_dispatch of one service -- a failure is recorded, not raised.
+
+    Every dispatch starts a run, so it is never resent once sent (a 5xx or a lost connection may come after the run started),
+    only retried on a rate limit. A failed dispatch does not claim a run.
+    """
+    annotate("repo", result["repo"])
+    try:
+        r = get_transport().request(
+            "POST",
+            f"repos/{result['repo']}/actions/workflows/{quote(result['workflow'], safe='')}/dispatches",
+            body={"ref": result["ref"], "inputs": result["inputs"]},
+            idempotent=False,
+        )
+    except (http.client.HTTPException, OSError) as e:
+        _mark(result, "dispatched", start)
+        result["status"] = "failed"
+        result["error"] = f"Unable to dispatch {result['workflow']} - the connection failed, a run may have started: {e}"
+        return
+
+    _mark(result, "dispatched", start)
+    if r.status not in (200, 204):
+        result["status"] = "failed"
+        result["error"] = f"Unable to dispatch {result['workflow']} (HTTP {r.status}): {r.body.decode('utf-8', errors='replace')[:200]}"
+
+
+def _update(result: dict, status: str, conclusion: str, start: float) -> bool:
+    # REST and GraphQL spell the states differently, i.e. ~> in_progress / IN_PROGRESS
+    _status = (status or "").lower()
+    _conclusion = (conclusion or "").lower() or None
+    if _status == "completed":
+        _mark(result, "started", start)
+        _mark(result, "completed", start)
+        result["status"] = "success" if _conclusion == "success" else "failed"
+        result["conclusion"] = _conclusion
+        if result["status"] == "failed":
+            result["error"] = f"The run concluded {_conclusion}."
+        return True
+    if _status not in ("queued", "requested", "waiting", "pending", ""):
+        _new = "started" not in result["_marks"]
+        _mark(result, "started", start)
+        result["status"] = "running"
+        return _new
+    return False
+
+
+def _claim_runs(listing: dict, start: float) -> bool:
+    """This function will match the new runs of a listing to its services, oldest first, and update their state."""
+    _changed = False
+    _by_id = {r.get("id"): r for r in listing["runs"]}
+    _claimed = {i["run_id"] for i in listing["services"] if i["run_id"]}
+    _new = sorted((r for r in listing["runs"] if r.get("id") not in listing["known"] and r.get("id") not in _claimed), key=lambda r: (r.get("created_at") or "", r.get("id")))
+
+    for i in listing["services"]: # In dispatch order
+        if i["status"] in ("success", "failed"):
+            continue
+        if not i["run_id"] and _new:
+            _run = _new.pop(0)
+            i.update(run_id=_run.get("id"), node_id=_run.get("node_id"), url=_run.get("html_url"))
+            _mark(i, "found", start)
+            _changed = True
+        if i["run_id"] in _by_id: # The listing carries the state too -- GraphQL tracks the runs it no longer polls
+            _run = _by_id[i["run_id"]]
+            _changed = _update(i, _run.get("status"), _run.get("conclusion"), start) or _changed
+
+    return _changed
+
+
+@traced("dispatch.track")
+def _track_nodes(results: list[dict], start: float) -> bool:
+    """This function will read the state of every tracked run in one GraphQL query."""
+    _runs = {i["node_id"]: i for i in results if i["node_id"]}
+    annotate("runs", len(_runs))
+    _data = get_transport().graphql(RUN_STATE_QUERY, {"ids": list(_runs)})
+    if not _data:
+        return False # Polled again on the next round
+
+    _changed = False
+    for _node in _data.get("nodes") or []:
+        if _node and _node.get("id") in _runs:
+            _suite = _node.get("checkSuite") or {}
+            _result = _runs[_node["id"]]
+            _result["url"] = _node.get("url") or _result["url"]
+            _changed = _update(_result, _suite.get("status"), _suite.get("conclusion"), start) or _changed
+    return _changed
+
+
+@traced("dispatch.run")
+def dispatch_services(services: list[dict], tag: str = None, timeout: float = TIMEOUT, workers: int = WORKERS, interval: float = WAIT_INTERVAL, max_interval: float = WAIT_INTERVAL_MAX) -> list[dict]:
+    """This function will dispatch the deploy workflow of every service at the same time, and wait for all of the runs.
+
+    Args:
+        services (list[dict]): The services (see `load_services`).
+        tag (str): The released tag, for the "{tag}" inputs.
+        timeout (float): Seconds to wait for the runs to complete.
+        workers (int): Services dispatched, and listings polled, at the same time.
+        interval (float): The first poll interval, in seconds -- it grows up to max_interval while nothing changes.
+        max_interval (float): The longest poll interval, in seconds.
+
+    Returns:
+        list[dict]: The result of every service, in order -- status (success, failed, timeout), conclusion, run_id, url, error,
+        and seconds: dispatch (the POST), queued (dispatch to started), running (started to completed) and total.
+    """
+    _results = [_result(dict(i, inputs={k: v.replace("{tag}", tag or "") for k, v in i["inputs"].items()})) for i in services]
+
+    # One listing per workflow, shared by its services -- read before the dispatch, so the older runs are known
+    _listings = {}
+    for i in _results:
+        _path = _runs_path(i["repo"], i["workflow"], i["ref"])
+        _listings.setdefault(_path, {"path": _path, "etag": None, "runs": [], "known": set(), "services": []})["services"].append(i)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        with span("dispatch.prime", listings=len(_listings)):
+            list(pool.map(_list_runs, _listings.values()))
+            for _listing in _listings.values():
+                _listing["known"] = {r.get("id") for r in _listing["runs"]}
+
+        _start = time.monotonic()
+        # The services of a listing are dispatched one after the other -- their runs are matched in that order
+        with span("dispatch.send_all", services=len(_results)):
+            list(pool.map(lambda l: [_dispatch(i, _start) for i in l["services"]], _listings.values()))
+
+        _deadline = _start + timeout
+        _interval = interval
+        while True:
+            _pending = [i for i in _results if i["status"] in ("pending", "running")]
+            if not _pending or time.monotonic() >= _deadline:
+                break
+
+            time.sleep(min(_interval, max(0.0, _deadline - time.monotonic())))
+
+            # Listings still needed -- to find a run, or (REST) to track it
+            _polled = [l for l in _listings.values() if any(i["status"] in ("pending", "running") and (not i["run_id"] or RELEASE_QUERY != "graphql") for i in l["services"])]
+            _changed = any(list(pool.map(_list_runs, _polled)))
+            _changed = any([_claim_runs(l, _start) for l in _polled]) or _changed
+            if RELEASE_QUERY == "graphql" and any(i["node_id"] for i in _pending):
+                _changed = _track_nodes([i for i in _pending if i["node_id"]], _start) or _changed
+
+            _interval = interval if _changed else min(_interval * 1.5, max_interval)
+            ic(f"dispatch_services() - {len(_pending)} runs pending, next poll in {_interval:.1f}s.")
+
+    for i in _results:
+        if i["status"] in ("pending", "running"):
+            i["status"] = "timeout"
+            i["error"] = f"The run did not complete within {timeout:g}s." if i["run_id"] else f"No run of {i['workflow']} was found within {timeout:g}s."
+
+        _marks = i.pop("_marks")
+        _dispatched = _marks.get("dispatched", 0.0)
+        i["seconds"] = {
+            "dispatch": round(_dispatched, 3),
+            "queued": round(_marks["started"] - _dispatched, 3) if "started" in _marks else None,
+            "running": round(_marks["completed"] - _marks["started"], 3) if "completed" in _marks else None,
+            "total": round(_marks["completed"], 3) if "completed" in _marks else None,
+        }
+
+    return _results
+
+
+def format_summary(results: list[dict]) -> str:
+    """This function will format the per-service latency summary as a plain text table.
+
+    The queued/running split is observed by the polling loop, so it is as precise as the poll interval.
+
+    Args:
+        results (list[dict]): The results of `dispatch_services`.
+
+    Returns:
+        str: The table.
+    """
+    _seconds = lambda v: f"{v:.1f}" if v is not None else "-"
+    _header = ("SERVICE", "STATUS", "RUN", "DISPATCH", "QUEUED", "RUNNING", "TOTAL", "ERROR")
+    _rows = [
+        (
+            i["name"],
+            i["status"],
+            i["run_id"] or "-",
+            _seconds(i["seconds"]["dispatch"]),
+            _seconds(i["seconds"]["queued"]),
+            _seconds(i["seconds"]["running"]),
+            _seconds(i["seconds"]["total"]),
+            i["error"] or "",
+        )
+        for i in results
+    ]
+    _widths = [max(len(str(r[c])) for r in [_header, *_rows]) for c in range(len(_header))]
+
+    return "\n".join("  ".join(str(v).ljust(w) for v, w in zip(r, _widths)).rstrip() for r in [_header, *_rows])
+
+
+# Let's create an argument parser
+parser = argparse.ArgumentParser(
+    prog='SRE Deploy Dispatch',
+    description='Dispatches the deploy workflow of every service that depends on a release, and waits for the runs.'
+)
+parser.add_argument("--services", type=str, help="The JSON services file.", required=True)
+parser.add_argument("--tag", type=str, help="The released tag for the {tag} inputs, defaults to the latest release.", default=None)
+parser.add_argument("--timeout", type=float, help="Seconds to wait for the deploy runs.", default=TIMEOUT)
+parser.add_argument("--workers", type=int, help="Services dispatched concurrently.", default=WORKERS)
+parser.add_argument("--json", type=str, help="Write the JSON report to this file (- for stdout).", default=None)
+parser.add_argument("--debug", action="store_true", help="Enable debug mode.", default=False) # Debug mode
+
+
+def main(argv: list = None) -> int:
+    """This function will dispatch the deploy workflows and print the latency summary.
+
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: The exit code -- 1 if a deploy failed or timed out.
+    """
+    with span("args.parse"):
+        args = parser.parse_args(argv) # Parse the arguments
+
+    if args.debug:
+        ic.enable() # Enable debug mode
+
+    _services = load_services(args.services)
+    _tag = args.tag
+    if _tag is None and any("{tag}" in v for i in _services for v in i["inputs"].values()):
+        _latest = latest_release(get_release_index())
+        _tag = _latest.tagName if _latest else None
+        if not _tag:
+            print("[ERROR] - There is no latest release for the {tag} inputs, please pass --tag.")
+            sys.exit(1)
+
+    _start = time.perf_counter()
+    _results = dispatch_services(_services, tag=_tag, timeout=args.timeout, workers=args.workers)
+
+    if args.json == "-":
+        print(json.dumps(_results, indent=2))
+    else:
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(_results, f, indent=2)
+        print(format_summary(_results))
+
+    _failed = [i for i in _results if i["status"] != "success"]
+    print(f"[INFO] - {len(_results) - len(_failed)}/{len(_results)} services deployed in {time.perf_counter() - _start:.2f}s.", file=sys.stderr if args.json == "-" else sys.stdout)
+    return 1 if _failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""This is the release event reader for the release scripts -- @manscaped-dev/<repo>
+
+In Actions, GITHUB_EVENT_PATH holds the payload of the event that triggered the run. For a `release` event it carries the
+release that changed, so the cached snapshot (cache.py) can be brought up to date without listing the releases again:
+    - created, published, prereleased, released, edited: the release replaces (or joins) its entry in the snapshot.
+    - unpublished: the release is a draft again.
+    - deleted: the release leaves the snapshot.
+
+The latest flag is the one thing the payload does not carry -- when a delta can move it, the caller asks `releases/latest` (one call).
+Anything that cannot be applied (another event, another repo, an unknown action) returns None, so the caller lists the releases.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import json
+
+from debug import ic
+
+EVENT_STATE = os.environ.get("SRE_EVENT_STATE", "1") != "0" # Set SRE_EVENT_STATE=0 to ignore the event payload
+EVENT_MAX_AGE = int(os.environ.get("SRE_EVENT_MAX_AGE", "3600")) # Oldest snapshot (seconds) a delta is applied to
+ACTIONS = ("created", "published", "prereleased", "released", "edited", "unpublished", "deleted")
+_ROLE_FLAGS = ("isDraft", "isPrerelease", "isLatest")
+
+_events = {} # Event payload path --> the release event (or None), read once per run
+
+
+def load_release_event(repo: str, path: str = None) -> dict:
+    """This function will return the release event that triggered the run, if it is about this repo.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        path (str): The event payload, defaults to GITHUB_EVENT_PATH.
+
+    Returns:
+        dict: The action, the release (REST object), and a key that is unique to this run and delta -- or None.
+    """
+    if not EVENT_STATE or os.environ.get("GITHUB_EVENT_NAME") != "release":
+        return None
+
+    _path = path or os.environ.get("GITHUB_EVENT_PATH")
+    if not _path:
+        return None
+
+    if _path not in _events:
+        _events[_path] = None
+        try:
+            with open(_path, "r", encoding="utf-8") as f:
+                _payload = json.load(f)
+        except (OSError, ValueError) as e:
+            ic(f"load_release_event() - Unable to read the event payload {_path}: {e}")
+            return None
+
+        _payload = _payload if isinstance(_payload, dict) else {}
+        _release = _payload.get("release")
+        if _payload.get("action") in ACTIONS and isinstance(_release, dict) and _release.get("id"):
+            _run = f"{os.environ.get('GITHUB_RUN_ID', '')}.{os.environ.get('GITHUB_RUN_ATTEMPT', '')}"
+            _events[_path] = {
+                "repo": (_payload.get("repository") or {}).get("full_name"),
+                "action": _payload["action"],
+                "release": _release,
+                "key": f"{_run}:{_payload['action']}:{_release['id']}",
+            }
+
+    _event = _events[_path]
+    return _event if _event and _event["repo"] == repo else None
+
+
+def apply_release_delta(releases: list[dict], action: str, release: dict) -> tuple:
+    """This function will apply a release event to the releases of a snapshot.
+
+    Args:
+        releases (list[dict]): The draft/prerelease/latest releases of the snapshot (see `common.get_releases`).
+        action (str): The event action, i.e. ~> published.
+        release (dict): The release of the event, as a `get_releases` dict -- its isLatest is not trusted.
+
+    Returns:
+        tuple: The releases, and True if the latest release may have moved (the caller settles it with `with_latest`).
+    """
+    _old = next((i for i in releases if i.get("databaseId") == release.get("databaseId")), None)
+    _was_latest = bool(_old and _old.get("isLatest"))
+
+    if action == "deleted":
+        return ([i for i in releases if i is not _old], _was_latest)
+
+    _new = dict(release, isLatest=False)
+    if action == "unpublished":
+        _new.update(isDraft=True, publishedAt=None)
+    if _new.get("isDraft"):
+        _new["commitSha"] = None # A draft's tag does not exist yet
+    elif _old and _old.get("tagName") == _new.get("tagName"):
+        _new["commitSha"] = _new.get("commitSha") or _old.get("commitSha")
+
+    _full = not _new["isDraft"] and not _new["isPrerelease"]
+    if _full and _was_latest and action == "edited":
+        _new["isLatest"] = True # The latest release was edited in place, i.e. ~> its notes
+        _moved = False
+    else:
+        _moved = _full or _was_latest
+
+    _releases = [_new if i is _old else i for i in releases] if _old else [_new, *releases] # Newest first
+    return ([i for i in _releases if any(i.get(k) for k in _ROLE_FLAGS)] if not _moved else _releases, _moved)
+
+
+def with_latest(releases: list[dict], latest: dict = None) -> list[dict]:
+    """This function will mark the latest release, and drop the releases that no longer hold a role.
+
+    Args:
+        releases (list[dict]): The releases, see `apply_release_delta`.
+        latest (dict): The latest release (`releases/latest`), or None if there is none.
+
+    Returns:
+        list[dict]: The draft/prerelease/latest releases.
+    """
+    _tag = latest.get("tagName") if latest else None
+    _releases = [dict(i, isLatest=_tag is not None and i.get("tagName") == _tag) for i in releases]
+    if _tag and not any(i["isLatest"] for i in _releases):
+        _releases.append(dict(latest, isLatest=True))
+    return [i for i in _releases if any(i.get(k) for k in _ROLE_FLAGS)]
@@ -0,0 +1,217 @@
+"""This python script will return the draft, prerelease and latest release state for a fleet of repos -- @manscaped-dev/<repo>
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from concurrent.futures import ThreadPoolExecutor
+
+from debug import ic
+from common import get_release_index, get_rate_limit, RELEASE_QUERY
+from transport import get_transport
+from tracing import span
+
+BASE = os.path.dirname(os.path.abspath(__file__)) # Get the base directory of the script
+WORKERS = int(os.environ.get("SRE_FLEET_WORKERS", "8")) # Repos fetched concurrently -- keep it <= SRE_HTTP_POOL_SIZE
+ic.disable() # Disable debug mode
+
+# The repositories of an organization, with the template they were stamped out from
+ORG_REPOS_QUERY = """
+query($org: String!, $after: String) {
+  organization(login: $org) {
+    repositories(first: 100, after: $after, isArchived: false) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        nameWithOwner
+        templateRepository { nameWithOwner }
+      }
+    }
+  }
+}
+"""
+
+
+def get_org_repos(org: str, template: str = None) -> list[str]:
+    """This function will return the (non-archived) repositories of the organization.
+
+    Args:
+        org (str): The organization, i.e. ~> manscaped-dev.
+        template (str): Only return the repos created from this template, i.e. ~> manscaped-dev/mnscpd-repo-template.
+
+    Returns:
+        list[str]: The repositories, i.e. ~> manscaped-dev/<repo>.
+    """
+    _repos = []
+    _cursor = None
+
+    while True:
+        _data = get_transport().graphql(ORG_REPOS_QUERY, {"org": org, "after": _cursor})
+        if not _data or not _data.get("organization"):
+            print(f"[ERROR] - Unable to list the repositories for the organization {org}.")
+            sys.exit(1)
+
+        _page = _data["organization"]["repositories"]
+        for i in _page["nodes"]:
+            _template = (i.get("templateRepository") or {}).get("nameWithOwner")
+            if template and _template != template:
+                continue
+            _repos.append(i["nameWithOwner"])
+
+        if not _page["pageInfo"]["hasNextPage"]:
+            return _repos
+
+        _cursor = _page["pageInfo"]["endCursor"]
+
+
+def wait_for_rate_limit(needed: int) -> None:
+    """This function will wait for the rate limit to reset if the scan would run out of quota.
+
+    Args:
+        needed (int): The number of API calls the scan is expected to make.
+    """
+    _limit = get_rate_limit()
+    if not _limit:
+        return
+
+    ic(f"wait_for_rate_limit() - {_limit.get('remaining')}/{_limit.get('limit')} calls remaining, {needed} needed.")
+    if _limit.get("remaining", 0) >= needed:
+        return
+
+    _wait = max(0, _limit.get("reset", 0) - time.time())
+    print(f"[WARNING] - {_limit.get('remaining')} API calls remaining, {needed} needed - waiting {int(_wait)}s for the rate limit to reset.")
+    time.sleep(_wait)
+
+
+def get_repo_state(repo: str) -> dict:
+    """This function will return the draft, prerelease and latest release of the repo.
+
+    Args:
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+
+    Returns:
+        dict: The release state of the repository -- a failure is reported in `error` instead of aborting the scan.
+    """
+    _start = time.perf_counter()
+    _state = {"repo": repo, "draft": None, "prerelease": None, "latest": None, "error": None}
+
+    try:
+        _index = get_release_index(repo=repo)
+    except SystemExit:
+        _state["error"] = "Unable to fetch the releases."
+    except Exception as e:
+        _state["error"] = str(e)
+    else:
+        for _role in ("draft", "prerelease", "latest"):
+            _release = _index.role(_role)
+            if _release:
+                _state[_role] = {"tagName": _release.tagName, "commitSha": _release.commitSha}
+
+        if _index.multiple:
+            _state["error"] = f"There are multiple {', '.join(sorted(_index.multiple))} releases."
+
+    _state["seconds"] = round(time.perf_counter() - _start, 3)
+    return _state
+
+
+def get_fleet_state(repos: list[str], workers: int = WORKERS) -> list[dict]:
+    """This function will return the release state of every repo, fetched concurrently.
+
+    Args:
+        repos (list[str]): The repositories, i.e. ~> manscaped-dev/<repo>.
+        workers (int): The number of repositories fetched at the same time.
+
+    Returns:
+        list[dict]: The release state of every repository, in the order given.
+    """
+    wait_for_rate_limit(needed=len(repos) * (1 if RELEASE_QUERY == "graphql" else 2))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(get_repo_state, repos))
+
+
+def format_table(rows: list[dict]) -> str:
+    """This function will format the fleet state as a plain text table.
+
+    Args:
+        rows (list[dict]): The release state of every repository.
+
+    Returns:
+        str: The table.
+    """
+    _header = ("REPOSITORY", "DRAFT", "PRERELEASE", "LATEST", "SECONDS", "ERROR")
+    _rows = [
+        (
+            i["repo"],
+            *[(i[k] or {}).get("tagName") or "-" for k in ("draft", "prerelease", "latest")],
+            f"{i['seconds']:.3f}",
+            i["error"] or "",
+        )
+        for i in rows
+    ]
+    _widths = [max(len(str(r[c])) for r in [_header, *_rows]) for c in range(len(_header))]
+
+    return "\n".join("  ".join(str(v).ljust(w) for v, w in zip(r, _widths)).rstrip() for r in [_header, *_rows])
+
+
+# Let's create an argument parser
+parser = argparse.ArgumentParser(
+    prog='SRE Fleet Release State',
+    description='Returns the draft, prerelease and latest release of every repo in the fleet.'
+)
+parser.add_argument("--repos", nargs="*", help="Repositories, i.e. ~> manscaped-dev/<repo>.", default=[])
+parser.add_argument("--repos-file", type=str, help="File with one repository per line.", default=None)
+parser.add_argument("--org", type=str, help="Scan every (non-archived) repository of the organization.", default=None)
+parser.add_argument("--template", type=str, help="With --org, only scan repos created from this template.", default=None)
+parser.add_argument("--workers", type=int, help="Repositories fetched concurrently.", default=WORKERS)
+parser.add_argument("--json", type=str, help="Write the JSON report to this file (- for stdout).", default=None)
+parser.add_argument("--debug", action="store_true", help="Enable debug mode.", default=False) # Debug mode
+
+
+def main(argv: list = None) -> int:
+    """This function will print the release state of the fleet.
+
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: The exit code.
+    """
+    with span("args.parse"):
+        args = parser.parse_args(argv) # Parse the arguments
+
+    if args.debug:
+        ic.enable() # Enable debug mode
+
+    _repos = list(args.repos)
+    if args.repos_file:
+        with open(args.repos_file, "r", encoding="utf-8") as f:
+            _repos.extend(i.strip() for i in f if i.strip() and not i.startswith("#"))
+    if args.org:
+        _repos.extend(get_org_repos(args.org, template=args.template))
+
+    _repos = list(dict.fromkeys(_repos)) # De-duplicate, keep the order
+    if not _repos:
+        print("[ERROR] - Please provide --repos, --repos-file or --org.")
+        sys.exit(1)
+
+    _start = time.perf_counter()
+    _rows = get_fleet_state(_repos, workers=args.workers)
+    ic(f"Scanned {len(_rows)} repositories in {time.perf_counter() - _start:.2f}s")
+
+    if args.json == "-":
+        print(json.dumps(_rows, indent=2))
+    else:
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(_rows, f, indent=2)
+        print(format_table(_rows))
+
+    return 1 if any(i["error"] for i in _rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""This is the local git ref reader for the release scripts -- @manscaped-dev/<repo>
+
+Tags are resolved straight from the checkout's `.git` (the workflows check out with fetch-depth: 0):
+    - packed-refs: memory-mapped and binary searched when git wrote it sorted, using the `^<sha>` peel lines.
+    - loose refs: refs/tags/<tag>, annotated tags are peeled by reading the tag object (loose or packed).
+
+Anything that cannot be resolved locally returns None, so the caller can fall back to the API.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import glob
+import mmap
+import zlib
+import struct
+
+from debug import ic
+from tracing import traced
+
+BASE = os.path.dirname(os.path.abspath(__file__)) # Get the base directory of the script
+REPO = os.environ.get("GITHUB_WORKSPACE") or os.path.abspath(os.path.join(BASE, "..", "..", "..")) # The checkout
+LOCAL_REFS = os.environ.get("SRE_LOCAL_REFS", "1") != "0" # Set SRE_LOCAL_REFS=0 to always ask the API
+
+_OBJECT_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"} # Pack entry types -- 6/7 are deltas
+_packed_refs = {} # git dir --> PackedRefs, opened once per run
+_pack_indexes = {} # git dir --> [PackIndex]
+
+
+def find_git_dir(path: str = REPO) -> str:
+    """This function will return the git directory of the checkout -- `.git` may be a `gitdir:` file for worktrees.
+
+    Args:
+        path (str): The checkout, defaults to GITHUB_WORKSPACE or the repository of this script.
+
+    Returns:
+        str: The git directory, or None if the path is not a git checkout.
+    """
+    _git = os.path.join(path, ".git")
+    if os.path.isdir(_git):
+        return _git
+
+    if os.path.isfile(_git):
+        with open(_git, "r", encoding="utf-8") as f:
+            _line = f.read().strip()
+        if _line.startswith("gitdir:"):
+            _dir = _line[len("gitdir:"):].strip()
+            return _dir if os.path.isabs(_dir) else os.path.normpath(os.path.join(path, _dir))
+
+    return None
+
+
+class PackedRefs:
+    """The packed-refs file, memory-mapped -- binary searched when it is sorted, scanned otherwise."""
+    __slots__ = ("_mm", "_start", "_sorted", "_refs", "peeled")
+
+    def __init__(self, path: str):
+        self._mm = None
+        self._start = 0
+        self._sorted = False
+        self.peeled = False # git wrote a peel line for every annotated tag -- a tag without one is lightweight
+        self._refs = None # Only built for an unsorted file
+
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # The header, i.e. ~> "# pack-refs with: peeled fully-peeled sorted"
+        while self._mm[self._start:self._start + 1] == b"#":
+            _end = self._mm.find(b"\n", self._start)
+            _end = len(self._mm) if _end == -1 else _end
+            if b" sorted" in self._mm[self._start:_end]:
+                self._sorted = True
+            if b" peeled" in self._mm[self._start:_end] or b" fully-peeled" in self._mm[self._start:_end]:
+                self.peeled = True
+            self._start = _end + 1
+
+    def _line(self, start: int) -> tuple:
+        _end = self._mm.find(b"\n", start)
+        _end = len(self._mm) if _end == -1 else _end
+        return (self._mm[start:_end], _end + 1)
+
+    def _peeled(self, start: int) -> str:
+        # The peel line of an annotated tag directly follows its ref line
+        if self._mm[start:start + 1] == b"^":
+            return self._line(start)[0][1:].decode("ascii")
+        return None
+
+    def lookup(self, refname: str) -> tuple:
+        """This function will look up a ref.
+
+        Args:
+            refname (str): The full ref name, i.e. ~> refs/tags/v1.2.3.
+
+        Returns:
+            tuple: The sha and the peeled sha (None if the ref is not an annotated tag), or None if the ref is not packed.
+        """
+        if self._mm is None:
+            return None
+
+        _ref = refname.encode("utf-8")
+        if not self._sorted:
+            if self._refs is None:
+                self._refs = {}
+                _pos = self._start
+                while _pos < len(self._mm):
+                    _line, _next = self._line(_pos)
+                    if _line and not _line.startswith(b"^"):
+                        _sha, _, _name = _line.partition(b" ")
+                        self._refs[_name] = (_sha.decode("ascii"), self._peeled(_next))
+                    _pos = _next
+            return self._refs.get(_ref)
+
+        _lo, _hi = self._start, len(self._mm)
+        while _lo < _hi:
+            _mid = (_lo + _hi) // 2
+            _pos = max(self._mm.rfind(b"\n", _lo, _mid) + 1, _lo) # The start of the line holding _mid
+            if self._mm[_pos:_pos + 1] == b"^":
+                _pos = max(self._mm.rfind(b"\n", _lo, _pos - 1) + 1, _lo) # A peel line belongs to the ref above it
+
+            _line, _next = self._line(_pos)
+            _sha, _, _name = _line.partition(b" ")
+            if _name == _ref:
+                return (_sha.decode("ascii"), self._peeled(_next))
+            if _name < _ref:
+                _lo = _next if self._mm[_next:_next + 1] != b"^" else self._line(_next)[1]
+            else:
+                _hi = _pos
+
+        return None
+
+
+class PackIndex:
+    """A version 2 pack index (`objects/pack/*.idx`), memory-mapped -- sha to pack offset by binary search."""
+    __slots__ = ("pack", "_mm", "_fanout", "_count")
+
+    def __init__(self, path: str):
+        self.pack = path[:-len(".idx")] + ".pack"
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[:4] != b"\xfftOc" or struct.unpack(">I", self._mm[4:8])[0] != 2:
+            raise ValueError(f"Unsupported pack index {path}.")
+
+        self._fanout = struct.unpack(">256I", self._mm[8:8 + 1024])
+        self._count = self._fanout[255]
+
+    def offset(self, sha: str) -> int:
+        """This function will return the offset of the object in the pack, or None if it is not in this pack."""
+        _sha = bytes.fromhex(sha)
+        _lo = self._fanout[_sha[0] - 1] if _sha[0] else 0
+        _hi = self._fanout[_sha[0]]
+        _table = 8 + 1024
+
+        while _lo < _hi:
+            _mid = (_lo + _hi) // 2
+            _entry = self._mm[_table + 20 * _mid:_table + 20 * _mid + 20]
+            if _entry == _sha:
+                _pos = _table + 24 * self._count + 4 * _mid # After the sha and crc tables
+                _offset = struct.unpack(">I", self._mm[_pos:_pos + 4])[0]
+                if _offset & 0x80000000: # Large pack -- the offset lives in the 64-bit table
+                    _pos = _table + 28 * self._count + 8 * (_offset & 0x7FFFFFFF)
+                    _offset = struct.unpack(">Q", self._mm[_pos:_pos + 8])[0]
+                return _offset
+            if _entry < _sha:
+                _lo = _mid + 1
+            else:
+                _hi = _mid
+
+        return None
+
+
+def _read_object_head(git_dir: str, sha: str) -> tuple:
+    """This function will return the type and the start of the object -- enough to peel a tag.
+
+    Returns:
+        tuple: The object type and the first bytes of its content, or None if it cannot be read locally (i.e. ~> a delta).
+    """
+    _loose = os.path.join(git_dir, "objects", sha[:2], sha[2:])
+    if os.path.isfile(_loose):
+        with open(_loose, "rb") as f:
+            _data = zlib.decompressobj().decompress(f.read(), 4096)
+        _header, _, _body = _data.partition(b"\0")
+        return (_header.split(b" ")[0].decode("ascii"), _body)
+
+    if git_dir not in _pack_indexes:
+        _pack_indexes[git_dir] = []
+        for _idx in glob.glob(os.path.join(git_dir, "objects", "pack", "*.idx")):
+            try:
+                _pack_indexes[git_dir].append(PackIndex(_idx))
+            except (OSError, ValueError) as e:
+                ic(f"_read_object_head() - Skipping the pack index {_idx}: {e}")
+
+    for _index in _pack_indexes[git_dir]:
+        _offset = _index.offset(sha)
+        if _offset is None:
+            continue
+
+        with open(_index.pack, "rb") as f:
+            f.seek(_offset)
+            _chunk = f.read(4096)
+
+        _type = _OBJECT_TYPES.get((_chunk[0] >> 4) & 7)
+        if _type is None:
+            return None # A deltified object -- leave it to the API
+
+        _pos = 1
+        while _chunk[_pos - 1] & 0x80: # Skip the variable length size
+            _pos += 1
+
+        return (_type, zlib.decompressobj().decompress(_chunk[_pos:], 4096))
+
+    return None
+
+
+def _peel(git_dir: str, sha: str) -> str:
+    """This function will peel an object to its commit -- annotated tags (of tags) are followed to the target."""
+    for _ in range(8): # Tags of tags are rare, but possible
+        _head = _read_object_head(git_dir, sha)
+        if _head is None:
+            return None
+        if _head[0] != "tag":
+            return sha if _head[0] == "commit" else None
+
+        _line = _head[1].split(b"\n", 1)[0] # "object <sha>"
+        if not _line.startswith(b"object "):
+            return None
+        sha = _line[len(b"object "):].decode("ascii")
+
+    return None
+
+
+@traced("refs.local")
+def resolve_tag(tagName: str, git_dir: str = None) -> str:
+    """This function will resolve a tag to its (peeled) commit sha from the local checkout.
+
+    Args:
+        tagName (str): The tag name, i.e. ~> v1.2.3.
+        git_dir (str): The git directory, defaults to the one of the checkout.
+
+    Returns:
+        str: The commit sha, or None on a miss (no checkout, unknown tag, or an object that cannot be read locally).
+    """
+    if not LOCAL_REFS or not tagName:
+        return None
+
+    _git = git_dir or find_git_dir()
+    if not _git:
+        return None
+
+    _refname = f"refs/tags/{tagName}"
+
+    # Loose refs win over packed-refs
+    _loose = os.path.join(_git, *_refname.split("/"))
+    if os.path.isfile(_loose):
+        with open(_loose, "r", encoding="ascii") as f:
+            _sha = f.read().strip()
+        if len(_sha) == 40:
+            _commit = _peel(_git, _sha)
+            ic(f"resolve_tag() - {tagName} --> {_commit} (loose ref)")
+            return _commit
+
+    _packed_path = os.path.join(_git, "packed-refs")
+    if _git not in _packed_refs:
+        _packed_refs[_git] = PackedRefs(_packed_path) if os.path.isfile(_packed_path) else None
+
+    _entry = _packed_refs[_git].lookup(_refname) if _packed_refs[_git] else None
+    if _entry is None:
+        return None
+
+    _sha, _peeled = _entry
+    if not _peeled and _packed_refs[_git].peeled:
+        _peeled = _sha # No peel line in a peeled file -- a lightweight tag, the ref is the commit
+    _commit = _peeled or _peel(_git, _sha) # Otherwise the object says -- None (the API) if it cannot be read locally
+    ic(f"resolve_tag() - {tagName} --> {_commit} (packed-refs)")
+    return _commit
@@ -0,0 +1,217 @@
+"""This python script will run the pre-promotion checks of the repo in one process -- @manscaped-dev/<repo>
+
+The checks run at the same time, and every one of them is reported (pass, fail or skip):
+    - gh.version, gh.auth: The gh CLI is installed and logged in (the workflow steps call `gh api`).
+    - registry: The checkout has a registrant file -- mando.json, pyproject.toml or package.json.
+    - branch: The run is on the main branch (--branch).
+    - promotion: The releases are ready for the stages, i.e. ~> a draft to promote to a pre-release.
+
+The promotion check plans the promotion from one revalidated snapshot of the releases (see `promote.plan_promotion`).
+`--promote` applies that plan right away, and `--save-plan` writes it for `promote.py --plan` in a later job -- either way
+the promotion edits the releases the checks validated, or stops if they changed since.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+from concurrent.futures import ThreadPoolExecutor
+
+from debug import ic
+from promote import plan_promotion, apply_plan, format_plan
+from registrants import REGISTRANT_FILES
+from tracing import span
+from profiling import PROFILE, enable as enable_profile
+
+BASE = os.path.dirname(os.path.abspath(__file__)) # Get the base directory of the script
+REPO = os.environ.get("GITHUB_WORKSPACE") or os.path.abspath(os.path.join(BASE, "..", "..", "..")) # Get the repository directory
+ic.disable() # Disable debug mode
+
+
+class CheckFailed(Exception):
+    """A pre-promotion check did not pass -- the message is the reason."""
+
+
+def check_gh_version() -> str:
+    """This function will check the gh CLI is installed."""
+    try:
+        r = subprocess.run(["gh", "--version"], capture_output=True, text=True)
+    except FileNotFoundError:
+        raise CheckFailed("The gh CLI is not installed.")
+    if r.returncode != 0:
+        raise CheckFailed(f"gh --version failed: {r.stderr.strip()}")
+    return r.stdout.splitlines()[0] if r.stdout else "gh"
+
+
+def check_gh_auth() -> str:
+    """This function will check the gh CLI is logged in."""
+    try:
+        r = subprocess.run(["gh", "auth", "status"], capture_output=True, text=True)
+    except FileNotFoundError:
+        raise CheckFailed("The gh CLI is not installed.")
+    if r.returncode != 0:
+        raise CheckFailed(f"gh is not logged in: {((r.stderr or r.stdout).strip().splitlines() or [''])[-1]}")
+    return "Logged in."
+
+
+def check_registry(root: str = REPO) -> str:
+    """This function will check the checkout has a registrant file."""
+    _found = [i for i in REGISTRANT_FILES if os.path.isfile(os.path.join(root, i))]
+    if not _found:
+        raise CheckFailed(f"No versioning file ({', '.join(REGISTRANT_FILES)}) found in {root}.")
+    return ", ".join(_found)
+
+
+def current_ref(root: str = REPO) -> str:
+    """This function will return the ref of the run -- GITHUB_REF, or the checked out branch."""
+    if os.environ.get("GITHUB_REF"):
+        return os.environ["GITHUB_REF"]
+
+    r = subprocess.run(["git", "symbolic-ref", "-q", "HEAD"], cwd=root, capture_output=True, text=True)
+    return r.stdout.strip() or None
+
+
+def check_branch(branch: str = "main", root: str = REPO) -> str:
+    """This function will check the run is on the branch."""
+    _ref = current_ref(root=root)
+    if _ref != f"refs/heads/{branch}":
+        raise CheckFailed(f"This action can ONLY be run from the {branch} branch, not {_ref or 'a detached HEAD'}.")
+    return _ref
+
+
+def _run_check(name: str, func, *args) -> dict:
+    """This function will run one check, recording the failure instead of raising it."""
+    _start = time.perf_counter()
+    _result = {"check": name, "status": "pass", "detail": None, "value": None}
+
+    with span(f"preflight.{name}"):
+        try:
+            _value = func(*args)
+            _result["detail"], _result["value"] = (format_plan(_value), _value) if isinstance(_value, dict) else (_value, None)
+        except CheckFailed as e:
+            _result.update(status="fail", detail=str(e))
+        except SystemExit:
+            _result.update(status="fail", detail="The check exited early, see the output above.")
+        except Exception as e:
+            _result.update(status="fail", detail=str(e).replace("[ERROR] - ", ""))
+
+    _result["seconds"] = round(time.perf_counter() - _start, 3)
+    return _result
+
+
+def run_checks(stages: list[str], branch: str = "main", root: str = REPO, repo: str = None) -> dict:
+    """This function will run every pre-promotion check at the same time.
+
+    Args:
+        stages (list[str]): The promotions to check, in order -- prerelease and/or release (none skips the promotion check).
+        branch (str): The branch the promotion must run from.
+        root (str): The checkout.
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+
+    Returns:
+        dict: The report -- passed, the checks (check, status, detail, seconds), and the promotion plan (None if it failed).
+    """
+    _checks = [
+        ("gh.version", check_gh_version),
+        ("gh.auth", check_gh_auth),
+        ("registry", check_registry, root),
+        ("branch", check_branch, branch, root),
+    ]
+    if stages:
+        _checks.append(("promotion", plan_promotion, stages, repo))
+
+    with ThreadPoolExecutor(max_workers=len(_checks)) as pool:
+        _results = list(pool.map(lambda i: _run_check(*i), _checks))
+
+    if not stages:
+        _results.append({"check": "promotion", "status": "skip", "detail": "No stage given (--prerelease/--release).", "value": None, "seconds": 0.0})
+
+    _plan = next((i.pop("value") for i in _results if i["check"] == "promotion"), None)
+    for i in _results:
+        i.pop("value", None)
+
+    return {"passed": all(i["status"] != "fail" for i in _results), "checks": _results, "plan": _plan}
+
+
+def format_report(report: dict) -> str:
+    """This function will format the report -- one line per check, the plan under the promotion check."""
+    _lines = []
+    for i in report["checks"]:
+        _detail, *_more = (i["detail"] or "").splitlines() or [""]
+        _lines.append(f"[{i['status'].upper()}] - {i['check']}: {_detail} ({i['seconds']:.2f}s)")
+        _lines.extend(f"    {l}" for l in _more)
+    _lines.append(f"[{'SUCCESS' if report['passed'] else 'ERROR'}] - The pre-promotion checks {'passed' if report['passed'] else 'failed'}.")
+    return "\n".join(_lines)
+
+
+# Let's create an argument parser
+parser = argparse.ArgumentParser(
+    prog='SRE Pre-Promotion Checks',
+    description='Runs the pre-promotion checks concurrently, and plans the promotion from the same snapshot.'
+)
+parser.add_argument("--prerelease", action="store_true", help="Check the draft can be promoted to a pre-release.", default=False)
+parser.add_argument("--release", action="store_true", help="Check the pre-release can be promoted to the latest release.", default=False)
+parser.add_argument("--branch", type=str, help="The branch the promotion must run from.", default="main")
+parser.add_argument("--root", type=str, help="The checkout, defaults to GITHUB_WORKSPACE.", default=REPO)
+parser.add_argument("--promote", action="store_true", help="Apply the checked plan when every check passed.", default=False)
+parser.add_argument("--save-plan", type=str, help="Write the checked plan to this file, for `promote.py --plan`.", default=None)
+parser.add_argument("--json", type=str, help="Write the JSON report to this file (- for stdout).", default=None)
+parser.add_argument("--github-output", action="store_true", help="Write passed and plan (JSON) to GITHUB_OUTPUT.", default=False)
+parser.add_argument("--debug", action="store_true", help="Enable debug mode.", default=False) # Debug mode
+parser.add_argument("--profile", type=str, help="Profile the run, and write <prefix>.prof/.txt/.json (a directory gets the script name).", default=PROFILE)
+
+
+def main(argv: list = None) -> int:
+    """This function will run the pre-promotion checks, and print the report.
+
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: The exit code -- 1 if a check failed.
+    """
+    with span("args.parse"):
+        args = parser.parse_args(argv) # Parse the arguments
+
+    if args.debug:
+        ic.enable() # Enable debug mode
+
+    if args.profile:
+        enable_profile(args.profile) # Written when the script exits
+
+    _stages = [i for i in ("prerelease", "release") if getattr(args, i)]
+    _report = run_checks(_stages, branch=args.branch, root=args.root)
+
+    if args.json == "-":
+        print(json.dumps(_report, indent=2))
+    else:
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(_report, f, indent=2)
+        print(format_report(_report))
+
+    if args.github_output and os.environ.get("GITHUB_OUTPUT"):
+        with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+            f.write(f"passed={'true' if _report['passed'] else 'false'}\n")
+            f.write(f"plan={json.dumps(_report['plan'], separators=(',', ':')) if _report['plan'] else ''}\n")
+
+    if not _report["passed"]:
+        return 1
+
+    if args.save_plan and _report["plan"]:
+        with open(args.save_plan, "w", encoding="utf-8") as f:
+            json.dump(_report["plan"], f, indent=2)
+
+    if args.promote and _report["plan"]:
+        apply_plan(_report["plan"])
+        print(f"[SUCCESS] - Promoted {', '.join(t['tagName'] + ' to ' + ('the latest release' if t['stage'] == 'release' else 'a pre-release') for t in _report['plan']['transitions'])}.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
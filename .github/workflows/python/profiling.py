@@ -0,0 +1,177 @@
+"""This is the profiling module for the release scripts -- @manscaped-dev/<repo>
+
+`--profile <prefix>` (or SRE_PROFILE=<prefix>) runs the script under cProfile and writes, when the script exits:
+    - <prefix>.prof: The raw pstats, i.e. ~> `python -m pstats`, snakeviz.
+    - <prefix>.txt: The top functions by cumulative time -- directories stripped, so two runs diff cleanly.
+    - <prefix>.json: The breakdown of the profiled time and the top functions, with sorted keys.
+
+The breakdown splits the profiled time into:
+    - wait: Network, subprocess and sleep -- socket/SSL I/O, DNS, select, fork/exec and waitpid, time.sleep, worker threads.
+    - decode: JSON and TOML parsing -- json, orjson (schema.loads on large bodies) and tomllib.
+    - python: Everything else, the scripts' own CPU time.
+
+Only the main thread is profiled -- the time it spends waiting on worker threads (--manifest) shows up as wait.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import io
+import os
+import sys
+import json
+import time
+import atexit
+import pstats
+import cProfile
+
+PROFILE = os.environ.get("SRE_PROFILE") or None # The output prefix, profiling is disabled when unset
+TOP = int(os.environ.get("SRE_PROFILE_TOP", "40")) # Functions listed in the text and JSON reports
+
+# Built-in functions (pstats name) whose own time is spent waiting, not computing
+_WAIT = (
+    "_socket.socket", # recv, recv_into, send, sendall, connect
+    "_ssl._SSLSocket",
+    "_socket.getaddrinfo",
+    "select.",
+    "selectors.",
+    "_posixsubprocess.fork_exec",
+    "posix.waitpid",
+    "posix.read",
+    "time.sleep",
+    "_thread.lock", # acquire -- waiting on the worker threads
+)
+_DECODE = (("json", "decoder.py", "raw_decode"), ("tomllib", "_parser.py", "loads")) # (package, file, function), cumulative
+_DECODE_BUILTIN = ("orjson.loads",) # Built-in parsers (pstats name), their own time is the parse
+
+_profiler = None
+_started = None
+
+
+def enable(prefix: str = PROFILE) -> None:
+    """This function will start profiling the script -- the reports are written when it exits, even on sys.exit().
+
+    Args:
+        prefix (str): The output prefix, i.e. ~> profile/promote -- a directory (profile/) gets the script name.
+    """
+    global _profiler, _started, PROFILE
+    if _profiler is not None or not prefix:
+        return
+
+    if prefix.endswith(os.sep) or os.path.isdir(prefix):
+        prefix = os.path.join(prefix, os.path.splitext(os.path.basename(sys.argv[0]))[0] or "sre-release")
+    PROFILE = prefix
+    _started = (time.perf_counter(), time.process_time())
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+    atexit.register(_flush)
+
+
+def _category(func: tuple) -> str:
+    _file, _, _name = func
+    if _file == "~" and any(i in _name for i in _WAIT):
+        return "wait"
+    return "python"
+
+
+def _decoder(func: tuple) -> bool:
+    _file, _, _name = func
+    if _file == "~":
+        return any(i in _name for i in _DECODE_BUILTIN)
+    return any(_name == n and _file.endswith(os.path.join(p, f)) for p, f, n in _DECODE)
+
+
+def breakdown(stats: pstats.Stats) -> dict:
+    """This function will split the profiled time into wait, decode and python.
+
+    Args:
+        stats (pstats.Stats): The profile.
+
+    Returns:
+        dict: Seconds per category, and the total.
+    """
+    _seconds = {"wait": 0.0, "decode": 0.0, "python": 0.0}
+    for _func, (_cc, _nc, _tt, _ct, _callers) in stats.stats.items():
+        _seconds[_category(_func)] += _tt
+
+    # Decoding is measured by the cumulative time of the parser entry points, and moved out of the python time
+    for _func, (_cc, _nc, _tt, _ct, _callers) in stats.stats.items():
+        if _decoder(_func):
+            _seconds["decode"] += _ct
+            _seconds["python"] -= _ct
+
+    _seconds["python"] = max(_seconds["python"], 0.0)
+    return {**{k: round(v, 6) for k, v in _seconds.items()}, "total": round(sum(_seconds.values()), 6)}
+
+
+def _label(func: tuple) -> str:
+    # Like pstats.func_std_string, with the directories stripped
+    _file, _line, _name = func
+    return _name if _file == "~" else f"{os.path.basename(_file)}:{_line}({_name})"
+
+
+def report(stats: pstats.Stats, wall: float = None, cpu: float = None, top: int = TOP) -> dict:
+    """This function will build the JSON report of a profile.
+
+    Args:
+        stats (pstats.Stats): The profile.
+        wall (float): The wall time of the profiled run, in seconds.
+        cpu (float): The process CPU time of the profiled run, in seconds.
+        top (int): The functions listed, by cumulative time.
+
+    Returns:
+        dict: script, wall, cpu, breakdown and the top functions (calls, tottime, cumtime).
+    """
+    _funcs = sorted(stats.stats.items(), key=lambda i: i[1][3], reverse=True)[:top]
+    return {
+        "script": os.path.basename(sys.argv[0]),
+        "wall": round(wall, 6) if wall is not None else None,
+        "cpu": round(cpu, 6) if cpu is not None else None,
+        "breakdown": breakdown(stats),
+        "functions": [
+            {"function": _label(f), "calls": nc, "tottime": round(tt, 6), "cumtime": round(ct, 6)}
+            for f, (cc, nc, tt, ct, callers) in _funcs
+        ],
+    }
+
+
+def write(prefix: str, profiler: cProfile.Profile, wall: float = None, cpu: float = None) -> None:
+    """This function will write the .prof, .txt and .json reports of the profile.
+
+    Args:
+        prefix (str): The output prefix, i.e. ~> profile/promote.
+        profiler (cProfile.Profile): The (stopped) profiler.
+        wall (float): The wall time of the profiled run, in seconds.
+        cpu (float): The process CPU time of the profiled run, in seconds.
+    """
+    if os.path.dirname(prefix):
+        os.makedirs(os.path.dirname(prefix), exist_ok=True)
+
+    profiler.dump_stats(f"{prefix}.prof")
+
+    _stats = pstats.Stats(profiler)
+    _report = report(_stats, wall=wall, cpu=cpu)
+    with open(f"{prefix}.json", "w", encoding="utf-8") as f:
+        json.dump(_report, f, indent=2, sort_keys=True)
+
+    _text = io.StringIO()
+    _breakdown = _report["breakdown"]
+    _text.write(f"wall {wall or 0:.3f}s  cpu {cpu or 0:.3f}s  ")
+    _text.write("  ".join(f"{k} {_breakdown[k]:.3f}s" for k in ("wait", "decode", "python")) + "\n\n")
+    pstats.Stats(profiler, stream=_text).strip_dirs().sort_stats("cumulative").print_stats(TOP)
+    with open(f"{prefix}.txt", "w", encoding="utf-8") as f:
+        f.write(_text.getvalue())
+
+
+def _flush() -> None:
+    global _profiler
+    if _profiler is None:
+        return
+
+    _profiler.disable()
+    _wall = time.perf_counter() - _started[0]
+    _cpu = time.process_time() - _started[1]
+    try:
+        write(PROFILE, _profiler, wall=_wall, cpu=_cpu)
+        print(f"[INFO] - Profile written to {PROFILE}.prof, .txt and .json", file=sys.stderr) # stdout is the scripts' output
+    except OSError as e:
+        print(f"[WARNING] - Unable to write the profile {PROFILE}: {e}", file=sys.stderr)
+    _profiler = None
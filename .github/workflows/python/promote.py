@@ -3,15 +3,21 @@
 # Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
 """
 import os
-import json
 import sys
+import json
+import time
 import argparse
-import subprocess # We will use subprocess to run the gh command to get the deployment pipelines
 
-from icecream import ic
-from common import get_releases, get_draft_release, get_pre_release, latest_release, get_release_id # Import the get_releases function from common.py
+from concurrent.futures import ThreadPoolExecutor
+
+from debug import ic
+from common import get_release_index, get_draft_release, get_pre_release, latest_release, get_release_id, edit_release, get_release_snapshot, get_release_changes, get_releases_by_tag, wait_for_releases, WAIT_TIMEOUT # Import the get_releases function from common.py
+from releases import ReleaseIndex
+from tracing import span, traced, annotate
+from profiling import PROFILE, enable as enable_profile
 
 BASE = os.path.dirname(os.path.abspath(__file__)) # Get the base directory of the script
+WORKERS = int(os.environ.get("SRE_PROMOTE_WORKERS", "8")) # Repos promoted concurrently from a manifest
 ic.disable() # Disable debug mode
 
 # Let's create an argument parser
@@ -21,88 +27,440 @@ parser = argparse.ArgumentParser(
 )
 parser.add_argument("--prerelease", action="store_true", help="Get Pre-Release Commit SHA.", default=False) # Dev
 parser.add_argument("--release", action="store_true", help="Get Latest Release Commit SHA.", default=False) # Dev
+parser.add_argument("--manifest", type=str, help="Promote every repo in the JSON manifest concurrently.", default=None)
+parser.add_argument("--workers", type=int, help="Repos promoted concurrently with --manifest.", default=WORKERS)
+parser.add_argument("--dry-run", action="store_true", help="Print the promotion plan without applying it.", default=False)
+parser.add_argument("--wait", action="store_true", help="Wait for the releases to be ready for the promotion instead of failing.", default=False)
+parser.add_argument("--timeout", type=float, help="Seconds to wait with --wait.", default=WAIT_TIMEOUT)
+parser.add_argument("--plan", type=str, help="Apply the plan saved by `preflight.py --save-plan`, instead of planning again.", default=None)
+parser.add_argument("--dispatch", type=str, help="With --release, deploy the services in this JSON file (see dispatch.py) once promoted.", default=None)
 parser.add_argument("--debug", action="store_true", help="Enable debug mode.", default=False) # Debug mode
+parser.add_argument("--profile", type=str, help="Profile the run, and write <prefix>.prof/.txt/.json (a directory gets the script name).", default=PROFILE)
 
 
-args = parser.parse_args() # Parse the arguments
+# Stage --> the REST fields of the release edit
+STAGE_FIELDS = {
+    "prerelease": {"draft": False, "prerelease": True}, # Draft (dev) --> Pre-release (stg)
+    "release": {"draft": False, "prerelease": False, "make_latest": "true"}, # Pre-release (stg) --> Latest release (prod)
+}
 
-if args.debug:
-    ic.enable() # Enable debug mode
 
-def cut_prerelease():
-    _cmd = [
-        "gh",
-        "release",
-        "edit",
-        _draft_release.get("tagName"),
-        "--draft=false",
-        "--prerelease",
-    ]
+def is_ready(stage: str, releases: ReleaseIndex) -> bool:
+    """This function will check the releases are ready for the stage -- what --wait waits for.
 
-    r = subprocess.run(_cmd, check=True, capture_output=True)
-    if r.returncode != 0:
-        print(f"[ERROR] - {r.stderr}")
-        sys.exit(1)
+    Args:
+        stage (str): The first promotion stage -- prerelease (a draft, and no pre-release) or release (a pre-release).
+        releases (ReleaseIndex): The release index.
 
+    Returns:
+        bool: True if the stage can be planned.
+    """
+    if stage == "prerelease":
+        return bool(releases.draft) and not releases.prerelease
+    return bool(releases.prerelease)
 
-def cut_release():
-    _cmd = [
-        "gh",
-        "release",
-        "edit",
-        _prerelease.get("tagName"),
-        "--latest",
-        "--draft=false",
-        "--prerelease=false",
-    ]
-
-    r = subprocess.run(_cmd, check=True, capture_output=True)
-    if r.returncode != 0:
-        print(f"[ERROR] - {r.stderr}")
-        sys.exit(1)
 
+def wait_until_ready(stage: str, repo: str = None, timeout: float = WAIT_TIMEOUT) -> None:
+    """This function will wait for the releases to be ready for the stage, i.e. ~> for release-drafter to create the draft.
+
+    Raises:
+        Exception: If the deadline passed first.
+    """
+    if wait_for_releases(lambda i: is_ready(stage, i), repo=repo, timeout=timeout) is None:
+        _expected = "a draft release and no pre-release" if stage == "prerelease" else "a pre-release"
+        raise Exception(f"[ERROR] - Timed out after {timeout:.0f}s waiting for {_expected}.")
+
+
+def cut_prerelease(release, repo: str = None):
+    # Draft (dev) --> Pre-release (stg)
+    edit_release(release, repo=repo, **STAGE_FIELDS["prerelease"])
+
+
+def cut_release(release, repo: str = None):
+    # Pre-release (stg) --> Latest release (prod)
+    edit_release(release, repo=repo, **STAGE_FIELDS["release"])
+
+
+@traced("promote.preflight")
+def preflight(stage: str, repo: str = None, releases=None):
+    """This function will check the repo is ready for the promotion and return the release to promote.
+
+    Args:
+        stage (str): The promotion -- prerelease (draft to pre-release) or release (pre-release to latest).
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+        releases (ReleaseIndex): The release index, fetched if not given.
+
+    Returns:
+        Release: The release to promote.
+
+    Raises:
+        Exception: If the repo is not ready for the promotion.
+    """
+    annotate("stage", stage)
 
-if __name__ == "__main__":
     # Let's get the releases for the repository - This data will be used to get the release information
-    _releases: list[dict] = get_releases() # Get the releases for the repository
+    _releases = releases or get_release_index(repo=repo) # Indexed once, shared by every lookup below
     ic(f"Releases: {_releases}") # Print the releases - debugging purposes
 
-    if (not args.prerelease) and (not args.release):
-        raise Exception("[ERROR] - Please provide a valid argument --prerelease or --release.")
-    
-    if args.prerelease:
+    if stage == "prerelease":
         # This is begins the release process for a draft release (dev) to a pre-release (stg)
         # We MUST have a draft release to process and promote to a pre-release
         _draft_release = get_draft_release(obj=_releases)
         ic(f"Draft Release: {_draft_release}") # Print the draft release - debugging purposes
 
-        release_id = get_release_id(tagName=_draft_release.get("tagName")) # Get the draft release id
+        if not _draft_release:
+            raise Exception("[ERROR] - The draft release is empty.")
+
+        release_id = get_release_id(tagName=_draft_release.tagName, releases=_releases, repo=repo) # Get the draft release id
         ic(f"Draft Release ID: {release_id}")
-        
+
         _prerelease = get_pre_release(obj=_releases)
         ic(f"Pre-Release: {_prerelease}")
 
         # Let's check if we have a pre-release, if so, we need to fail as there can be only one
         if _prerelease:
             raise Exception("[ERROR] - The pre-release is not empty.")
-        
-        # Let's cut the pre-release
-        cut_prerelease() # Cut the pre-release
-        print("[SUCCESS] - Cutting the pre-release...")
 
+        return _draft_release
 
-    if args.release:
+    if stage == "release":
         # This is begins the release process for a pre-release (stg) to a latest release (prod)
         # We MUST have a pre-release to process and promote to a latest release
         _prerelease = get_pre_release(obj=_releases)
         ic(f"Prerelease: {_prerelease}")
 
-        release_id = get_release_id(tagName=_prerelease.get("tagName")) # Get the draft release id
-        ic(f"Prerelease ID: {release_id}")
-
         if not _prerelease:
             raise Exception("[ERROR] - The pre-release is empty.")
-        
-        # Let's cut the release
-        cut_release()
+
+        release_id = get_release_id(tagName=_prerelease.tagName, releases=_releases, repo=repo) # Get the draft release id
+        ic(f"Prerelease ID: {release_id}")
+
+        return _prerelease
+
+    raise Exception(f"[ERROR] - Unknown promotion stage {stage}, please use prerelease or release.")
+
+
+def _state(release) -> dict:
+    return {"isDraft": bool(release.get("isDraft")), "isPrerelease": bool(release.get("isPrerelease")), "isLatest": bool(release.get("isLatest"))}
+
+
+def _role(state: dict) -> str:
+    return "draft" if state["isDraft"] else "prerelease" if state["isPrerelease"] else "latest" if state["isLatest"] else "published"
+
+
+def build_plan(stages: list[str], releases: list, repo: str = None, etag: str = None) -> dict:
+    """This function will compute the promotion plan from one snapshot of the releases -- no API calls.
+
+    The stages are simulated in order on a copy of the snapshot, so every stage is checked (`preflight`) against the state
+    the previous stages leave behind, i.e. ~> ["prerelease", "release"] takes the draft all the way to latest.
+
+    Args:
+        stages (list[str]): The promotions, in order -- prerelease and/or release.
+        releases (list): The releases of the snapshot.
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>.
+        etag (str): The ETag of the listing the snapshot came from.
+
+    Returns:
+        dict: The plan -- repo, etag, and the transitions (stage, tagName, databaseId, before, after, fields, effects).
+
+    Raises:
+        Exception: If a stage cannot be applied (see `preflight`).
+    """
+    _releases = [i.to_dict() if hasattr(i, "to_dict") else dict(i) for i in releases] # The simulated state
+    _transitions = []
+
+    for _stage in stages:
+        _target = preflight(_stage, repo=repo, releases=ReleaseIndex(_releases))
+        _current = next(i for i in _releases if i.get("tagName") == _target.tagName)
+        _before = _state(_current)
+        _effects = []
+
+        if _stage == "prerelease":
+            _current.update(isDraft=False, isPrerelease=True)
+        else:
+            for i in _releases:
+                if i.get("isLatest") and i is not _current:
+                    i["isLatest"] = False
+                    _effects.append(f"{i.get('tagName')} is no longer the latest release")
+            _current.update(isDraft=False, isPrerelease=False, isLatest=True)
+
+        _transitions.append(
+            {
+                "stage": _stage,
+                "tagName": _current.get("tagName"),
+                "databaseId": _current.get("databaseId"),
+                "before": _before,
+                "after": _state(_current),
+                "fields": dict(STAGE_FIELDS[_stage]),
+                "effects": _effects,
+            }
+        )
+
+    return {"repo": repo, "etag": etag, "transitions": _transitions}
+
+
+@traced("promote.plan")
+def plan_promotion(stages: list[str], repo: str = None) -> dict:
+    """This function will plan the promotion from one revalidated snapshot of the releases.
+
+    Args:
+        stages (list[str]): The promotions, in order -- prerelease and/or release.
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+
+    Returns:
+        dict: The plan (see `build_plan`).
+    """
+    _etag, _releases = get_release_snapshot(repo=repo, revalidate=True) # A conditional request, free while nothing changed
+    return build_plan(stages, _releases, repo=repo, etag=_etag)
+
+
+def _plan_key(plan: dict) -> list:
+    # What the plan depends on -- the releases it edits, and the state they were in
+    return [(t["stage"], t["tagName"], t["databaseId"], tuple(t["before"].items())) for t in plan["transitions"]]
+
+
+@traced("promote.apply")
+def apply_plan(plan: dict) -> ReleaseIndex:
+    """This function will apply the plan -- optimistic concurrency check, the release edits in order, then one confirming read.
+
+    The check is one conditional request against the ETag of the plan's snapshot: a 304 means nothing changed.
+    If the listing changed (i.e. ~> release-drafter updated the draft notes), the plan is rebuilt from the new listing,
+    and applied only if it edits the same releases from the same state.
+
+    Args:
+        plan (dict): The plan (see `build_plan`).
+
+    Returns:
+        ReleaseIndex: The promoted releases, as confirmed.
+
+    Raises:
+        Exception: If the releases the plan edits changed since it was made, or the promotion could not be confirmed.
+    """
+    _repo = plan["repo"]
+
+    _etag, _changed = get_release_changes(repo=_repo, etag=plan["etag"]) if plan["etag"] else get_release_snapshot(repo=_repo, revalidate=True)
+    if _changed is not None:
+        ic(f"apply_plan() - The releases changed since the plan ({plan['etag']} --> {_etag}), re-validating.")
+        _replan = build_plan([t["stage"] for t in plan["transitions"]], _changed, repo=_repo, etag=_etag)
+        if _plan_key(_replan) != _plan_key(plan):
+            raise Exception("[ERROR] - The releases changed since the promotion was planned, please re-run the promotion.")
+        plan = _replan
+
+    for t in plan["transitions"]:
+        edit_release(t, repo=_repo, **t["fields"])
+
+    # One read of the promoted releases confirms every transition
+    _expected = {t["tagName"]: t["after"] for t in plan["transitions"]} # The last transition of a tag wins
+    _index = ReleaseIndex(get_releases_by_tag(list(_expected), repo=_repo))
+    for _tag, _after in _expected.items():
+        _release = _index.tag(_tag)
+        if not _release or _state(_release) != _after:
+            raise Exception(f"[ERROR] - The promotion of {_tag} could not be confirmed, it is {_role(_state(_release)) if _release else 'missing'} instead of {_role(_after)}.")
+
+    return _index
+
+
+def format_plan(plan: dict) -> str:
+    """This function will format the plan for the dry-run output."""
+    _lines = [f"[PLAN] - {plan['repo'] or 'current repository'} (snapshot {plan['etag'] or '-'})"]
+    for t in plan["transitions"]:
+        _fields = " ".join(f"{k}={v}" for k, v in t["fields"].items())
+        _lines.append(f"    {t['tagName']:<16} {_role(t['before'])} --> {_role(t['after'])}    PATCH releases/{t['databaseId']} {_fields}")
+        _lines.extend(f"    {'':<16} {i}" for i in t["effects"])
+    return "\n".join(_lines)
+
+
+def promote(stage: str, repo: str = None):
+    """This function will promote the repo -- draft to pre-release, or pre-release to latest.
+
+    Args:
+        stage (str): The promotion -- prerelease or release.
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+
+    Returns:
+        Release: The promoted release.
+    """
+    with span("promote", stage=stage, repo=repo):
+        _plan = plan_promotion([stage], repo=repo)
+        return apply_plan(_plan).tag(_plan["transitions"][-1]["tagName"])
+
+
+def load_manifest(path: str, stage: str = None) -> list[dict]:
+    """This function will load a promotion manifest.
+
+    The manifest is a JSON list of repos -- either "manscaped-dev/<repo>" strings (promoted to the --prerelease/--release stage),
+    or {"repo": "manscaped-dev/<repo>", "stage": "prerelease|release"} objects.
+
+    Args:
+        path (str): The manifest file.
+        stage (str): The stage for entries that do not set one.
+
+    Returns:
+        list[dict]: The manifest entries -- repo and stage.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        _data = json.load(f)
+
+    _entries = []
+    for i in _data:
+        _entry = {"repo": i, "stage": stage} if isinstance(i, str) else {"repo": i.get("repo"), "stage": i.get("stage", stage)}
+        if not _entry["repo"] or _entry["stage"] not in ("prerelease", "release"):
+            print(f"[ERROR] - Invalid manifest entry {i} - every entry needs a repo and a prerelease/release stage.")
+            sys.exit(1)
+        _entries.append(_entry)
+
+    return _entries
+
+
+def load_plan(path: str) -> dict:
+    """This function will load the plan saved by `preflight.py --save-plan` (or the plan output of the pre-promotion job).
+
+    Args:
+        path (str): The plan file.
+
+    Returns:
+        dict: The plan (see `build_plan`).
+    """
+    if not os.path.isfile(path) or os.path.getsize(path) == 0:
+        print(f"[ERROR] - The promotion plan {path} is missing or empty - did the pre-promotion checks pass?")
+        sys.exit(1)
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            _plan = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] - Unable to read the promotion plan {path} - {e}")
+        sys.exit(1)
+
+    _keys = ("stage", "tagName", "databaseId", "before", "after")
+    if (
+        not isinstance(_plan, dict)
+        or not {"repo", "etag", "transitions"} <= _plan.keys()
+        or not isinstance(_plan["transitions"], list)
+        or not _plan["transitions"]
+        or not all(isinstance(t, dict) and set(_keys) <= t.keys() and t["stage"] in ("prerelease", "release") for t in _plan["transitions"])
+        or not all(isinstance(t["before"], dict) and isinstance(t["after"], dict) for t in _plan["transitions"])
+    ):
+        print(f"[ERROR] - Invalid promotion plan {path} - expected repo, etag and transitions ({', '.join(_keys)}) of a prerelease/release stage.")
+        sys.exit(1)
+
+    return _plan
+
+
+def _promote_entry(entry: dict, dry_run: bool = False, wait: float = None) -> dict:
+    """This function will promote one manifest entry, recording the failure instead of aborting the release train."""
+    _start = time.perf_counter()
+    _result = dict(entry, tagName=None, status="failed", error=None)
+
+    try:
+        if wait is not None:
+            wait_until_ready(entry["stage"], repo=entry["repo"], timeout=wait)
+
+        if dry_run:
+            _plan = plan_promotion([entry["stage"]], repo=entry["repo"])
+            _result["tagName"] = _plan["transitions"][-1]["tagName"]
+            _result["plan"] = format_plan(_plan)
+            _result["status"] = "planned"
+        else:
+            _result["tagName"] = promote(entry["stage"], repo=entry["repo"]).tagName
+            _result["status"] = "promoted"
+    except SystemExit:
+        _result["error"] = "The promotion exited early, see the output above."
+    except Exception as e:
+        _result["error"] = str(e)
+
+    _result["seconds"] = round(time.perf_counter() - _start, 3)
+    return _result
+
+
+def promote_manifest(entries: list[dict], workers: int = WORKERS, dry_run: bool = False, wait: float = None) -> list[dict]:
+    """This function will promote every repo in the manifest concurrently -- one failure does not stop the others.
+
+    Args:
+        entries (list[dict]): The manifest entries -- repo and stage.
+        workers (int): The number of repos promoted at the same time.
+        dry_run (bool): Only plan the promotions (the plan is in `plan`).
+        wait (float): Wait up to this many seconds for every repo to be ready, None to fail right away.
+
+    Returns:
+        list[dict]: The result of every promotion -- repo, stage, tagName, status (promoted, planned or failed), error, seconds.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(lambda i: _promote_entry(i, dry_run=dry_run, wait=wait), entries))
+
+
+def main(argv: list = None) -> int:
+    """This function will run the promotion -- draft to pre-release (--prerelease), pre-release to latest (--release), or a --manifest.
+
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: The exit code.
+    """
+    with span("args.parse"):
+        args = parser.parse_args(argv) # Parse the arguments
+
+    if args.debug:
+        ic.enable() # Enable debug mode
+
+    if args.profile:
+        enable_profile(args.profile) # Written when the script exits
+
+    if args.plan:
+        _saved = load_plan(args.plan) # The stages come from the plan
+        args.prerelease, args.release = (any(t["stage"] == i for t in _saved["transitions"]) for i in ("prerelease", "release"))
+
+    if (not args.prerelease) and (not args.release) and (not args.manifest):
+        raise Exception("[ERROR] - Please provide a valid argument --prerelease or --release.")
+
+    if args.manifest:
+        _stage = "prerelease" if args.prerelease else "release" if args.release else None
+        _start = time.perf_counter()
+        _results = promote_manifest(load_manifest(args.manifest, stage=_stage), workers=args.workers, dry_run=args.dry_run, wait=args.timeout if args.wait else None)
+
+        for i in _results:
+            if i.get("plan"):
+                print(i["plan"])
+                continue
+            print(f"[{'SUCCESS' if i['status'] == 'promoted' else 'ERROR'}] - {i['repo']} {i['stage']} {i['tagName'] or '-'} ({i['seconds']:.2f}s) {i['error'] or ''}".rstrip())
+
+        _failed = [i for i in _results if i["status"] == "failed"]
+        print(f"[INFO] - {len(_results) - len(_failed)}/{len(_results)} repos {'planned' if args.dry_run else 'promoted'} in {time.perf_counter() - _start:.2f}s.")
+        return 1 if _failed else 0
+
+    # Both stages are planned together from one snapshot -- --prerelease --release takes the draft all the way to latest
+    _stages = [i for i in ("prerelease", "release") if getattr(args, i)]
+    if args.wait:
+        wait_until_ready(_stages[0], timeout=args.timeout)
+
+    _plan = _saved if args.plan else plan_promotion(_stages) # A saved plan is checked against its snapshot when applied
+    if args.dry_run:
+        print(format_plan(_plan))
+        return 0
+
+    _services = None
+    if args.release and args.dispatch:
+        from dispatch import load_services, dispatch_services, format_summary # Only the production promotion deploys
+        _services = load_services(args.dispatch) # Read before the promotion, a broken file fails early
+
+    apply_plan(_plan)
+
+    if args.prerelease:
+        print("[SUCCESS] - Cutting the pre-release...")
+
+    if args.release:
         print("[SUCCESS] - Cutting the release....")
+
+    if _services:
+        _results = dispatch_services(_services, tag=_plan["transitions"][-1]["tagName"])
+        print(format_summary(_results))
+        if any(i["status"] != "success" for i in _results):
+            print("[ERROR] - The release was promoted, but not every service deployed.")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,31 @@
 import argparse
 import json
 import os
-import subprocess
+import sys
 
-from icecream import ic
+from debug import ic
+from common import get_release_index, iter_releases
+from releases import ReleaseIndex, as_index
+from registrants import find_registrants, find_root_registrant, read_registrant, save_parsed
+from version import Version, parse_version
+from tracing import span, traced
+from profiling import PROFILE, enable as enable_profile
 
 BASE = os.path.dirname(
     os.path.abspath(__file__)
 )  # Get the base directory of the script
 
-REPO = os.path.abspath(
+REPO = os.environ.get("GITHUB_WORKSPACE") or os.path.abspath(
     os.path.join(BASE, "..", "..", "..")
 )  # Get the repository directory
 
-ic.disable()  # Disable icecream output by default
+TAG_PREFIX = os.environ.get(
+    "SRE_PACKAGE_TAG_PREFIX", "{name}-"
+)  # The release tags of a nested package, {name} is its directory, i.e. ~> api-v1.2.3
+
+FIRST_VERSION = Version(0, 1, 0)  # The first draft release of every project
 
-if not os.environ.get("GITHUB_REPOSITORY"):
-    print("[ERROR] - The GITHUB_REPOSITORY environment variable is not set.")
-    exit(1)
+ic.disable()  # Disable icecream output by default
 
 parser = argparse.ArgumentParser(
     description="Update the version from the registrant."
@@ -25,7 +33,35 @@ parser = argparse.ArgumentParser(
 parser.add_argument(
     "--version",
     type=str,
-    help="The version to set in the registrant file, i.e. ~> mando.json, pyproject.toml.",
+    help="The version to validate -- defaults to the version in the root registrant file, i.e. ~> mando.json, pyproject.toml.",
+)
+parser.add_argument(
+    "--discover",
+    action="store_true",
+    help="Validate every registrant file in the checkout (monorepos), each against its own release stream.",
+)
+parser.add_argument(
+    "--root",
+    type=str,
+    help="The checkout with the registrant file(s).",
+    default=REPO,
+)
+parser.add_argument(
+    "--tag-prefix",
+    type=str,
+    help="The tag prefix of a nested package's releases, {name} is its directory.",
+    default=TAG_PREFIX,
+)
+parser.add_argument(
+    "--github-output",
+    action="store_true",
+    help="Write version (the root package) to GITHUB_OUTPUT -- and versions (JSON) with --discover.",
+)
+parser.add_argument(
+    "--profile",
+    type=str,
+    help="Profile the run, and write <prefix>.prof/.txt/.json (a directory gets the script name).",
+    default=PROFILE,
 )
 parser.add_argument(
     "--debug",
@@ -33,129 +69,118 @@ parser.add_argument(
     help="Enable debug mode.",
 )
 
-args = parser.parse_args()
 
-if args.debug:
-    ic.enable()
+def read_root_version(root: str) -> str:
+    """Read the version of the checkout's root registrant file -- the repository's own release stream.
 
-if not args.version:
-    print("[ERROR] - The version argument (from registrant) is required.")
-    exit(1)
-
-
-def get_github_releases() -> json:
-    """Get the latest release version from GitHub.
+    Args:
+        root (str): The checkout.
 
     Returns:
-        str: The latest release version.
+        str: The version, as written in the file.
     """
-    cmd = [
-        "gh",
-        "release",
-        "list",
-        "--json",
-        "isDraft,isLatest,isPrerelease,name,tagName",
-    ]
-    result = subprocess.run(cmd, check=True, capture_output=True)
-    if result.returncode != 0:
-        print(f"[ERROR] - {result.stderr.decode('utf-8')}")
+    _path = find_root_registrant(root)
+    if _path is None:
+        print("[ERROR] No versioning file found. Please check your repository.")
         exit(1)
 
-    return json.loads(result.stdout.decode("utf-8").strip())
+    try:
+        _registrant = read_registrant(_path, root)
+    except ValueError as e:
+        print(f"[ERROR] - {e}")
+        exit(1)
+    save_parsed()
 
+    if _registrant.version is None:
+        print(f"[ERROR] - The registrant file {_path} has no version.")
+        exit(1)
 
-def _set_release_versions(_latest_data: json) -> tuple:
+    ic(f"read_root_version() - Versioning Method: {_registrant.kind}")
+    return _registrant.version
+
+
+def get_github_releases() -> ReleaseIndex:
+    """Get the draft, prerelease and latest releases from GitHub.
+
+    Returns:
+        ReleaseIndex: The releases, served through the shared transport and release snapshot (common.py).
+    """
+    return get_release_index()
+
+
+def _set_release_versions(_latest_data: ReleaseIndex) -> tuple:
     """Set the release versions based on the latest data.
 
     Args:
-        _latest_data (json): The latest release data.
+        _latest_data (ReleaseIndex): The release index.
 
     Returns:
-        tuple: A tuple containing the release version, prerelease version, and draft version.
+        tuple: A tuple containing the release version, prerelease version, and draft version -- as Version objects.
     """
-    # Set the below lists to populate
-    _rel_data = []
-    _pre_data = []
-    _dft_data = []
-
-    # Latest Release Information
-    for i in _latest_data:
-        if i["isDraft"]:
-            _dft_data.append(i)
-        elif i["isPrerelease"]:
-            _pre_data.append(i)
-        elif i["isLatest"]:
-            _rel_data.append(i)
+    _index = as_index(_latest_data)
 
     # Let's ensure that there are not more than one release of each type
-    if len(_rel_data) > 1:
+    if "latest" in _index.multiple:
         print("[ERROR] - There are more than one release that is marked as latest.")
         exit(1)
 
-    if len(_pre_data) > 1:
+    if "prerelease" in _index.multiple:
         print("[ERROR] - There are more than one release that is marked as prerelease.")
         exit(1)
 
-    if len(_dft_data) > 1:
+    if "draft" in _index.multiple:
         print("[ERROR] - There are more than one release that is marked as draft.")
         exit(1)
 
-    if _rel_data:
-        _rv = _rel_data[0]["tagName"].lstrip("v")  # Remove the leading 'v' if present
-    else:
-        _rv = None
+    return _release_versions(_index)
 
-    if _pre_data:
-        _prv = _pre_data[0]["tagName"].lstrip("v")  # Remove the leading 'v' if present
-    else:
-        _prv = None
 
-    if _dft_data:
-        _dft = _dft_data[0]["tagName"].lstrip("v")  # Remove the leading 'v' if present
-    else:
-        _dft = None
+def _release_versions(_index: ReleaseIndex) -> tuple:
+    # The versions are parsed once by the index, i.e. ~> v2.3.4 --> Version(2, 3, 4) -- latest is the release GitHub marks latest
+    _rv = _index.latest.version if _index.latest else None
+    _prv = _index.prerelease.version if _index.prerelease else None
+    _dft = _index.draft.version if _index.draft else None
 
     return (_rv, _prv, _dft)
 
 
 def _compare_versions(
-    version_type: str, version_to_compare: tuple, new_version: tuple
+    version_type: str, version_to_compare: Version, new_version: Version
 ) -> None:
-    """At the very least, each digit should AT LEAST be equal to the current version.
+    """At the very least, the new version should be equal to the version to compare.
     Args:
-        version_to_compare (tuple): The the version to compare as a tuple of integers to the _new_version.
-        new_version (tuple): The new version as a tuple of integers.
+        version_type (str): The release type compared to, i.e. ~> prerelease.
+        version_to_compare (Version): The the version to compare to the _new_version.
+        new_version (Version): The new version.
     Raises:
         ValueError: If the new version is less than the current version.
     """
     ic(
         f"_compare_versions() - The new version {new_version} is being compared to the {version_type} version {version_to_compare}."
     )
-    for i in range(len(new_version)):
-        if not new_version[i] >= version_to_compare[i]:
-            raise ValueError(
-                f"The new version {new_version} is less than the {version_type} version {version_to_compare}."
-            )
+    if new_version < version_to_compare:
+        raise ValueError(
+            f"The new version {new_version} is less than the {version_type} version {version_to_compare}."
+        )
 
     ic(f"_compare_versions() - {version_type} - success.")
 
 
-def __should_be_equal(version_to_compare: tuple, new_version: tuple) -> bool:
+def __should_be_equal(version_to_compare: Version, new_version: Version) -> bool:
     """Check if the current version and new version are equal.
 
     Args:
-        version_to_compare (tuple): The current version as a tuple of integers.
-        new_version (tuple): The new version as a tuple of integers.
+        version_to_compare (Version): The current version.
+        new_version (Version): The new version.
 
     Returns:
         bool: True if the versions are equal, False otherwise.
     """
-    for i in range(len(new_version)):
-        if new_version[i] != version_to_compare[i]:
-            print(
-                f"[ERROR] - The new version {new_version} and current version {version_to_compare} SHOULD be equal."
-            )
-            return False
+    if new_version != version_to_compare:
+        print(
+            f"[ERROR] - The new version {new_version} and current version {version_to_compare} SHOULD be equal."
+        )
+        return False
 
     ic(
         f"__should_be_equal() - The new version {new_version} and current version {version_to_compare} are equal."
@@ -163,12 +188,12 @@ def __should_be_equal(version_to_compare: tuple, new_version: tuple) -> bool:
     return True
 
 
-def __should_be_greater(version_to_compare: tuple, new_version: tuple) -> bool:
-    """Check if the new version is greater than the current version.
+def __should_be_greater(version_to_compare: Version, new_version: Version) -> bool:
+    """Check if the new version is greater than the current version, and that the bump resets the lower fields.
 
     Args:
-        version_to_compare (tuple): The the version to compare as a tuple of integers to the _new_version.
-        new_version (tuple): The new version as a tuple of integers.
+        version_to_compare (Version): The the version to compare to the _new_version.
+        new_version (Version): The new version.
 
     Returns:
         bool: True if the new version is greater, False otherwise.
@@ -176,89 +201,37 @@ def __should_be_greater(version_to_compare: tuple, new_version: tuple) -> bool:
     ic(
         f"__should_be_greater() - The new version {new_version} is being compared to the current version {version_to_compare}."
     )
-    gt = False
-    assert len(new_version) == 3, "The new version must be a tuple of 3 integers."
-    assert (
-        len(version_to_compare) == 3
-    ), "The version to compare must be a tuple of 3 integers."
-
-    for i in range(0, len(new_version)):
-        ic(f"__should_be_greater() - Iterative -- {i}")
-        if i == 0:
-            ic("Comparing the major version...")
-            # Let's check if the index is 0, this is the major version - meaning if this is greater, then the minor and patch versions MUST be 0
-            if new_version[i] > version_to_compare[i]:
-                ic(
-                    f"__should_be_greater() - The major version is being compared. {new_version[i]} > {version_to_compare[i]}"
-                )
-                # This is the major version, so we need to check if the minor and patch versions are 0
-                if new_version[1] != 0 or new_version[2] != 0:
-                    print(
-                        f"[ERROR] - The new version {new_version} is greater than the current version {version_to_compare}, but the minor and patch versions are not 0."
-                    )
-                    print(
-                        "[CRITICAL] - If the major version has changed, the minor and patch versions must be 0."
-                    )
-                    exit(1)
-
-                gt = True
-                break  # We found the new version is greater
-
-        if i == 1:
-            ic("Comparing the minor version...")
-            # This is the minor version, so we need to check if the patch version is 0
-            if new_version[i] > version_to_compare[i]:
-                ic(
-                    f"__should_be_greater() - The minor version is being compared. {new_version[i]} > {version_to_compare[i]}"
-                )
-                if new_version[2] != 0:
-                    print(
-                        f"[ERROR] - The new version {new_version} is greater than the current version {version_to_compare}, but the patch version is not 0."
-                    )
-                    print(
-                        "[CRITICAL] - If the minor version has changed, the patch version must be 0."
-                    )
-                    exit(1)
-
-                gt = True
-                break  # We found the new version is greater
-
-        if i == 2:
-            ic("Comparing the patch version...")
-            # This is the patch version, so we need to check if the patch version is greater
-            ic(
-                f"__should_be_greater() - The patch version is being compared. {new_version[i]} > {version_to_compare[i]}"
-            )
-            if new_version[i] > version_to_compare[i]:
-                gt = True
-                break
+    _bump = new_version.bump(version_to_compare)
 
-    if not gt:
-        ic("The versions are equal...")
+    if _bump is None:
+        ic("The new version is not greater...")
+        return False
+
+    if not new_version.is_reset_bump(version_to_compare):
+        print(
+            f"[ERROR] - The new version {new_version} is greater than the current version {version_to_compare}, but the {'minor and patch versions are' if _bump == 'major' else 'patch version is'} not 0."
+        )
+        print(
+            f"[CRITICAL] - If the {_bump} version has changed, the {'minor and patch versions' if _bump == 'major' else 'patch version'} must be 0."
+        )
         return False
 
     ic(
-        f"__should_be_greater() - The new version {new_version} is greater than the current version {version_to_compare}."
+        f"__should_be_greater() - The new version {new_version} is greater than the current version {version_to_compare} ({_bump} bump)."
     )
     return True
 
 
-def __draft_greater_than_prerelease(dft: tuple, prv: tuple) -> bool:
+def __draft_greater_than_prerelease(dft: Version, prv: Version) -> bool:
     """Check if the draft version is greater than the prerelease version.
 
     Args:
-        dft (tuple): The draft version as a tuple of integers.
-        prv (tuple): The prerelease version as a tuple of integers.
+        dft (Version): The draft version.
+        prv (Version): The prerelease version.
     Returns:
         bool: True if the draft version is greater than the prerelease version, False otherwise.
     """
-    gt = False
-    for i in range(len(dft)):
-        if dft[i] > prv[i]:
-            gt = True
-            break  # We found the draft version is greater
-
-    if not gt:
+    if not dft > prv:
         print(
             f"[ERROR] - The draft version {dft} is not greater than the prerelease version {prv}."
         )
@@ -270,22 +243,16 @@ def __draft_greater_than_prerelease(dft: tuple, prv: tuple) -> bool:
     return True
 
 
-def __draft_greater_than_release(dft: tuple, rv: tuple) -> bool:
+def __draft_greater_than_release(dft: Version, rv: Version) -> bool:
     """Check if the draft version is greater than the release version.
 
     Args:
-        dft (tuple): The draft version as a tuple of integers.
-        rv (tuple): The release version as a tuple of integers.
+        dft (Version): The draft version.
+        rv (Version): The release version.
     Returns:
         bool: True if the draft version is greater than the release version, False otherwise.
     """
-    gt = False
-    for i in range(len(dft)):
-        if dft[i] > rv[i]:
-            gt = True
-            break  # We found the draft version is greater
-
-    if not gt:
+    if not dft > rv:
         print(
             f"[ERROR] - The draft version {dft} is not greater than the release version {rv}."
         )
@@ -297,33 +264,21 @@ def __draft_greater_than_release(dft: tuple, rv: tuple) -> bool:
     return True
 
 
-if __name__ == "__main__":
-    _new_version = tuple(
-        [int(i) for i in args.version.lstrip("v").split(".")]
-    )  # Remove the leading 'v' if present -- NOTE: This is from the pyproject.toml file
-    _latest_data = get_github_releases()
+@traced("version.validate")
+def validate_version(
+    new_version: Version, _rv: Version, _prv: Version, _dft: Version
+) -> bool:
+    """Validate the new version against the current release, prerelease and draft versions.
 
-    # Get the latest release version(s)
-    _tupledata = _set_release_versions(_latest_data)
-
-    # Let's set the release versions
-    # These are just the version numbers, not the full tag name from github --> i.e.~> 2.3.4 NOT v2.3.4
-    _rv = (
-        tuple([int(i) for i in _tupledata[0].split(".")]) if _tupledata[0] else None
-    )  # Latest release version
-    _prv = (
-        tuple([int(i) for i in _tupledata[1].split(".")]) if _tupledata[1] else None
-    )  # Prerelease version
-    _dft = (
-        tuple([int(i) for i in _tupledata[2].split(".")]) if _tupledata[2] else None
-    )  # Draft version
-
-    ### DEBUGGING ###
-    # _rv = None # This is the current release version that we are working on
-    # _prv = None # This is the current draft version that we are working on
-    # _dft = None # This is the current draft version that we are working on
-    ### DEBUGGING ###
+    Args:
+        new_version (Version): The new version (from the registrant).
+        _rv (Version): The latest release version, or None.
+        _prv (Version): The prerelease version, or None.
+        _dft (Version): The draft version, or None.
 
+    Returns:
+        bool: True if the new version is valid, False otherwise (the reason is printed).
+    """
     ic(f"Current Draft Version: {_dft}")
     ic(f"Current Prerelease Version: {_prv}")
     ic(f"Current Release Version: {_rv}")
@@ -333,90 +288,246 @@ if __name__ == "__main__":
         ic("No release or prerelease version found.")
         ic("We will start at 0.1.0")
         if _dft is None:
-            if _new_version != (0, 1, 0):
+            if new_version != FIRST_VERSION:
                 print(
                     "[ERROR] - This is the first Draft Release for this project, it must be - 0.1.0."
                 )
-                exit(1)
+                return False
 
-            if _new_version == (0, 1, 0):
-                ic(
-                    "This is the first Draft Release for this project, it is set to - 0.1.0."
-                )
-                print(f"{args.version.lstrip('v')}")
-                exit(0)
+            ic("This is the first Draft Release for this project, it is set to - 0.1.0.")
+            return True
 
-    if _prv:
-        ic("PRERELEASE FOUND")
-        ic(
-            "We have a current prerelease version set, running this logic block -- if _prv: do something"
-        )
-        # Run a basic comparison, must be AT LEAST equal to the current prerelease version
-        _compare_versions(
-            version_type="prerelease", version_to_compare=_prv, new_version=_new_version
-        )  # This will raise an error if the new version is less than the current prerelease version
+    try:
+        if _prv:
+            ic("PRERELEASE FOUND")
+            # Run a basic comparison, must be AT LEAST equal to the current prerelease version
+            _compare_versions(
+                version_type="prerelease", version_to_compare=_prv, new_version=new_version
+            )  # This will raise an error if the new version is less than the current prerelease version
 
         if _dft:
-            ic("PRERELEASE FOUND && DRAFT FOUND")
+            ic("DRAFT FOUND")
             # Run a basic comparison, must be AT LEAST equal to the current draft version
             _compare_versions(
                 version_type="draft release",
                 version_to_compare=_dft,
-                new_version=_new_version,
+                new_version=new_version,
             )
+    except ValueError as e:
+        print(f"[ERROR] - {e}")
+        return False
 
-            # If there is a current draft, they should be equal
-            if not __should_be_equal(version_to_compare=_dft, new_version=_new_version):
-                print(
-                    "[ERROR] - The new version is not equal to the current draft version - If there is a current draft, the new draft version MUST be the same."
-                )
-                exit(1)
-        else:
-            ic("PRERELEASE FOUND && DRAFT NOT FOUND")
-            # If there is no current draft, the new version must be greater than the prerelease version
-            if not __draft_greater_than_prerelease(dft=_new_version, prv=_prv):
-                print(
-                    "[ERROR] - The new version is not greater than the current prerelease version - If there is no current draft, the new draft version MUST be higher."
-                )
-                exit(1)
+    if _dft:
+        # If there is a current draft, they should be equal
+        if not __should_be_equal(version_to_compare=_dft, new_version=new_version):
+            print(
+                "[ERROR] - The new version is not equal to the current draft version - If there is a current draft, the new draft version MUST be the same."
+            )
+            return False
+    elif _prv:
+        ic("PRERELEASE FOUND && DRAFT NOT FOUND")
+        # If there is no current draft, the new version must be greater than the prerelease version
+        if not __draft_greater_than_prerelease(dft=new_version, prv=_prv):
+            print(
+                "[ERROR] - The new version is not greater than the current prerelease version - If there is no current draft, the new draft version MUST be higher."
+            )
+            return False
     else:
-        ic("PRERELEASE NOT FOUND")
-        if _dft:
-            ic("PRERELEASE NOT FOUND && DRAFT FOUND")
-            ic(
-                "We have a current draft version set, running this logic block -- if _dft: do something"
+        ic("PRERELEASE NOT FOUND && DRAFT NOT FOUND")
+        # If there is no current draft, the new version must be greater than the release version
+        if not __draft_greater_than_release(dft=new_version, rv=_rv):
+            print(
+                "[ERROR] - The new version is not greater than the current release version - If there is no current draft, or prerelease, the new draft version MUST be higher than the latest release."
             )
+            return False
 
-            # Run a basic comparison, must be AT LEAST equal to the current draft version
-            _compare_versions(
-                version_type="draft release",
-                version_to_compare=_dft,
-                new_version=_new_version,
-            )  # This will raise an error if the new version is less than the current draft version
+    if _rv and not __should_be_greater(version_to_compare=_rv, new_version=new_version):
+        print(
+            "[ERROR] - The new version is not greater than the current release version - If there is a current release, the new draft version MUST be higher."
+        )
+        return False
 
-            if not __should_be_equal(version_to_compare=_dft, new_version=_new_version):
-                print(
-                    "[ERROR] - The new draft version is not equal to the current draft version - If there is a current draft, the versions MUST be the same."
-                )
-                exit(1)
+    return True
 
-            ic(
-                "The new version is equal to the current draft version. This is expected and correct..."
-            )
-        else:
-            ic("PRERELEASE NOT FOUND && DRAFT NOT FOUND")
-            # If there is no current draft, the new version must be greater than the release version
-            if not __draft_greater_than_release(dft=_new_version, rv=_rv):
-                print(
-                    "[ERROR] - The new version is not greater than the current release version - If there is no current draft, or prerelease, the new draft version MUST be higher than the latest release."
-                )
-                exit(1)
 
-    if not __should_be_greater(version_to_compare=_rv, new_version=_new_version):
+def _stream_prefix(registrant, tag_prefix: str) -> str:
+    # The checkout root is the repository's own release stream, i.e. ~> v1.2.3
+    if registrant.directory == ".":
+        return ""
+    return tag_prefix.format(name=os.path.basename(registrant.directory))
+
+
+@traced("version.streams")
+def get_stream_versions(prefixes: list[str], repo: str = None) -> dict:
+    """Get the latest, prerelease and draft versions of every release stream.
+
+    The repository's own stream (prefix "") is read exactly like --version -- the release snapshot, and the release GitHub
+    marks as latest. GitHub marks one latest release per repository, so a nested stream's latest is its newest published
+    release: the nested streams share one listing, newest first, that stops once every one of them found its latest release.
+
+    Args:
+        prefixes (list[str]): The tag prefixes of the streams, i.e. ~> ["", "api-"].
+        repo (str): The repository, i.e. ~> manscaped-dev/<repo>. Defaults to the current repository.
+
+    Returns:
+        dict: prefix --> (release, prerelease, draft) versions (None if missing), and the roles held more than once.
+    """
+    _versions = {}
+    if "" in prefixes:
+        _index = get_release_index(repo=repo)
+        _versions[""] = (*_release_versions(_index), set(_index.multiple))
+
+    _nested = sorted((p for p in prefixes if p), key=len, reverse=True) # The longest prefix wins
+    if not _nested:
+        return _versions
+
+    _streams = {p: [None, None, None, set()] for p in _nested}
+    _pending = set(_nested)
+
+    for i in iter_releases(repo, full=True):
+        _tag = i.get("tagName") or ""
+        _prefix = next((p for p in _nested if _tag.startswith(p)), None)
+        if _prefix is None:
+            continue # The repository's own releases, or another package's
+        _version = parse_version(_tag[len(_prefix):])
+        if _version is None:
+            continue
+
+        _stream = _streams[_prefix]
+        _slot, _role = (2, "draft") if i.get("isDraft") else (1, "prerelease") if i.get("isPrerelease") else (0, "latest")
+        if _stream[_slot] is not None:
+            if _slot:
+                _stream[3].add(_role)
+            continue
+
+        _stream[_slot] = _version
+        if _slot == 0:
+            _pending.discard(_prefix)
+            if not _pending:
+                break # Every stream has its latest release -- older releases cannot change the result
+
+    return dict(_versions, **{k: tuple(v) for k, v in _streams.items()})
+
+
+def validate_registrants(root: str, tag_prefix: str = TAG_PREFIX) -> list[dict]:
+    """Validate every registrant file of the checkout against its release stream -- one process, one listing.
+
+    Args:
+        root (str): The checkout.
+        tag_prefix (str): The tag prefix of a nested package's releases.
+
+    Returns:
+        list[dict]: The result of every package -- directory, file, version, tag prefix, valid, error.
+    """
+    if find_root_registrant(root) is None: # The repository's own package -- nested packages do not replace it
+        print("[ERROR] No versioning file found. Please check your repository.")
+        exit(1)
+
+    _results = []
+    with span("registrants.read"):
+        for _path in find_registrants(root):
+            try:
+                _registrant = read_registrant(_path, root)
+            except ValueError as e:
+                _results.append({"directory": os.path.relpath(os.path.dirname(_path), root), "file": os.path.basename(_path), "version": None, "prefix": None, "valid": False, "error": str(e)})
+                continue
+
+            if _registrant.version is None and _registrant.directory != ".":
+                ic(f"validate_registrants() - {_path} has no version, skipping.")
+                continue # i.e. ~> a tooling-only pyproject.toml, or a private workspace package.json
+
+            _results.append({"directory": _registrant.directory, "file": _registrant.kind, "version": _registrant.version, "prefix": _stream_prefix(_registrant, tag_prefix), "valid": False, "error": None})
+        save_parsed()
+
+    _streams = get_stream_versions(list(dict.fromkeys(r["prefix"] for r in _results if r["prefix"] is not None)))
+
+    for r in _results:
+        if r["prefix"] is None:
+            continue
+        print(f"[INFO] - {r['directory']}/{r['file']}: {r['version']} (tags {r['prefix']}<version>)")
+
+        _new_version = parse_version(r["version"] or "")
+        if _new_version is None:
+            r["error"] = f"The version {r['version']} is not a valid semantic version (major.minor.patch)."
+            print(f"[ERROR] - {r['error']}")
+            continue
+
+        _rv, _prv, _dft, _multiple = _streams[r["prefix"]]
+        if _multiple:
+            r["error"] = f"There are more than one release that is marked as {', '.join(sorted(_multiple))}."
+            print(f"[ERROR] - {r['error']}")
+            continue
+
+        r["valid"] = validate_version(_new_version, _rv, _prv, _dft)
+        if not r["valid"]:
+            r["error"] = "The version is not valid against its releases."
+
+    return _results
+
+
+def main(argv: list = None) -> int:
+    """Validate the registrant version against the draft, prerelease and latest releases.
+
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: The exit code.
+    """
+    with span("args.parse"):
+        args = parser.parse_args(argv)
+
+    if not os.environ.get("GITHUB_REPOSITORY"):
+        print("[ERROR] - The GITHUB_REPOSITORY environment variable is not set.")
+        exit(1)
+
+    if args.debug:
+        ic.enable()
+
+    if args.profile:
+        enable_profile(args.profile)  # Written when the script exits
+
+    if args.discover:
+        _results = validate_registrants(args.root, tag_prefix=args.tag_prefix)
+        for r in _results:
+            print(f"[{'OK' if r['valid'] else 'ERROR'}] - {r['directory']}/{r['file']}: {r['version']}{'' if r['valid'] else ' -- ' + r['error']}")
+
+        if args.github_output and os.environ.get("GITHUB_OUTPUT"):
+            _root = next((r for r in _results if r["directory"] == "."), None)
+            with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+                f.write(f"version={_root['version'].lstrip('v') if _root and _root['version'] else ''}\n")
+                f.write(f"versions={json.dumps({r['directory']: r['version'] for r in _results})}\n")
+
+        return 0 if all(r["valid"] for r in _results) else 1
+
+    _version = args.version or read_root_version(args.root)  # Without --version, the root registrant file is the version
+
+    _new_version = parse_version(
+        _version
+    )  # The leading 'v' is optional -- NOTE: This is from the pyproject.toml file
+    if _new_version is None:
         print(
-            "[ERROR] - The new version is not greater than the current release version - If there is a current release, the new draft version MUST be higher."
+            f"[ERROR] - The version {_version} is not a valid semantic version (major.minor.patch)."
         )
         exit(1)
 
+    _latest_data = get_github_releases()
+
+    # Get the latest release version(s) -- as Version objects, i.e. ~> 2.3.4 NOT v2.3.4
+    _rv, _prv, _dft = _set_release_versions(_latest_data)
+
+    if not validate_version(_new_version, _rv, _prv, _dft):
+        exit(1)
+
     # Let's print the new version for tagging purposes (not a tuple)
-    print(f"{args.version.lstrip('v')}")
+    print(f"{_version.lstrip('v')}")
+
+    if args.github_output and os.environ.get("GITHUB_OUTPUT"):
+        with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as f:
+            f.write(f"version={_version.lstrip('v')}\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
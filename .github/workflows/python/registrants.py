@@ -0,0 +1,187 @@
+"""This is the registrant file reader for the release scripts -- @manscaped-dev/<repo>
+
+A registrant file holds the version of a package -- mando.json, pyproject.toml or package.json (in that order of precedence,
+one per directory, like the versioning workflow). They are found by walking the checkout, and parsed natively:
+    - mando.json, package.json: json, `.version`
+    - pyproject.toml: tomllib, `tool.poetry.version` (what `poetry version -s` prints) or `project.version`
+
+Parsed files are cached in CACHE_DIR (registrants.json) by path, keyed on (mtime, size) and then on the content hash,
+so an unchanged file is not parsed again -- a fresh checkout (new mtimes) only pays for the hash.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import json
+import hashlib
+import tomllib
+
+from debug import ic
+from cache import CACHE_DIR, CACHE_ENABLED
+
+REGISTRANT_FILES = ("mando.json", "pyproject.toml", "package.json") # In order of precedence within a directory
+SKIP_DIRS = {"node_modules", "__pycache__", "venv", "dist", "build", "site-packages"} # Never hold a registrant of ours
+PARSE_CACHE_VERSION = 1 # Bump when the shape of the parse cache changes
+
+_parsed = None # path --> [mtime_ns, size, sha1, name, version]
+_dirty = False
+
+
+class Registrant:
+    """A registrant file -- the package directory (relative to the checkout), the file, the package name and the version."""
+    __slots__ = ("path", "directory", "kind", "name", "version")
+
+    def __init__(self, path: str, directory: str, kind: str, name: str = None, version: str = None):
+        self.path = path
+        self.directory = directory
+        self.kind = kind
+        self.name = name
+        self.version = version
+
+    def __repr__(self) -> str:
+        return f"Registrant({self.path!r}, version={self.version!r})"
+
+
+def _cache_path() -> str:
+    return os.path.join(CACHE_DIR, "registrants.json")
+
+
+def _load_parsed() -> dict:
+    """This function will load the parse cache once per run -- a missing, corrupt or older file is an empty cache."""
+    global _parsed
+    if _parsed is not None:
+        return _parsed
+
+    _parsed = {}
+    if not CACHE_ENABLED:
+        return _parsed
+
+    try:
+        with open(_cache_path(), "r", encoding="utf-8") as f:
+            _data = json.load(f)
+    except (OSError, ValueError):
+        return _parsed
+
+    if isinstance(_data, dict) and _data.get("version") == PARSE_CACHE_VERSION:
+        _parsed = {k: v for k, v in (_data.get("files") or {}).items() if isinstance(v, list) and len(v) == 5}
+
+    return _parsed
+
+
+def save_parsed() -> None:
+    """This function will write the parse cache, if anything was parsed in this run -- deleted files are dropped."""
+    global _dirty
+    if not CACHE_ENABLED or not _dirty:
+        return
+
+    _path = _cache_path()
+    _tmp = f"{_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_tmp, "w", encoding="utf-8") as f:
+            _files = {k: v for k, v in _parsed.items() if os.path.exists(k)} # Forget the deleted files
+            json.dump({"version": PARSE_CACHE_VERSION, "files": _files}, f, separators=(",", ":"))
+        os.replace(_tmp, _path)
+        _dirty = False
+    except OSError as e:
+        ic(f"save_parsed() - Unable to write the parse cache {_path}: {e}")
+
+
+def _parse(kind: str, data: bytes) -> tuple:
+    """This function will return the package name and version of a registrant file.
+
+    Args:
+        kind (str): The file name, i.e. ~> pyproject.toml.
+        data (bytes): The file content.
+
+    Returns:
+        tuple: The name and the version (either may be None).
+
+    Raises:
+        ValueError: If the file is not valid JSON/TOML.
+    """
+    if kind == "pyproject.toml":
+        _toml = tomllib.loads(data.decode("utf-8"))
+        _poetry = (_toml.get("tool") or {}).get("poetry") or {}
+        _project = _toml.get("project") or {}
+        return (_poetry.get("name") or _project.get("name"), _poetry.get("version") or _project.get("version"))
+
+    _json = json.loads(data)
+    if not isinstance(_json, dict):
+        raise ValueError(f"{kind} is not a JSON object.")
+    return (_json.get("name"), _json.get("version"))
+
+
+def read_registrant(path: str, root: str) -> Registrant:
+    """This function will read a registrant file, served from the parse cache when the file did not change.
+
+    Args:
+        path (str): The registrant file.
+        root (str): The checkout, the directory is reported relative to it.
+
+    Returns:
+        Registrant: The registrant -- its version is None if the file has no version.
+
+    Raises:
+        ValueError: If the file cannot be read or parsed.
+    """
+    global _dirty
+    _entries = _load_parsed()
+    _key = os.path.abspath(path)
+    _directory = os.path.relpath(os.path.dirname(_key), root)
+    _kind = os.path.basename(path)
+
+    try:
+        _stat = os.stat(path)
+        _cached = _entries.get(_key)
+        if _cached and _cached[0] == _stat.st_mtime_ns and _cached[1] == _stat.st_size:
+            return Registrant(path, _directory, _kind, _cached[3], _cached[4])
+
+        with open(path, "rb") as f:
+            _data = f.read()
+    except OSError as e:
+        raise ValueError(f"Unable to read {path}: {e}") from e
+
+    _digest = hashlib.sha1(_data).hexdigest()
+    if _cached and _cached[2] == _digest:
+        _name, _version = _cached[3], _cached[4] # Touched, not changed
+    else:
+        try:
+            _name, _version = _parse(_kind, _data)
+        except (ValueError, UnicodeDecodeError) as e: # tomllib.TOMLDecodeError and json.JSONDecodeError are ValueErrors
+            raise ValueError(f"Unable to parse {path}: {e}") from e
+        _version = str(_version) if _version is not None else None
+
+    _entries[_key] = [_stat.st_mtime_ns, _stat.st_size, _digest, _name, _version]
+    _dirty = True
+    return Registrant(path, _directory, _kind, _name, _version)
+
+
+def find_root_registrant(root: str) -> str:
+    """This function will find the registrant file of the checkout root -- the repository's own package.
+
+    Args:
+        root (str): The checkout.
+
+    Returns:
+        str: The registrant file with the highest precedence, or None if the root has none.
+    """
+    return next((os.path.join(root, i) for i in REGISTRANT_FILES if os.path.isfile(os.path.join(root, i))), None)
+
+
+def find_registrants(root: str) -> list[str]:
+    """This function will find the registrant file of every package directory in the checkout.
+
+    Args:
+        root (str): The checkout.
+
+    Returns:
+        list[str]: The registrant files, the checkout root first -- one per directory, by precedence.
+    """
+    _files = []
+    for _dir, _dirs, _names in os.walk(root):
+        _dirs[:] = sorted(d for d in _dirs if not d.startswith(".") and d not in SKIP_DIRS) # Hidden dirs, i.e. ~> .git, .venv
+        _kind = next((i for i in REGISTRANT_FILES if i in _names), None)
+        if _kind:
+            _files.append(os.path.join(_dir, _kind))
+
+    return _files
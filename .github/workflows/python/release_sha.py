@@ -3,13 +3,13 @@
 # Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
 """
 import os
-import json
 import sys
 import argparse
-import subprocess # We will use subprocess to run the gh command to get the deployment pipelines
 
-from icecream import ic
-from common import get_releases, get_draft_release, get_pre_release, latest_release # Import the get_releases function from common.py
+from debug import ic
+from common import get_release_index, get_draft_release, get_pre_release, latest_release, get_release_commit_sha, wait_for_releases, WAIT_TIMEOUT # Import the get_releases function from common.py
+from tracing import span
+from profiling import PROFILE, enable as enable_profile
 
 BASE = os.path.dirname(os.path.abspath(__file__)) # Get the base directory of the script
 ic.disable() # Disable debug mode
@@ -22,68 +22,57 @@ parser = argparse.ArgumentParser(
 parser.add_argument("--draft", action="store_true", help="Get Draft Release Commit SHA.", default=False) # Dev
 parser.add_argument("--prerelease", action="store_true", help="Get Pre-Release Commit SHA.", default=False) # Dev
 parser.add_argument("--release", action="store_true", help="Get Latest Release Commit SHA.", default=False) # Dev
+parser.add_argument("--wait", action="store_true", help="Wait for the release to appear instead of failing.", default=False)
+parser.add_argument("--timeout", type=float, help="Seconds to wait with --wait.", default=WAIT_TIMEOUT)
 parser.add_argument("--debug", action="store_true", help="Enable debug mode.", default=False) # Debug mode
+parser.add_argument("--profile", type=str, help="Profile the run, and write <prefix>.prof/.txt/.json (a directory gets the script name).", default=PROFILE)
 
 
-args = parser.parse_args() # Parse the arguments
+def main(argv: list = None) -> int:
+    """This function will print the commit sha of the draft (--draft), pre-release (--prerelease) or latest (--release) release.
 
-if args.debug:
-    ic.enable() # Enable debug mode
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
 
-# Let's return the draft release commit sha
-def get_release_commit_sha(obj: dict) -> str:
-    """This function will return the commit sha for the draft release.
-    
     Returns:
-        str: The commit sha for the draft release
+        int: The exit code.
     """
-    _tag = obj.get("tagName") # Get the tag name for the draft release
-
-    if not _tag or _tag == "":
-        print("Error: The tag name is empty.")
-        sys.exit(1)
-
-    _cmd = [
-        "gh",
-        "api",
-        f"repos/{os.environ.get('GITHUB_REPOSITORY')}/git/refs/tags/{_tag}"
-    ]
-
-    r = subprocess.run(_cmd, check=True, capture_output=True)
-    if r.returncode != 0:
-        print(f"Error: {r.stderr}")
-        sys.exit(1)
+    with span("args.parse"):
+        args = parser.parse_args(argv) # Parse the arguments
 
-    _data = json.loads(r.stdout.decode("utf-8")) # JSON data for the release
-    
-    ic(f"Data: {_data}") # Print the data for the release - debugging purposes
+    if args.debug:
+        ic.enable() # Enable debug mode
 
-    if _data.get("object").get("sha"):
-        _sha = _data.get("object").get("sha") # Get the commit sha for the release
-    
-    return _sha if _sha else None # If the sha is empty, return an empty string
+    if args.profile:
+        enable_profile(args.profile) # Written when the script exits
 
-ic(f"Github Draft Release SHA: {get_release_commit_sha(obj=get_draft_release())}") # debugging purposes
+    if not args.draft and not args.prerelease and not args.release:
+        raise Exception("Error: Please provide an argument to get the release commit sha.")
 
-if __name__ == "__main__":
     # Let's get the releases for the repository - This data will be used to get the release information
-    _releases = get_releases() # Get the releases for the repository
+    if args.wait:
+        _roles = [r for r, flag in (("draft", args.draft), ("prerelease", args.prerelease), ("latest", args.release)) if flag]
+        _releases = wait_for_releases(lambda i: all(i.roles[r] for r in _roles), timeout=args.timeout)
+        if _releases is None:
+            print(f"Error: Timed out after {args.timeout:.0f}s waiting for the {' and '.join(_roles)} release.")
+            sys.exit(1)
+    else:
+        _releases = get_release_index() # Get the releases for the repository
+    _sha_to_print = None
 
-    if not args.dev and not args.stg and not args.prd:
-        raise Exception("Error: Please provide an argument to get the release commit sha.")
-    
     # Let's get the release commit sha - either draft, pre-release, or latest releases
     if args.draft:
-        _dr = get_draft_release(_releases=_releases) # Get the draft release
-        _sha_to_print = get_release_commit_sha(obj=_dr) # Get the draft release commit sha
+        _dr = get_draft_release(obj=_releases) # Get the draft release
+        ic(f"Github Draft Release: {_dr}") # debugging purposes
+        _sha_to_print = get_release_commit_sha(obj=_dr) if _dr else None # Get the draft release commit sha
     
     if args.prerelease:
-        _pr = get_pre_release(_releases=_releases)
-        _sha_to_print = get_release_commit_sha(obj=_pr)
+        _pr = get_pre_release(obj=_releases)
+        _sha_to_print = get_release_commit_sha(obj=_pr) if _pr else None
 
     if args.release:
-        _lr = latest_release(_releases=_releases)
-        _sha_to_print = get_release_commit_sha(obj=_lr)
+        _lr = latest_release(obj=_releases)
+        _sha_to_print = get_release_commit_sha(obj=_lr) if _lr else None
 
 
     # Let's print the sha for the release we need to compare
@@ -91,3 +80,9 @@ if __name__ == "__main__":
         print(_sha_to_print) # Print the draft release commit sha
     else:
         raise Exception("Error: The release commit sha is empty.") # Print an error message
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""This is the release index module for the repo -- @manscaped-dev/<repo>
+
+The releases are indexed in one pass -- by role (draft, prerelease, latest) and by tag -- with the versions parsed once.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+from version import parse_version
+
+ROLES = ("draft", "prerelease", "latest") # The release roles, in promotion order
+_ROLE_FLAGS = (("draft", "isDraft"), ("prerelease", "isPrerelease"), ("latest", "isLatest"))
+
+
+class Release:
+    """A compact release record -- the `get_releases` fields plus the parsed version."""
+    __slots__ = (
+        "tagName",
+        "name",
+        "isDraft",
+        "isPrerelease",
+        "isLatest",
+        "createdAt",
+        "publishedAt",
+        "id",
+        "databaseId",
+        "commitSha",
+        "version",
+    )
+
+    def __init__(
+        self,
+        tagName: str,
+        name: str = None,
+        isDraft: bool = False,
+        isPrerelease: bool = False,
+        isLatest: bool = False,
+        createdAt: str = None,
+        publishedAt: str = None,
+        id: str = None,
+        databaseId: int = None,
+        commitSha: str = None,
+    ):
+        self.tagName = tagName
+        self.name = name
+        self.isDraft = bool(isDraft)
+        self.isPrerelease = bool(isPrerelease)
+        self.isLatest = bool(isLatest)
+        self.createdAt = createdAt
+        self.publishedAt = publishedAt
+        self.id = id
+        self.databaseId = databaseId
+        self.commitSha = commitSha
+        self.version = parse_version(tagName) # Version (memoized), or None if the tag is not a semantic version
+
+    @classmethod
+    def from_dict(cls, obj: dict) -> "Release":
+        """This function will build a release from a `get_releases` dict -- unknown fields are dropped."""
+        return cls(**{k: obj.get(k) for k in cls.__slots__ if k != "version" and k in obj})
+
+    def get(self, key: str, default=None):
+        """This function will return a field like `dict.get`, so callers written against the release dicts keep working."""
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def to_dict(self) -> dict:
+        """This function will return the release as a `get_releases` dict."""
+        return {k: getattr(self, k) for k in self.__slots__ if k != "version"}
+
+    def __repr__(self) -> str:
+        return f"Release({self.tagName!r}, draft={self.isDraft}, prerelease={self.isPrerelease}, latest={self.isLatest})"
+
+
+class ReleaseIndex:
+    """The releases of a repository indexed in one pass -- O(1) lookup by role and by tag."""
+    __slots__ = ("releases", "by_tag", "roles", "multiple")
+
+    def __init__(self, releases=()):
+        self.releases = [] # Every release, in listing order
+        self.by_tag = {}
+        self.roles = {"draft": None, "prerelease": None, "latest": None}
+        self.multiple = set() # The roles held by more than one release -- an invariant violation
+
+        for i in releases:
+            self.add(i)
+
+    def add(self, release) -> Release:
+        """This function will index a release (a `Release` or a `get_releases` dict).
+
+        Args:
+            release (Release|dict): The release to index.
+
+        Returns:
+            Release: The indexed release.
+        """
+        _r = release if isinstance(release, Release) else Release.from_dict(release)
+        self.releases.append(_r)
+        self.by_tag[_r.tagName] = _r
+
+        for _role, _flag in _ROLE_FLAGS:
+            if getattr(_r, _flag):
+                if self.roles[_role] is not None:
+                    self.multiple.add(_role)
+                else:
+                    self.roles[_role] = _r
+
+        return _r
+
+    def role(self, name: str) -> Release:
+        """This function will return the release holding the role -- draft, prerelease or latest -- or None."""
+        return self.roles[name]
+
+    def tag(self, tagName: str) -> Release:
+        """This function will return the release for the tag name, or None."""
+        return self.by_tag.get(tagName)
+
+    @property
+    def draft(self) -> Release:
+        return self.roles["draft"]
+
+    @property
+    def prerelease(self) -> Release:
+        return self.roles["prerelease"]
+
+    @property
+    def latest(self) -> Release:
+        return self.roles["latest"]
+
+    def __iter__(self):
+        return iter(self.releases)
+
+    def __repr__(self) -> str:
+        return f"ReleaseIndex({len(self.releases)} releases, draft={self.draft}, prerelease={self.prerelease}, latest={self.latest})"
+
+    def __len__(self) -> int:
+        return len(self.releases)
+
+
+def as_index(obj) -> ReleaseIndex:
+    """This function will return the release index for the releases -- an index is passed through as-is.
+
+    Args:
+        obj (ReleaseIndex|list): The release index, or the releases from `get_releases`.
+
+    Returns:
+        ReleaseIndex: The release index.
+    """
+    return obj if isinstance(obj, ReleaseIndex) else ReleaseIndex(obj or ())
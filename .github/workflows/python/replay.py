@@ -0,0 +1,482 @@
+#!/usr/bin/env python3
+"""This python script is the record/replay harness for the release scripts -- @manscaped-dev/<repo>
+
+    - Record: SRE_RECORD=cassette.json captures every API call of a run (request, status, response headers and body) into a cassette.
+      The token is never recorded -- only the response headers are kept.
+    - Replay: `replay.py serve --cassette cassette.json` serves the cassette from a local stand-in server,
+      and `replay.py serve --releases 1000` serves a synthetic repository with that many releases instead.
+      Point the scripts at it with GITHUB_API_URL=http://127.0.0.1:<port> (any GH_TOKEN).
+    - Fake gh: `bench/gh` (i.e. ~> `replay.py gh api ...`) forwards `gh api` calls to the stand-in server, for the gh transport.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import hashlib
+import argparse
+import threading
+import http.client
+
+from urllib.parse import urlsplit, parse_qsl
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from transport import Transport, Response
+
+CASSETTE_VERSION = 1
+
+
+class Recorder(Transport):
+    """Wraps a backend and records every call into a cassette, written when the run exits."""
+
+    def __init__(self, transport: Transport, path: str):
+        self.transport = transport
+        self.name = transport.name
+        self.path = path
+        self._interactions = []
+        self._lock = threading.Lock()
+        atexit.register(self.save)
+
+    def request(self, method: str, path: str, body: dict = None, headers: dict = None, idempotent: bool = True) -> Response:
+        r = self.transport.request(method, path, body=body, headers=headers, idempotent=idempotent)
+        with self._lock:
+            self._interactions.append(
+                {
+                    "request": {"method": method, "path": path.lstrip("/"), "body": body, "ifNoneMatch": (headers or {}).get("If-None-Match")},
+                    "response": {"status": r.status, "headers": r.headers, "body": r.body.decode("utf-8", errors="replace")},
+                }
+            )
+        return r
+
+    def save(self) -> None:
+        """This function will write the cassette."""
+        with self._lock:
+            _data = {"version": CASSETTE_VERSION, "interactions": list(self._interactions)}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(_data, f, indent=1)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+def _key(method: str, path: str, body) -> tuple:
+    return (method.upper(), path.lstrip("/"), json.dumps(body, sort_keys=True) if body is not None else None)
+
+
+class Cassette:
+    """A recorded run, served back in order -- repeated calls get the next recording, the last one is repeated."""
+
+    def __init__(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            _data = json.load(f)
+
+        if _data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"Unsupported cassette version {_data.get('version')} in {path}.")
+
+        self._responses = {}
+        self._served = {}
+        self._lock = threading.Lock()
+        self.calls = {}
+        for i in _data.get("interactions", []):
+            _request = i["request"]
+            self._responses.setdefault(_key(_request["method"], _request["path"], _request.get("body")), []).append(i["response"])
+
+    def handle(self, method: str, path: str, headers: dict, body) -> tuple:
+        _key_ = _key(method, path, body)
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            _recorded = self._responses.get(_key_)
+            if not _recorded:
+                print(f"[WARNING] - {method} {path} is not in the cassette.", file=sys.stderr)
+                return (501, {}, json.dumps({"message": "Not in the cassette"}).encode("utf-8"))
+            _index = self._served.get(_key_, 0)
+            self._served[_key_] = _index + 1
+            _response = _recorded[min(_index, len(_recorded) - 1)]
+
+        _headers = {k: v for k, v in _response["headers"].items() if k not in ("content-length", "transfer-encoding", "connection")}
+        if headers.get("if-none-match") and headers.get("if-none-match") == _headers.get("etag"):
+            return (304, {"etag": _headers["etag"]}, b"")
+        return (_response["status"], _headers, _response["body"].encode("utf-8"))
+
+
+class StubGitHub:
+    """A synthetic repository -- releases v1.0.0 ... v1.<n-1>.0, newest first: a draft, a pre-release, the latest, then published releases.
+
+    Every repository path serves the same releases, and release edits change the state until `reset()`.
+    A workflow_dispatch starts a run that is queued, then in progress, then completed (run_seconds) -- it concludes
+    with its `conclusion` input, success by default.
+    `inject()` answers the next calls with rate limits or server errors instead, to exercise the scheduler (transport.py).
+    The tags in `annotated` are annotated tags -- their ref points to a tag object (`git/tags/<sha>`), which points to the commit.
+    """
+
+    def __init__(self, releases: int, run_seconds: tuple = (0.1, 0.3)):
+        self.size = releases
+        self.run_seconds = run_seconds # Seconds a dispatched run is queued, then in progress
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """This function will restore the initial releases and clear the call counters."""
+        with self._lock:
+            self.releases = []
+            for i in range(self.size - 1, -1, -1): # Newest first
+                _tag = f"v1.{i}.0"
+                _newest = self.size - 1 - i
+                self.releases.append(
+                    {
+                        "id": i + 1,
+                        "node_id": f"RE_{i + 1}",
+                        "tag_name": _tag,
+                        "name": _tag,
+                        "draft": _newest == 0,
+                        "prerelease": _newest == 1,
+                        "target_commitish": "main",
+                        "created_at": "2025-01-01T00:00:00Z",
+                        "published_at": None if _newest == 0 else "2025-01-02T00:00:00Z",
+                    }
+                )
+            self.by_id = {r["id"]: r for r in self.releases}
+            self.by_tag = {r["tag_name"]: r for r in self.releases}
+            self.latest_id = self.releases[2]["id"] if self.size > 2 else None
+            self.generation = 0
+            self.calls = {}
+            self.runs = []
+            self.faults = []
+            self.annotated = set()
+
+    def inject(self, kind: str, count: int = 1, path: str = "", seconds: int = 1) -> None:
+        """This function will answer the next calls with a fault instead of the response.
+
+        Args:
+            kind (str): The fault --
+                - 429: Too Many Requests, with Retry-After.
+                - secondary: 403, the secondary rate limit -- with Retry-After.
+                - primary: 403, the quota is exhausted -- X-RateLimit-Remaining: 0 and X-RateLimit-Reset.
+                - graphql: 200, a GraphQL RATE_LIMITED error (no headers).
+                - 502: Bad Gateway.
+                - 502-accepted: Bad Gateway, after the call ran -- i.e. ~> a workflow_dispatch that started its run.
+            count (int): The number of calls answered with the fault.
+            path (str): Only fault the calls whose path starts with this, i.e. ~> graphql. Defaults to every call.
+            seconds (int): The Retry-After, or the seconds until the quota resets.
+        """
+        if kind not in ("429", "secondary", "primary", "graphql", "502", "502-accepted"):
+            raise ValueError(f"Unknown fault {kind}.")
+        with self._lock:
+            self.faults.append({"kind": kind, "count": count, "path": path.lstrip("/"), "seconds": seconds})
+
+    def _fault(self, path: str) -> tuple:
+        """This function will return the kind and the response of the next fault for the path, (None, None) if there is none."""
+        _fault = next((i for i in self.faults if path.startswith(i["path"])), None)
+        if _fault is None:
+            return (None, None)
+
+        _fault["count"] -= 1
+        if _fault["count"] <= 0:
+            self.faults.remove(_fault)
+
+        _kind, _seconds = _fault["kind"], _fault["seconds"]
+        if _kind == "429":
+            return (_kind, self._json(429, {"message": "Too Many Requests"}, {"retry-after": str(_seconds)}))
+        if _kind == "secondary":
+            return (_kind, self._json(403, {"message": "You have exceeded a secondary rate limit. Please wait a few minutes before you try again."}, {"retry-after": str(_seconds)}))
+        if _kind == "primary":
+            _headers = {"x-ratelimit-limit": "5000", "x-ratelimit-remaining": "0", "x-ratelimit-used": "5000", "x-ratelimit-resource": "core", "x-ratelimit-reset": str(int(time.time()) + _seconds)}
+            return (_kind, self._json(403, {"message": "API rate limit exceeded for user ID 1."}, _headers))
+        if _kind == "graphql":
+            return (_kind, self._json(200, {"data": None, "errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded for user ID 1."}]}))
+        return (_kind, self._json(502, {"message": "Server Error"}))
+
+    def _latest(self) -> dict:
+        return self.by_id.get(self.latest_id)
+
+    def _sha(self, tag: str) -> str:
+        return hashlib.sha1(tag.encode("utf-8")).hexdigest()
+
+    def _tag_sha(self, tag: str) -> str:
+        return hashlib.sha1(f"tag {tag}".encode("utf-8")).hexdigest() # The annotated tag object, not the commit
+
+    def _run(self, run: dict) -> dict:
+        _elapsed = time.monotonic() - run["started"]
+        _queued, _running = self.run_seconds
+        _status = "queued" if _elapsed < _queued else "in_progress" if _elapsed < _queued + _running else "completed"
+        return {
+            "id": run["id"],
+            "node_id": f"WFR_{run['id']}",
+            "name": run["workflow"],
+            "event": "workflow_dispatch",
+            "head_branch": run["ref"],
+            "status": _status,
+            "conclusion": run["inputs"].get("conclusion", "success") if _status == "completed" else None,
+            "created_at": run["created_at"],
+            "html_url": f"https://github.com/{run['repo']}/actions/runs/{run['id']}",
+        }
+
+    def _json(self, status: int, obj, headers: dict = None) -> tuple:
+        return (status, dict(headers or {}, **{"content-type": "application/json; charset=utf-8"}), json.dumps(obj).encode("utf-8"))
+
+    def handle(self, method: str, path: str, headers: dict, body) -> tuple:
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+            _kind, _fault = self._fault(path.lstrip("/").partition("?")[0]) if self.faults else (None, None)
+            if _fault and _kind != "502-accepted":
+                return _fault
+
+            _response = self._respond(method, path, headers, body)
+            return _fault or _response # The call ran either way
+
+    def _respond(self, method: str, path: str, headers: dict, body) -> tuple:
+        # Called by handle(), with the lock held
+        _path, _, _query = path.lstrip("/").partition("?")
+        _params = dict(parse_qsl(_query))
+        _parts = _path.split("/")
+
+        if _path == "rate_limit":
+            _quota = {"limit": 5000, "remaining": 5000, "reset": 0, "used": 0}
+            return self._json(200, {"resources": {"core": _quota, "graphql": _quota}})
+
+        if _path == "graphql":
+            return self._graphql(body or {})
+
+        if _parts[0] != "repos" or len(_parts) < 4:
+            return self._json(404, {"message": "Not Found"})
+
+        _rest = _parts[3:]
+        if method == "GET" and _rest == ["releases"]:
+            _etag = f'"g{self.generation}"'
+            if headers.get("if-none-match") == _etag:
+                return (304, {"etag": _etag}, b"")
+            _per_page = int(_params.get("per_page", 30))
+            _page = int(_params.get("page", 1))
+            _headers = {"etag": _etag}
+            if _page * _per_page < len(self.releases):
+                _headers["link"] = f'<{path}&page={_page + 1}>; rel="next"'
+            return self._json(200, self.releases[(_page - 1) * _per_page:_page * _per_page], _headers)
+
+        if method == "GET" and _rest == ["releases", "latest"]:
+            return self._json(200, self._latest()) if self._latest() else self._json(404, {"message": "Not Found"})
+
+        if method == "GET" and _rest[:2] == ["releases", "tags"]:
+            _release = self.by_tag.get("/".join(_rest[2:]))
+            if not _release or _release["draft"]:
+                return self._json(404, {"message": "Not Found"})
+            return self._json(200, _release)
+
+        if method == "GET" and _rest[:3] == ["git", "refs", "tags"]:
+            _tag = "/".join(_rest[3:])
+            if _tag not in self.by_tag or self.by_tag[_tag]["draft"]:
+                return self._json(404, {"message": "Not Found"})
+            if _tag in self.annotated:
+                return self._json(200, {"ref": f"refs/tags/{_tag}", "object": {"sha": self._tag_sha(_tag), "type": "tag"}})
+            return self._json(200, {"ref": f"refs/tags/{_tag}", "object": {"sha": self._sha(_tag), "type": "commit"}})
+
+        if method == "GET" and _rest[:2] == ["git", "tags"] and len(_rest) == 3:
+            _tag = next((t for t in self.annotated if self._tag_sha(t) == _rest[2]), None)
+            if _tag is None:
+                return self._json(404, {"message": "Not Found"})
+            return self._json(200, {"sha": _rest[2], "tag": _tag, "object": {"sha": self._sha(_tag), "type": "commit"}})
+
+        if method == "POST" and len(_rest) == 4 and _rest[:2] == ["actions", "workflows"] and _rest[3] == "dispatches":
+            self.runs.append(
+                {
+                    "id": 5000 + len(self.runs),
+                    "repo": "/".join(_parts[1:3]),
+                    "workflow": _rest[2],
+                    "ref": (body or {}).get("ref"),
+                    "inputs": (body or {}).get("inputs") or {},
+                    "started": time.monotonic(),
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                }
+            )
+            return (204, {}, b"")
+
+        if method == "GET" and len(_rest) == 4 and _rest[:2] == ["actions", "workflows"] and _rest[3] == "runs":
+            _runs = [
+                self._run(r) for r in reversed(self.runs) # Newest first
+                if r["repo"] == "/".join(_parts[1:3]) and r["workflow"] == _rest[2] and r["ref"] == _params.get("branch", r["ref"])
+            ][:int(_params.get("per_page", 30))]
+            _payload = {"total_count": len(_runs), "workflow_runs": _runs}
+            _etag = f'"{hashlib.sha1(json.dumps(_payload).encode("utf-8")).hexdigest()}"'
+            if headers.get("if-none-match") == _etag:
+                return (304, {"etag": _etag}, b"")
+            return self._json(200, _payload, {"etag": _etag})
+
+        if method == "PATCH" and len(_rest) == 2 and _rest[0] == "releases":
+            _release = self.by_id.get(int(_rest[1])) if _rest[1].isdigit() else None
+            if not _release:
+                return self._json(404, {"message": "Not Found"})
+            for _field in ("draft", "prerelease"):
+                if _field in (body or {}):
+                    _release[_field] = body[_field]
+            if not _release["draft"] and not _release["published_at"]:
+                _release["published_at"] = "2025-01-03T00:00:00Z"
+            if (body or {}).get("make_latest") == "true":
+                self.latest_id = _release["id"]
+            self.generation += 1
+            return self._json(200, _release)
+
+        return self._json(404, {"message": "Not Found"})
+
+    def _node(self, r: dict) -> dict:
+        return {
+            "id": r["node_id"],
+            "databaseId": r["id"],
+            "name": r["name"],
+            "tagName": r["tag_name"],
+            "createdAt": r["created_at"],
+            "publishedAt": r["published_at"],
+            "isDraft": r["draft"],
+            "isPrerelease": r["prerelease"],
+            "isLatest": r["id"] == self.latest_id,
+            "tagCommit": None if r["draft"] else {"oid": self._sha(r["tag_name"])},
+        }
+
+    def _graphql(self, body: dict) -> tuple:
+        _query = body.get("query", "")
+        if "nodes(ids:" in _query: # Workflow runs, by node id
+            _runs = {f"WFR_{r['id']}": self._run(r) for r in self.runs}
+            _nodes = []
+            for i in (body.get("variables") or {}).get("ids") or []:
+                _run = _runs.get(i)
+                _suite = {"status": _run["status"].upper(), "conclusion": (_run["conclusion"] or "").upper() or None} if _run else None
+                _nodes.append({"id": i, "databaseId": _run["id"], "url": _run["html_url"], "checkSuite": _suite} if _run else None)
+            return self._json(200, {"data": {"nodes": _nodes}})
+
+        if "release(tagName:" in _query: # Aliased lookups, i.e. ~> r0: release(tagName: "v1.2.3") { ... }
+            _aliases = re.findall(r'(\w+): release\(tagName: ("(?:[^"\\]|\\.)*")\)', _query)
+            _repository = {k: (self._node(self.by_tag[json.loads(t)]) if json.loads(t) in self.by_tag else None) for k, t in _aliases}
+            return self._json(200, {"data": {"repository": _repository}})
+
+        if "releases(" not in _query:
+            return self._json(200, {"data": {"organization": {"repositories": {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}}}})
+
+        _variables = body.get("variables") or {}
+        _first = int(_variables.get("first") or 100)
+        _after = int(_variables.get("after") or 0)
+        _nodes = [self._node(r) for r in self.releases[_after:_after + _first]]
+        _page_info = {"hasNextPage": _after + _first < len(self.releases), "endCursor": str(_after + _first)}
+        return self._json(200, {"data": {"repository": {"releases": {"nodes": _nodes, "pageInfo": _page_info}}}})
+
+
+def serve(backend, port: int = 0) -> ThreadingHTTPServer:
+    """This function will start the stand-in server in a background thread.
+
+    Args:
+        backend (StubGitHub|Cassette): What the server answers with.
+        port (int): The port, 0 picks a free one (see `server.server_address`).
+
+    Returns:
+        ThreadingHTTPServer: The running server -- call `shutdown()` to stop it.
+    """
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1" # Keep-alive, like api.github.com
+        disable_nagle_algorithm = True # Headers and body are written separately -- no delayed ACK stalls per response
+
+        def log_message(self, *args):
+            pass
+
+        def _handle(self):
+            _length = int(self.headers.get("Content-Length") or 0)
+            _body = json.loads(self.rfile.read(_length)) if _length else None
+            _status, _headers, _payload = backend.handle(self.command, self.path, {k.lower(): v for k, v in self.headers.items()}, _body)
+
+            self.send_response(_status)
+            for k, v in _headers.items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(_payload)))
+            self.end_headers()
+            self.wfile.write(_payload)
+
+        do_GET = do_POST = do_PATCH = _handle
+
+    _server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def fake_gh(argv: list) -> int:
+    """This function will act as `gh` -- `gh api` calls are forwarded to the stand-in server at GITHUB_API_URL.
+
+    Args:
+        argv (list): The gh arguments, i.e. ~> api --include -X GET repos/<owner>/<repo>/releases.
+
+    Returns:
+        int: The exit code -- like gh, non-zero for a >= 300 response.
+    """
+    if argv[:2] == ["repo", "view"]:
+        print(os.environ.get("GITHUB_REPOSITORY", ""))
+        return 0
+    if not argv or argv[0] != "api":
+        print("gh version 0.0.0 (replay)") # gh --version, gh auth status
+        return 0
+
+    _method, _path, _headers, _body = "GET", None, {}, None
+    _args = iter(argv[1:])
+    for i in _args:
+        if i == "-X":
+            _method = next(_args)
+        elif i == "-H":
+            _key, _, _value = next(_args).partition(":")
+            _headers[_key.strip()] = _value.strip()
+        elif i == "--input":
+            next(_args)
+            _body = sys.stdin.buffer.read()
+        elif not i.startswith("-"):
+            _path = i
+
+    _url = urlsplit(os.environ.get("GITHUB_API_URL", ""))
+    conn = http.client.HTTPConnection(_url.hostname, _url.port)
+    if _body:
+        _headers["Content-Type"] = "application/json"
+    conn.request(_method, f"{_url.path.rstrip('/')}/{_path.lstrip('/')}", body=_body, headers=_headers)
+    resp = conn.getresponse()
+    _payload = resp.read()
+
+    _out = [f"HTTP/1.1 {resp.status} {resp.reason}"] + [f"{k}: {v}" for k, v in resp.getheaders()]
+    sys.stdout.buffer.write(("\r\n".join(_out) + "\r\n\r\n").encode("utf-8") + _payload)
+    return 0 if resp.status < 300 else 1
+
+
+def main(argv: list = None) -> int:
+    """This function will run the stand-in server (serve) or act as gh (gh).
+
+    Args:
+        argv (list): The command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: The exit code.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["gh"]:
+        return fake_gh(argv[1:])
+
+    parser = argparse.ArgumentParser(prog="SRE Release Replay", description="Serves a cassette, or a synthetic repository, as a stand-in GitHub API.")
+    parser.add_argument("command", choices=["serve"], help="Run the stand-in server.")
+    parser.add_argument("--cassette", type=str, help="Serve this cassette (recorded with SRE_RECORD).", default=None)
+    parser.add_argument("--releases", type=int, help="Serve a synthetic repository with this many releases.", default=10)
+    parser.add_argument("--port", type=int, help="The port to listen on.", default=8765)
+    parser.add_argument("--fault", action="append", help="Answer the first calls with a fault, <kind>[:<count>] -- 429, secondary, primary, graphql, 502 or 502-accepted (see StubGitHub.inject).", default=[])
+    args = parser.parse_args(argv)
+    if args.fault and args.cassette:
+        parser.error("--fault only applies to the synthetic repository, a cassette replays its recorded responses.")
+
+    _backend = Cassette(args.cassette) if args.cassette else StubGitHub(args.releases)
+    for i in args.fault:
+        _kind, _, _count = i.partition(":")
+        _backend.inject(_kind, count=int(_count or 1))
+
+    _server = serve(_backend, port=args.port)
+    print(f"[INFO] - Serving on http://127.0.0.1:{_server.server_address[1]} -- export GITHUB_API_URL=http://127.0.0.1:{_server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        _server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
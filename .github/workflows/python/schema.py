@@ -0,0 +1,230 @@
+"""This is the typed decoding layer for the API responses of the release scripts -- @manscaped-dev/<repo>
+
+The responses are decoded from `bytes` once, at the boundary, into compact typed records -- only the fields the scripts use
+are kept, and every one of them is type-checked there, so the code behind it reads attributes instead of chained `.get()`:
+    - Release (releases.py): A release listing entry, a release view (`releases/tags/<tag>`, `releases/latest`) or a GraphQL node.
+    - Ref: A tag ref (`git/refs/tags/<tag>`), or an annotated tag object (`git/tags/<sha>`) -- the object it points to.
+
+A response that does not match is a SchemaError (a ValueError) naming the field, i.e. ~> `[3].tag_name: expected str, got null`.
+
+The JSON decoder (SRE_JSON_DECODER):
+    - auto: orjson for large bodies (>= SRE_JSON_FAST_MIN bytes, i.e. ~> REST release pages) when it is installed, json otherwise.
+      orjson parses the bytes directly (no intermediate str), but costs ~25ms to import -- it is only imported once needed.
+    - orjson: orjson for every body, when it is installed.
+    - json: The standard library only.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import json
+
+from releases import Release
+
+DECODER = os.environ.get("SRE_JSON_DECODER", "auto") # auto, orjson or json
+FAST_MIN = int(os.environ.get("SRE_JSON_FAST_MIN", "65536")) # Smallest body (bytes) auto decodes with orjson
+
+_fast = None # orjson.loads once imported, False if it is not installed (or disabled)
+
+
+class SchemaError(ValueError):
+    """An API response does not have the expected shape -- the message names the field."""
+
+
+def _fast_loads():
+    global _fast
+    if _fast is None:
+        _fast = False
+        if DECODER != "json":
+            try:
+                import orjson # Optional -- imported on the first large body
+                _fast = orjson.loads
+            except ImportError:
+                pass
+    return _fast
+
+
+def loads(data: bytes):
+    """This function will decode a JSON body -- with orjson for large bodies (or every body), when it is installed.
+
+    Args:
+        data (bytes): The body.
+
+    Returns:
+        The decoded value.
+
+    Raises:
+        ValueError: If the body is not valid JSON (json.JSONDecodeError and orjson.JSONDecodeError are ValueErrors).
+    """
+    if DECODER != "json" and (DECODER == "orjson" or len(data) >= FAST_MIN):
+        _loads = _fast_loads()
+        if _loads:
+            return _loads(data)
+    return json.loads(data)
+
+
+class Ref:
+    """A tag ref -- the tag, and the sha and type (commit, or tag for an annotated tag) of the object it points to."""
+    __slots__ = ("tag", "sha", "type")
+
+    def __init__(self, tag: str, sha: str, type: str = "commit"):
+        self.tag = tag
+        self.sha = sha
+        self.type = type
+
+    def __repr__(self) -> str:
+        return f"Ref({self.tag!r}, sha={self.sha!r})"
+
+
+_NAMES = {str: "str", int: "int", bool: "bool", dict: "object", list: "array"}
+
+
+def _field(obj: dict, key: str, kind: type, path: str, optional: bool = False):
+    _value = obj.get(key)
+    if _value is None and optional:
+        return None
+    if type(_value) is not kind: # Exact -- a bool is not an int
+        raise SchemaError(f"{path}.{key}: expected {_NAMES[kind]}, got {'null' if _value is None else type(_value).__name__}")
+    return _value
+
+
+def _object(value, path: str) -> dict:
+    if not isinstance(value, dict):
+        raise SchemaError(f"{path or '.'}: expected object, got {'null' if value is None else type(value).__name__}")
+    return value
+
+
+def release_from_rest(obj: dict, latest_tag: str = None, path: str = "") -> Release:
+    """This function will validate a REST release object, and keep the `get_releases` fields.
+
+    Args:
+        obj (dict): The release object, i.e. ~> an entry of `repos/<repo>/releases`.
+        latest_tag (str): The tag name of the latest release, if any -- REST objects do not carry the flag.
+        path (str): Where the object is in the response, for the error message.
+
+    Returns:
+        Release: The release (commitSha is None, REST does not peel the tag).
+
+    Raises:
+        SchemaError: If a field is missing or has the wrong type.
+    """
+    _object(obj, path)
+    _tag = _field(obj, "tag_name", str, path)
+    _draft = _field(obj, "draft", bool, path)
+    _prerelease = _field(obj, "prerelease", bool, path)
+    return Release(
+        tagName=_tag,
+        name=_field(obj, "name", str, path, optional=True),
+        isDraft=_draft,
+        isPrerelease=_prerelease,
+        isLatest=bool(latest_tag) and _tag == latest_tag and not _draft and not _prerelease,
+        createdAt=_field(obj, "created_at", str, path, optional=True),
+        publishedAt=_field(obj, "published_at", str, path, optional=True),
+        id=_field(obj, "node_id", str, path), # The same id `gh release view --json id` returns
+        databaseId=_field(obj, "id", int, path), # The numeric id the REST API uses for edits
+    )
+
+
+def release_from_node(obj: dict, path: str = "") -> Release:
+    """This function will validate a GraphQL release node (see `common.RELEASE_STATE_QUERY`).
+
+    Args:
+        obj (dict): The release node.
+        path (str): Where the node is in the response, for the error message.
+
+    Returns:
+        Release: The release -- commitSha is None for a draft without a tag yet.
+
+    Raises:
+        SchemaError: If a field is missing or has the wrong type.
+    """
+    _object(obj, path)
+    _commit = _field(obj, "tagCommit", dict, path, optional=True)
+    return Release(
+        tagName=_field(obj, "tagName", str, path),
+        name=_field(obj, "name", str, path, optional=True),
+        isDraft=_field(obj, "isDraft", bool, path),
+        isPrerelease=_field(obj, "isPrerelease", bool, path),
+        isLatest=_field(obj, "isLatest", bool, path),
+        createdAt=_field(obj, "createdAt", str, path, optional=True),
+        publishedAt=_field(obj, "publishedAt", str, path, optional=True),
+        id=_field(obj, "id", str, path),
+        databaseId=_field(obj, "databaseId", int, path),
+        commitSha=_field(_commit, "oid", str, f"{path}.tagCommit") if _commit else None,
+    )
+
+
+def decode_releases(data: bytes, latest_tag: str = None) -> list[Release]:
+    """This function will decode a page of `repos/<repo>/releases`.
+
+    Args:
+        data (bytes): The response body.
+        latest_tag (str): The tag name of the latest release, if any.
+
+    Returns:
+        list[Release]: The releases of the page, in order.
+
+    Raises:
+        SchemaError: If the page is not a list of release objects.
+    """
+    _page = loads(data)
+    if not isinstance(_page, list):
+        raise SchemaError(f".: expected array, got {type(_page).__name__}")
+    return [release_from_rest(i, latest_tag=latest_tag, path=f"[{n}]") for n, i in enumerate(_page)]
+
+
+def decode_release(data: bytes, latest_tag: str = None) -> Release:
+    """This function will decode a release view -- `releases/tags/<tag>`, `releases/latest` or `releases/<id>`.
+
+    Args:
+        data (bytes): The response body.
+        latest_tag (str): The tag name of the latest release, if any -- pass the release's own tag for `releases/latest`.
+
+    Returns:
+        Release: The release.
+
+    Raises:
+        SchemaError: If the body is not a release object.
+    """
+    return release_from_rest(loads(data), latest_tag=latest_tag)
+
+
+def decode_ref(data: bytes) -> Ref:
+    """This function will decode a tag ref -- `git/refs/tags/<tag>`.
+
+    Args:
+        data (bytes): The response body.
+
+    Returns:
+        Ref: The tag and the object it points to.
+
+    Raises:
+        SchemaError: If the body is not a ref object (a list means the tag only matched as a prefix).
+    """
+    _ref = _object(loads(data), "")
+    _target = _object(_ref.get("object"), ".object")
+    return Ref(
+        tag=_field(_ref, "ref", str, "").removeprefix("refs/tags/"),
+        sha=_field(_target, "sha", str, ".object"),
+        type=_field(_target, "type", str, ".object", optional=True) or "commit",
+    )
+
+
+def decode_tag(data: bytes) -> Ref:
+    """This function will decode an annotated tag object -- `git/tags/<sha>`, what a ref of type tag points to.
+
+    Args:
+        data (bytes): The response body.
+
+    Returns:
+        Ref: The tag and the object it is tagging -- a commit, or (rarely) another tag.
+
+    Raises:
+        SchemaError: If the body is not a tag object.
+    """
+    _tag = _object(loads(data), "")
+    _target = _object(_tag.get("object"), ".object")
+    return Ref(
+        tag=_field(_tag, "tag", str, ""),
+        sha=_field(_target, "sha", str, ".object"),
+        type=_field(_target, "type", str, ".object"),
+    )
@@ -0,0 +1,282 @@
+"""This is the tracing module for the release scripts -- @manscaped-dev/<repo>
+
+Nested timing spans around the API calls (list, view, refs, edit), argument parsing and validation.
+Tracing is off unless SRE_TRACE is set -- `span()` then returns a shared no-op, so the scripts pay one flag check per span.
+
+    - SRE_TRACE=trace.json: The spans, as OTLP/JSON (resourceSpans) -- any OpenTelemetry collector or viewer can load it.
+      The per-operation latency histograms are written next to it, as OTLP/JSON metrics (trace.metrics.json).
+    - GITHUB_STEP_SUMMARY: When set (GitHub Actions), a per-operation latency table is appended to the job summary.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import json
+import time
+import atexit
+import functools
+import threading
+
+TRACE_FILE = os.environ.get("SRE_TRACE") or None # Where the spans are written, tracing is disabled when unset
+SERVICE = os.environ.get("SRE_TRACE_SERVICE", "sre-release") # The OTLP service.name
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000) # Histogram bounds, the last bucket is +inf
+
+_enabled = TRACE_FILE is not None
+_trace_id = os.urandom(16).hex() # One trace per process
+_spans = [] # Finished spans, in the order they ended
+_spans_lock = threading.Lock()
+_local = threading.local() # The open spans of the thread, innermost last
+
+
+class _NoopSpan:
+    """The span handed out while tracing is disabled -- every method does nothing."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, key: str, value) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """A timed operation -- nested under the span that is open on the same thread."""
+    __slots__ = ("name", "span_id", "parent_id", "attributes", "start", "end", "error")
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = None
+        self.attributes = attributes
+        self.start = 0
+        self.end = 0
+        self.error = None
+
+    def __enter__(self):
+        _stack = getattr(_local, "stack", None)
+        if _stack is None:
+            _stack = _local.stack = []
+        self.parent_id = _stack[-1].span_id if _stack else None
+        _stack.append(self)
+        self.start = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.time_ns()
+        _local.stack.pop()
+        if exc_type is not None:
+            self.error = f"{exc_type.__name__}: {exc}"
+        with _spans_lock:
+            _spans.append(self)
+        return False
+
+    def set(self, key: str, value) -> None:
+        """This function will set an attribute on the span, i.e. ~> the HTTP status."""
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) / 1e6
+
+
+def enabled() -> bool:
+    """This function will return True if tracing is enabled."""
+    return _enabled
+
+
+def span(name: str, **attributes):
+    """This function will open a span -- use it as a context manager.
+
+    Args:
+        name (str): The operation, i.e. ~> releases.list. Spans with the same name share a latency histogram.
+        **attributes: The span attributes, i.e. ~> repo="manscaped-dev/<repo>".
+
+    Returns:
+        Span: The span, or a shared no-op when tracing is disabled.
+    """
+    if not _enabled:
+        return _NOOP
+    return Span(name, attributes)
+
+
+def traced(name: str):
+    """This function will wrap a function in a span -- the decorator form of `span()`.
+
+    Args:
+        name (str): The operation, i.e. ~> releases.edit.
+    """
+    def _decorator(func):
+        @functools.wraps(func)
+        def _wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(name, {}):
+                return func(*args, **kwargs)
+        return _wrapper
+    return _decorator
+
+
+def annotate(key: str, value) -> None:
+    """This function will set an attribute on the innermost open span of the thread, i.e. ~> from inside a traced function.
+
+    Args:
+        key (str): The attribute, i.e. ~> repo.
+        value: The value -- str, int, float or bool.
+    """
+    if not _enabled:
+        return
+    _stack = getattr(_local, "stack", None)
+    if _stack:
+        _stack[-1].attributes[key] = value
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict) -> list[dict]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None]
+
+
+def _resource() -> dict:
+    return {"attributes": _otlp_attributes({"service.name": SERVICE, "process.pid": os.getpid(), "github.run_id": os.environ.get("GITHUB_RUN_ID")})}
+
+
+def histograms() -> dict:
+    """This function will return the latency histogram of every operation.
+
+    Returns:
+        dict: operation --> count, sum, min, max, p50, p95 (milliseconds) and bucketCounts (per BUCKETS_MS bound, then +inf).
+    """
+    with _spans_lock:
+        _durations = {}
+        for s in _spans:
+            _durations.setdefault(s.name, []).append(s.duration_ms)
+
+    _histograms = {}
+    for _name, _values in _durations.items():
+        _values.sort()
+        _counts = [0] * (len(BUCKETS_MS) + 1)
+        for v in _values:
+            _counts[next((i for i, b in enumerate(BUCKETS_MS) if v <= b), len(BUCKETS_MS))] += 1
+        _histograms[_name] = {
+            "count": len(_values),
+            "sum": sum(_values),
+            "min": _values[0],
+            "max": _values[-1],
+            "p50": _values[int(0.50 * (len(_values) - 1))],
+            "p95": _values[int(0.95 * (len(_values) - 1))],
+            "bucketCounts": _counts,
+        }
+
+    return _histograms
+
+
+def export(path: str = None) -> None:
+    """This function will write the spans (OTLP/JSON traces) and the histograms (OTLP/JSON metrics, <path>.metrics.json).
+
+    Args:
+        path (str): The trace file, defaults to SRE_TRACE.
+    """
+    _path = path or TRACE_FILE
+    if not _path:
+        return
+
+    with _spans_lock:
+        _otlp_spans = [
+            {
+                "traceId": _trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent_id or "",
+                "name": s.name,
+                "kind": 1, # SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(s.start),
+                "endTimeUnixNano": str(s.end),
+                "attributes": _otlp_attributes(s.attributes),
+                "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+            }
+            for s in _spans
+        ]
+        _start = min((s.start for s in _spans), default=0)
+
+    _now = str(time.time_ns())
+    _metrics = [
+        {
+            "name": "sre.operation.duration",
+            "unit": "ms",
+            "histogram": {
+                "aggregationTemporality": 2, # CUMULATIVE
+                "dataPoints": [
+                    {
+                        "attributes": _otlp_attributes({"operation": k}),
+                        "startTimeUnixNano": str(_start),
+                        "timeUnixNano": _now,
+                        "count": str(v["count"]),
+                        "sum": v["sum"],
+                        "min": v["min"],
+                        "max": v["max"],
+                        "bucketCounts": [str(i) for i in v["bucketCounts"]],
+                        "explicitBounds": list(BUCKETS_MS),
+                    }
+                    for k, v in histograms().items()
+                ],
+            },
+        }
+    ]
+
+    _scope = {"name": SERVICE}
+    _root, _ext = os.path.splitext(_path)
+    try:
+        with open(_path, "w", encoding="utf-8") as f:
+            json.dump({"resourceSpans": [{"resource": _resource(), "scopeSpans": [{"scope": _scope, "spans": _otlp_spans}]}]}, f)
+        with open(f"{_root}.metrics{_ext or '.json'}", "w", encoding="utf-8") as f:
+            json.dump({"resourceMetrics": [{"resource": _resource(), "scopeMetrics": [{"scope": _scope, "metrics": _metrics}]}]}, f)
+    except OSError as e:
+        print(f"[WARNING] - Unable to write the trace {_path}: {e}")
+
+
+def step_summary(path: str = None) -> None:
+    """This function will append the per-operation latencies to the GitHub Actions job summary.
+
+    Args:
+        path (str): The summary file, defaults to GITHUB_STEP_SUMMARY.
+    """
+    _path = path or os.environ.get("GITHUB_STEP_SUMMARY")
+    _histograms = histograms()
+    if not _path or not _histograms:
+        return
+
+    _lines = [
+        f"### {SERVICE} timings",
+        "",
+        "| Operation | Calls | Total (ms) | p50 (ms) | p95 (ms) | Max (ms) |",
+        "| --- | ---: | ---: | ---: | ---: | ---: |",
+    ]
+    for k, v in sorted(_histograms.items(), key=lambda i: -i[1]["sum"]): # Where the wall time goes, first
+        _lines.append(f"| {k} | {v['count']} | {v['sum']:.1f} | {v['p50']:.1f} | {v['p95']:.1f} | {v['max']:.1f} |")
+
+    try:
+        with open(_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(_lines) + "\n\n")
+    except OSError as e:
+        print(f"[WARNING] - Unable to write the step summary {_path}: {e}")
+
+
+def _flush() -> None:
+    if _enabled and _spans:
+        export()
+        step_summary()
+
+
+atexit.register(_flush)
@@ -0,0 +1,408 @@
+"""This is the GitHub API transport module for the release scripts -- @manscaped-dev/<repo>
+
+Two backends are available:
+    - http: An in-process HTTP client that reuses one keep-alive connection pool for the whole run.
+    - gh: The `gh api` CLI, one subprocess per call (the fallback when no token is available).
+
+Set SRE_TRANSPORT=http|gh to force a backend, and GITHUB_API_URL to point the scripts at a stand-in API server.
+Set SRE_RECORD=cassette.json to record the run for replay (replay.py).
+
+Every call goes through the `Scheduler`, which wraps the backend:
+    - Reads the x-ratelimit-* and retry-after headers, and holds every call until the quota resets once it runs out.
+    - Adapts the number of calls in flight (AIMD) -- halved on a rate limit, grown back one step per window of successes.
+    - Retries rate limits (403/429), 5xx and connection errors with jittered exponential backoff.
+      A call that is not idempotent (`idempotent=False`, i.e. ~> a workflow_dispatch) is only retried on a rate limit --
+      GitHub rejected it without running it. A 5xx or a connection error may come after the call ran, so it is never sent twice.
+    - Counts requests, retries, rate limits and waits -- `get_transport().metrics()`.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import json
+import time
+import queue
+import random
+import atexit
+import threading
+import subprocess
+import http.client
+
+from urllib.parse import urlsplit
+
+from debug import ic
+from schema import loads
+from tracing import span, annotate
+
+API_URL = os.environ.get("GITHUB_API_URL", "https://api.github.com") # Set by GitHub Actions, override for a stand-in server
+POOL_SIZE = int(os.environ.get("SRE_HTTP_POOL_SIZE", "8")) # Max idle keep-alive connections kept in the pool
+TIMEOUT = float(os.environ.get("SRE_HTTP_TIMEOUT", "30")) # Seconds per request
+CONCURRENCY = int(os.environ.get("SRE_API_CONCURRENCY", "8")) # Max API calls in flight, the scheduler adapts below it
+RETRIES = int(os.environ.get("SRE_API_RETRIES", "5")) # Retries per call on rate limits, 5xx and connection errors
+BACKOFF = float(os.environ.get("SRE_API_BACKOFF", "1")) # Seconds, the base of the exponential backoff
+BACKOFF_MAX = float(os.environ.get("SRE_API_BACKOFF_MAX", "60")) # Seconds, the cap of a single backoff
+MAX_WAIT = float(os.environ.get("SRE_API_MAX_WAIT", "900")) # Seconds we are willing to wait for the quota to reset
+
+_transport = None # The transport shared by every helper in this run
+_transport_lock = threading.Lock()
+
+
+class Response:
+    """The response of a GitHub API call -- status code, lower-cased headers and the raw body."""
+    __slots__ = ("status", "headers", "body")
+
+    def __init__(self, status: int, headers: dict, body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        """This function will return the decoded JSON body, or None if the body is empty."""
+        return loads(self.body) if self.body else None # From the bytes -- see schema.py for the decoder
+
+
+class Transport:
+    """The base transport -- every backend implements `request`."""
+    name = "base"
+
+    def request(self, method: str, path: str, body: dict = None, headers: dict = None, idempotent: bool = True) -> Response:
+        """This function will run an API call against the GitHub REST API.
+
+        Args:
+            method (str): The HTTP method, i.e. ~> GET, PATCH.
+            path (str): The API path, i.e. ~> repos/manscaped-dev/<repo>/releases.
+            body (dict): The JSON body to send, if any.
+            headers (dict): Extra request headers, i.e. ~> If-None-Match.
+            idempotent (bool): False if running the call twice does something twice -- it is then never resent once sent.
+
+        Returns:
+            Response: The API response.
+        """
+        raise NotImplementedError
+
+    def graphql(self, query: str, variables: dict = None) -> dict:
+        """This function will run a GraphQL query against the GitHub GraphQL API.
+
+        Args:
+            query (str): The GraphQL query.
+            variables (dict): The query variables.
+
+        Returns:
+            dict: The `data` of the response, or None if the query failed.
+        """
+        r = self.request("POST", "graphql", body={"query": query, "variables": variables or {}})
+        _data = r.json() if r.body else {}
+
+        if r.status != 200 or _data.get("errors"):
+            print(f"[ERROR] - The GraphQL query failed (HTTP {r.status}): {_data.get('errors') or r.body}")
+            return None
+
+        return _data.get("data")
+
+    def close(self) -> None:
+        """This function will release any resources held by the transport."""
+
+
+class GhTransport(Transport):
+    """The `gh api` backend -- one subprocess (TLS handshake and auth lookup) per call."""
+    name = "gh"
+
+    def request(self, method: str, path: str, body: dict = None, headers: dict = None, idempotent: bool = True) -> Response:
+        _cmd = ["gh", "api", "--include", "-X", method, path.lstrip("/")]
+        for _key, _value in (headers or {}).items():
+            _cmd.extend(["-H", f"{_key}: {_value}"])
+
+        _input = None
+        if body is not None:
+            _cmd.extend(["--input", "-"])
+            _input = json.dumps(body).encode("utf-8")
+
+        r = subprocess.run(_cmd, input=_input, capture_output=True) # gh exits non-zero on >= 300, so we read the status line instead
+        _out = r.stdout.replace(b"\r\n", b"\n")
+        _head, _, _body = _out.partition(b"\n\n")
+        _lines = _head.decode("utf-8", errors="replace").splitlines() # Status line, then the response headers
+
+        try:
+            _status = int(_lines[0].split()[1])
+        except (IndexError, ValueError):
+            print(f"[ERROR] - gh api {method} {path} failed: {r.stderr.decode('utf-8', errors='replace')}")
+            return Response(0, {}, b"")
+
+        _headers = {}
+        for _line in _lines[1:]:
+            _key, _, _value = _line.partition(":")
+            _headers[_key.strip().lower()] = _value.strip()
+
+        return Response(_status, _headers, _body)
+
+
+class HttpTransport(Transport):
+    """The in-process HTTP backend -- keep-alive connections are pooled and reused for the whole run."""
+    name = "http"
+
+    def __init__(self, token: str, api_url: str = None, pool_size: int = POOL_SIZE):
+        _url = urlsplit(api_url or API_URL)
+        self._scheme = _url.scheme
+        self._host = _url.hostname
+        self._port = _url.port
+        self._prefix = _url.path.rstrip("/") # GHES serves the API under /api/v3
+        self._pool = queue.LifoQueue(maxsize=pool_size) # LIFO keeps the warmest connection in use
+        self._headers = {
+            "Accept": "application/vnd.github+json",
+            "Authorization": f"Bearer {token}",
+            "User-Agent": "mnscpd-sre-release-scripts",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._scheme == "http":
+            return http.client.HTTPConnection(self._host, self._port, timeout=TIMEOUT)
+        return http.client.HTTPSConnection(self._host, self._port, timeout=TIMEOUT)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(self, method: str, path: str, body: dict = None, headers: dict = None, idempotent: bool = True) -> Response:
+        _path = path if path.startswith("/") else f"/{path}"
+        _prefix = self._prefix
+        if _path == "/graphql" and _prefix.endswith("/v3"):
+            _prefix = _prefix[:-3] # GHES serves GraphQL at /api/graphql, next to /api/v3
+        _headers = dict(self._headers, **(headers or {}))
+        _payload = None
+        if body is not None:
+            _payload = json.dumps(body).encode("utf-8")
+            _headers["Content-Type"] = "application/json"
+
+        for _attempt in range(2):
+            # A pooled connection may have been closed by the server while idle -- a call that must not be resent gets a fresh one
+            conn = self._acquire() if idempotent else self._connect()
+            try:
+                conn.request(method, f"{_prefix}{_path}", body=_payload, headers=_headers)
+                resp = conn.getresponse()
+                _body = resp.read()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                if _attempt == 0 and idempotent:
+                    ic(f"HttpTransport.request() - Stale keep-alive connection, reconnecting: {e}")
+                    continue # The server closed an idle connection, retry once on a fresh one
+                raise
+
+            _resp_headers = {k.lower(): v for k, v in resp.getheaders()}
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+
+            return Response(resp.status, _resp_headers, _body)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class Scheduler(Transport):
+    """Wraps a backend -- every API call of the run is admitted, retried and measured here.
+
+    Reads, GraphQL queries and PATCHes that set fields are idempotent, so retrying them is safe. A call made with
+    `idempotent=False` (a workflow_dispatch starts a run every time it is sent) is only retried on a rate limit.
+    """
+
+    def __init__(self, transport: Transport, concurrency: int = CONCURRENCY, retries: int = RETRIES):
+        self.transport = transport
+        self.name = transport.name
+        self.retries = max(0, retries)
+        self._max_limit = max(1, concurrency)
+        self._limit = float(self._max_limit) # Fractional, so a success grows it by 1/limit (one step per window)
+        self._in_flight = 0
+        self._paused_until = 0.0 # time.monotonic() -- every call waits for a rate limit reset or a retry-after
+        self._cond = threading.Condition()
+        self._metrics = {
+            "requests": 0, # Attempts sent to the backend, retries included
+            "retries": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "connection_errors": 0,
+            "waited": 0.0, # Seconds spent held back (quota resets, retry-after, backoff), summed over threads
+            "latency": 0.0, # Seconds spent in the backend
+            "remaining": {}, # Rate limit resource --> the last x-ratelimit-remaining seen
+        }
+
+    def _acquire(self) -> None:
+        with self._cond:
+            _start = time.monotonic()
+            while True:
+                _pause = self._paused_until - time.monotonic()
+                if _pause <= 0 and self._in_flight < int(self._limit):
+                    break
+                self._cond.wait(timeout=_pause if _pause > 0 else None)
+
+            self._in_flight += 1
+            self._metrics["waited"] += time.monotonic() - _start
+
+    def _release(self, latency: float) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._metrics["requests"] += 1
+            self._metrics["latency"] += latency
+            self._cond.notify_all()
+
+    def _count(self, key: str, value: float = 1) -> None:
+        with self._cond:
+            self._metrics[key] += value
+
+    def _pause(self, seconds: float) -> None:
+        # Hold every call, not just the one that was limited -- GitHub asks clients to stop until the reset
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF * (2 ** attempt))) # Full jitter
+
+    def _rate_limit_wait(self, r: Response, attempt: int) -> float:
+        """This function will return how long to wait when the response is a rate limit, None if it is not one."""
+        _remaining = r.headers.get("x-ratelimit-remaining")
+        _limited = r.status == 429 or (r.status == 403 and (_remaining == "0" or b"rate limit" in r.body.lower()))
+        if r.status == 200 and b'"RATE_LIMITED"' in r.body[:4096]: # GraphQL reports its limit in the errors
+            _limited = True
+        if not _limited:
+            return None
+
+        if r.headers.get("retry-after", "").isdigit():
+            return float(r.headers["retry-after"]) # Secondary rate limit
+        if _remaining == "0" and r.headers.get("x-ratelimit-reset", "").isdigit():
+            return max(0.0, int(r.headers["x-ratelimit-reset"]) - time.time()) + 1 # Primary rate limit, wait for the reset
+        return max(1.0, self._backoff(attempt))
+
+    def _observe(self, r: Response, attempt: int, idempotent: bool = True) -> float:
+        """This function will update the quota, the concurrency and the metrics -- returns the delay before a retry, or None."""
+        _resource = r.headers.get("x-ratelimit-resource", "core")
+        if r.headers.get("x-ratelimit-remaining", "").isdigit():
+            _remaining = int(r.headers["x-ratelimit-remaining"])
+            with self._cond:
+                self._metrics["remaining"][_resource] = _remaining
+            if _remaining == 0 and r.headers.get("x-ratelimit-reset", "").isdigit():
+                _wait = int(r.headers["x-ratelimit-reset"]) - time.time() + 1
+                if 0 < _wait <= MAX_WAIT:
+                    ic(f"Scheduler - The {_resource} quota is exhausted, holding calls for {_wait:.0f}s.")
+                    self._pause(_wait)
+
+        _wait = self._rate_limit_wait(r, attempt)
+        if _wait is not None:
+            with self._cond:
+                self._metrics["rate_limited"] += 1
+                self._limit = max(1.0, self._limit / 2) # Multiplicative decrease
+            if _wait > MAX_WAIT:
+                print(f"[WARNING] - Rate limited for {_wait:.0f}s, more than SRE_API_MAX_WAIT ({MAX_WAIT:.0f}s) - giving up.")
+                return None
+            self._pause(_wait)
+            return 0.0 # The pause holds the retry
+
+        if r.status in (500, 502, 503, 504):
+            self._count("server_errors")
+            return self._backoff(attempt) if idempotent else None # The call may have run before the error
+
+        with self._cond:
+            self._limit = min(float(self._max_limit), self._limit + 1 / self._limit) # Additive increase
+        return None
+
+    def request(self, method: str, path: str, body: dict = None, headers: dict = None, idempotent: bool = True) -> Response:
+        with span(f"api.{method.lower()}", path=path, transport=self.name) as _span:
+            r = self._request(method, path, body=body, headers=headers, idempotent=idempotent)
+            _span.set("http.status", r.status)
+            return r
+
+    def _request(self, method: str, path: str, body: dict = None, headers: dict = None, idempotent: bool = True) -> Response:
+        for _attempt in range(self.retries + 1):
+            self._acquire()
+            _start = time.monotonic()
+            try:
+                r = self.transport.request(method, path, body=body, headers=headers, idempotent=idempotent)
+            except (http.client.HTTPException, OSError) as e:
+                r = None
+                _error = e
+            finally:
+                self._release(time.monotonic() - _start)
+
+            if r is None:
+                self._count("connection_errors")
+                if not idempotent:
+                    raise _error # It may have been sent -- never sent twice
+                _delay = self._backoff(_attempt)
+            else:
+                _delay = self._observe(r, _attempt, idempotent=idempotent)
+                if _delay is None:
+                    return r
+
+            if _attempt == self.retries:
+                break
+
+            self._count("retries")
+            annotate("retries", _attempt + 1)
+            self._count("waited", _delay)
+            ic(f"Scheduler - Retrying {method} {path} in {_delay:.1f}s (attempt {_attempt + 1}/{self.retries}).")
+            time.sleep(_delay)
+
+        if r is None:
+            raise _error
+        return r
+
+    def metrics(self) -> dict:
+        """This function will return the scheduler metrics.
+
+        Returns:
+            dict: requests, retries, rate_limited, server_errors, connection_errors, waited, latency, remaining -- and the current concurrency.
+        """
+        with self._cond:
+            return dict(self._metrics, remaining=dict(self._metrics["remaining"]), concurrency=int(self._limit))
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+def get_token() -> str:
+    """This function will return the GitHub token from the environment -- GH_TOKEN or GITHUB_TOKEN.
+
+    Returns:
+        str: The token, or None if neither is set.
+    """
+    return os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN") or None
+
+
+def get_transport() -> Transport:
+    """This function will return the transport shared by every API call in this run.
+
+    Returns:
+        Transport: The http backend when a token is available (or SRE_TRANSPORT=http), otherwise the gh backend -- behind the Scheduler.
+    """
+    global _transport
+
+    with _transport_lock:
+        if _transport is None:
+            _backend = os.environ.get("SRE_TRANSPORT", "http" if get_token() else "gh")
+            if _backend == "http" and get_token():
+                _transport = HttpTransport(token=get_token())
+            else:
+                if _backend == "http":
+                    print("[WARNING] - SRE_TRANSPORT=http requires GH_TOKEN or GITHUB_TOKEN, falling back to gh.")
+                _transport = GhTransport()
+
+            if os.environ.get("SRE_RECORD"):
+                from replay import Recorder # Only needed while recording a cassette
+                _transport = Recorder(_transport, os.environ["SRE_RECORD"])
+
+            _transport = Scheduler(_transport)
+            atexit.register(lambda t=_transport: ic(f"API metrics: {t.metrics()}")) # The transport of this run, even once it is replaced
+            ic(f"get_transport() - Using the {_transport.name} transport.")
+
+    return _transport
@@ -0,0 +1,145 @@
+"""This is the version module for the release scripts -- @manscaped-dev/<repo>
+
+`Version` is an immutable semantic version (major.minor.patch[-prerelease][+build]) with total ordering.
+`parse_version` is memoized (LRU, PARSE_CACHE_SIZE tags), so a tag is parsed once and returns the same object while it stays cached.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import re
+
+from functools import lru_cache
+
+PARSE_CACHE_SIZE = 8192 # Tags kept memoized -- bounded, so auditing long histories does not grow without limit
+
+# v-prefixed (optional) semantic version, i.e. ~> v2.3.4, 2.3.4-rc.1, 2.3.4+build.5
+_VERSION_RE = re.compile(
+    r"^v?(?P<major>\d+)\.(?P<minor>\d+)\.(?P<patch>\d+)"
+    r"(?:-(?P<prerelease>[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?"
+    r"(?:\+(?P<build>[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?$"
+)
+
+
+def _prerelease_key(prerelease: str) -> tuple:
+    # A release sorts after all of its pre-releases, numeric identifiers sort before alphanumeric ones
+    if not prerelease:
+        return (1,)
+    return (0, tuple((0, int(i), "") if i.isdigit() else (1, 0, i) for i in prerelease.split(".")))
+
+
+class Version:
+    """An immutable semantic version -- compared by precedence, the build metadata is ignored."""
+    __slots__ = ("major", "minor", "patch", "prerelease", "build", "_key")
+
+    def __init__(self, major: int, minor: int, patch: int, prerelease: str = None, build: str = None):
+        _set = object.__setattr__
+        _set(self, "major", int(major))
+        _set(self, "minor", int(minor))
+        _set(self, "patch", int(patch))
+        _set(self, "prerelease", prerelease or None)
+        _set(self, "build", build or None)
+        _set(self, "_key", (self.major, self.minor, self.patch, _prerelease_key(self.prerelease))) # Precomputed sort key
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Version is immutable.")
+
+    @classmethod
+    def parse(cls, tagName: str) -> "Version":
+        """This function will parse a tag name into a version, i.e. ~> v2.3.4 --> Version(2, 3, 4).
+
+        Args:
+            tagName (str): The tag name, with or without the leading 'v'.
+
+        Returns:
+            Version: The version.
+
+        Raises:
+            ValueError: If the tag name is not a semantic version.
+        """
+        _version = parse_version(tagName)
+        if _version is None:
+            raise ValueError(f"The version {tagName} is not a valid semantic version (major.minor.patch).")
+        return _version
+
+    @property
+    def release(self) -> tuple:
+        """The (major, minor, patch) tuple."""
+        return (self.major, self.minor, self.patch)
+
+    def bump(self, previous: "Version") -> str:
+        """This function will classify the bump from the previous version.
+
+        Args:
+            previous (Version): The version bumped from.
+
+        Returns:
+            str: major, minor or patch -- or None if this version is not greater than the previous one.
+        """
+        if self <= previous:
+            return None
+        if self.major != previous.major:
+            return "major"
+        if self.minor != previous.minor:
+            return "minor"
+        return "patch" # Includes a pre-release of the same major.minor.patch moving forward
+
+    def is_reset_bump(self, previous: "Version") -> bool:
+        """This function will check the lower fields were reset by the bump, i.e. ~> 1.2.3 --> 2.0.0 or 1.3.0.
+
+        Args:
+            previous (Version): The version bumped from.
+
+        Returns:
+            bool: True if a major bump resets minor and patch, and a minor bump resets patch.
+        """
+        _bump = self.bump(previous)
+        if _bump == "major":
+            return self.minor == 0 and self.patch == 0
+        if _bump == "minor":
+            return self.patch == 0
+        return _bump == "patch"
+
+    def __eq__(self, other):
+        return self._key == other._key if isinstance(other, Version) else NotImplemented
+
+    def __lt__(self, other):
+        return self._key < other._key if isinstance(other, Version) else NotImplemented
+
+    def __le__(self, other):
+        return self._key <= other._key if isinstance(other, Version) else NotImplemented
+
+    def __gt__(self, other):
+        return self._key > other._key if isinstance(other, Version) else NotImplemented
+
+    def __ge__(self, other):
+        return self._key >= other._key if isinstance(other, Version) else NotImplemented
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __str__(self) -> str:
+        _version = f"{self.major}.{self.minor}.{self.patch}"
+        if self.prerelease:
+            _version += f"-{self.prerelease}"
+        if self.build:
+            _version += f"+{self.build}"
+        return _version
+
+    def __repr__(self) -> str:
+        return f"Version('{self}')"
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_version(tagName: str) -> Version:
+    """This function will parse a tag name into a version -- memoized, so a tag is only parsed once while cached.
+
+    Args:
+        tagName (str): The tag name, with or without the leading 'v', i.e. ~> v2.3.4.
+
+    Returns:
+        Version: The version, or None if the tag is not a semantic version.
+    """
+    _match = _VERSION_RE.match(tagName.strip()) if tagName else None
+    if not _match:
+        return None
+
+    return Version(**_match.groupdict())
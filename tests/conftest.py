@@ -0,0 +1,80 @@
+"""Shared fixtures for the release script tests -- @manscaped-dev/<repo>
+
+The scripts live in .github/workflows/python and import each other by module name, so that directory is put on the path.
+Every test runs against the replay.py stand-in GitHub API (StubGitHub) -- nothing touches GitHub, the runner's release cache,
+or the tags of this checkout.
+
+# Author: @philipdelorenzo-manscaped<phil.delorenzo@manscaped.com>
+"""
+import os
+import sys
+import tempfile
+import subprocess
+
+import pytest
+
+PYTHON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".github", "workflows", "python")
+sys.path.insert(0, PYTHON)
+
+# Read when the modules are imported -- set before any test imports them
+os.environ.update(
+    GITHUB_REPOSITORY="stub/repo",
+    SRE_RELEASE_CACHE_DIR=tempfile.mkdtemp(prefix="sre-releases-"),
+    SRE_LOCAL_REFS="0", # Tests that read local refs enable them on their own checkout
+)
+for _name in ("SRE_TRACE", "SRE_RECORD", "SRE_PROFILE", "GITHUB_EVENT_NAME", "GITHUB_REF"):
+    os.environ.pop(_name, None)
+
+import cache # noqa: E402
+import common # noqa: E402
+import gitrefs # noqa: E402
+import transport # noqa: E402
+
+from replay import StubGitHub, serve # noqa: E402
+
+
+@pytest.fixture
+def stub():
+    """The stand-in GitHub API -- 10 releases (v1.9.0 draft, v1.8.0 pre-release, v1.7.0 latest), served on a free port."""
+    _stub = StubGitHub(10, run_seconds=(0.05, 0.1))
+    _server = serve(_stub)
+    _stub.url = f"http://127.0.0.1:{_server.server_address[1]}"
+    yield _stub
+    _server.shutdown()
+    _server.server_close()
+
+
+@pytest.fixture
+def api(stub, monkeypatch, tmp_path):
+    """The transport shared by the scripts, pointed at the stub -- with an empty release and tag cache."""
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(cache, "_tags", None)
+    monkeypatch.setattr(cache, "_tag_etags", {})
+    monkeypatch.setattr(common, "_checked_tags", set())
+    monkeypatch.setattr(transport, "BACKOFF", 0.01) # Retries are timed by the tests, not by the backoff
+
+    _transport = transport.Scheduler(transport.HttpTransport(token="test", api_url=stub.url))
+    monkeypatch.setattr(transport, "_transport", _transport)
+    yield _transport
+    _transport.close()
+
+
+def git(cwd, *args) -> str:
+    """This function will run git in the checkout, and return its output."""
+    _config = ["-c", "user.name=test", "-c", "user.email=test@example.com", "-c", "commit.gpgSign=false", "-c", "tag.gpgSign=false"]
+    return subprocess.run(["git", *_config, *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def checkout(tmp_path, monkeypatch):
+    """A git checkout with one commit -- gitrefs reads it in place of this repository."""
+    _root = tmp_path / "checkout"
+    _root.mkdir()
+    git(_root, "init", "-q")
+    git(_root, "commit", "-q", "--allow-empty", "-m", "init")
+
+    monkeypatch.setattr(gitrefs, "LOCAL_REFS", True)
+    monkeypatch.setattr(gitrefs, "_packed_refs", {})
+    monkeypatch.setattr(gitrefs, "_pack_indexes", {})
+    monkeypatch.setattr(gitrefs, "find_git_dir", lambda path=None: str(_root / ".git"))
+    return _root
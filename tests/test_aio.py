@@ -0,0 +1,50 @@
+"""Tests for the asyncio API (aio.py) and the commit lookups behind it -- @manscaped-dev/<repo>"""
+import pytest
+
+import aio
+import cache
+import common
+
+from conftest import git
+
+
+@pytest.fixture
+def rest(monkeypatch):
+    """The REST listing -- it does not peel the tags, so the commit lookups fall through to the checkout and the API."""
+    monkeypatch.setattr(common, "RELEASE_QUERY", "rest")
+
+
+def test_preflight_of_another_repo_ignores_the_checkout(api, stub, checkout, rest):
+    git(checkout, "tag", "v1.8.0") # A same-named tag of this checkout, on another commit
+    _local = git(checkout, "rev-parse", "HEAD")
+
+    _release, _id, _sha = aio.run(aio.preflight("release", repo="other/repo"))
+
+    assert (_release.tagName, _id) == ("v1.8.0", "RE_9")
+    assert _sha == stub._sha("v1.8.0") != _local
+    assert cache.lookup_tag("other/repo", "v1.8.0")[1] == stub._sha("v1.8.0") # The API's commit is the one remembered
+
+
+def test_preflight_of_the_checkout_reads_its_tags(api, stub, checkout, rest):
+    git(checkout, "tag", "v1.8.0")
+    _local = git(checkout, "rev-parse", "HEAD")
+
+    assert aio.run(aio.preflight("release", repo="stub/repo"))[2] == _local # GITHUB_REPOSITORY
+
+    git(checkout, "tag", "v1.2.0")
+    stub.calls.clear()
+    assert common.get_release_commit_sha({"tagName": "v1.2.0"}) == _local # The current repository
+    assert stub.calls == {} # No API call for the tag
+
+
+def test_annotated_tag_is_peeled_by_the_api(api, stub, rest):
+    stub.annotated.add("v1.8.0") # The ref points to the tag object
+
+    assert common.get_release_commit_sha({"tagName": "v1.8.0"}, repo="other/repo") == stub._sha("v1.8.0")
+    assert cache.lookup_tag("other/repo", "v1.8.0")[1] == stub._sha("v1.8.0") # The commit is remembered, not the tag object
+
+
+def test_release_error_instead_of_exit(api, stub, capsys):
+    with pytest.raises(aio.ReleaseError):
+        aio.run(aio.get_release_commit_sha({"tagName": ""}))
+    assert "The tag name is empty" in capsys.readouterr().out
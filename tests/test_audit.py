@@ -0,0 +1,42 @@
+"""Tests for the release history audit (audit.py) -- @manscaped-dev/<repo>"""
+import audit
+import transport
+
+
+def _worker_transport(repo: str) -> dict:
+    # Runs in the worker process, in place of audit_repo
+    return {"repo": repo, "inherited": transport._transport is not None}
+
+
+def test_workers_open_their_own_connections(api, monkeypatch):
+    assert api.request("GET", "rate_limit").status == 200 # Warms the pool, like --org does
+    assert api.transport._pool.qsize() == 1
+
+    monkeypatch.setattr(audit, "audit_repo", _worker_transport)
+    _audits = audit.audit_repos(["stub/a", "stub/b", "stub/c"], processes=2)
+
+    assert [i["inherited"] for i in _audits] == [False, False, False]
+
+
+def test_audit_repos_in_processes(api, stub, monkeypatch):
+    monkeypatch.setenv("GH_TOKEN", "test")
+    monkeypatch.setattr(transport, "API_URL", stub.url) # The workers build their transport from the environment
+    assert api.request("GET", "rate_limit").status == 200
+
+    _audits = audit.audit_repos(["stub/a", "stub/b", "stub/c"], processes=2)
+
+    assert [(i["repo"], i["releases"], i["findings"], i["error"]) for i in _audits] == [(r, 10, [], None) for r in ("stub/a", "stub/b", "stub/c")]
+    assert stub.calls == {"GET": 1, "POST": 3} # One listing page per repo, no retried request
+
+
+def test_audit_history_findings():
+    _releases = [{"tagName": t, "isDraft": t == "v2.0.0"} for t in ("v2.0.0", "v1.3.0", "v1.2.0", "v1.3.0", "v1.0.0", "v1.2.0", "nope")]
+
+    assert sorted((i["kind"], i["tag"], i["detail"]) for i in audit.audit_history(_releases)) == [
+        ("duplicate", "v1.2.0", "The version 1.2.0 was already released as v1.2.0."),
+        ("duplicate", "v1.3.0", "The version 1.3.0 was already released as v1.3.0."),
+        ("gap", "v1.2.0", "1.0.0 --> 1.2.0 skips a version."),
+        ("invalid", "nope", "The tag is not a semantic version."),
+        ("non-monotonic", "v1.0.0", "Created after v1.2.0, but 1.0.0 < 1.2.0."),
+        ("non-monotonic", "v1.2.0", "Created after v1.3.0, but 1.2.0 < 1.3.0."),
+    ]
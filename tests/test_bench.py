@@ -0,0 +1,33 @@
+"""Tests for the benchmark gate (bench.py) -- the API calls of every scenario against the committed baseline -- @manscaped-dev/<repo>"""
+import json
+
+import pytest
+
+import bench
+
+
+@pytest.mark.parametrize("query", ["graphql", "rest"])
+def test_api_calls_match_the_baseline(query):
+    with open(bench.BASELINE, "r", encoding="utf-8") as f:
+        _baseline = json.load(f)["suites"][f"http/{query}"]
+
+    _results = bench.run_suite(sizes=(10, 1000), query=query, runs=1)
+    _regressions, _ = bench.check(_results, _baseline)
+
+    assert _regressions == []
+
+
+def test_check_fails_on_calls_and_only_warns_on_time():
+    _baseline = {"sha:release@10": {"median_ms": 100.0, "min_ms": 90.0, "requests": 2, "calls": {"GET": 1, "POST": 1}}}
+
+    _slower = {"sha:release@10": {"median_ms": 400.0, "min_ms": 390.0, "requests": 2, "calls": {"GET": 1, "POST": 1}}}
+    _regressions, _warnings = bench.check(_slower, _baseline)
+    assert (_regressions, len(_warnings)) == ([], 1)
+
+    _regressions, _warnings = bench.check(_slower, _baseline, scale=3.0) # A machine 3x slower than the baseline's
+    assert (_regressions, _warnings) == ([], [])
+
+    _more = {"sha:release@10": {"median_ms": 100.0, "min_ms": 90.0, "requests": 2, "calls": {"GET": 2}}} # A GraphQL query became a REST call
+    _regressions, _warnings = bench.check(_more, _baseline)
+    assert _regressions == ["sha:release@10: 2 GET calls, the baseline is 1."]
+    assert _warnings == []
@@ -0,0 +1,80 @@
+"""Tests for the release-state daemon -- per-request environment and client timeouts (daemon.py) -- @manscaped-dev/<repo>"""
+import os
+import socket
+import tempfile
+
+import pytest
+
+import daemon
+import transport
+
+
+@pytest.fixture
+def ran(monkeypatch):
+    """The commands run by the daemon -- argv, and the environment they saw."""
+    _ran = []
+    monkeypatch.setattr(daemon, "_refresh", lambda state: None)
+    monkeypatch.setattr(daemon, "_run_command", lambda argv: _ran.append((argv, {k: os.environ.get(k) for k in daemon.ENV})) or 0)
+    return _ran
+
+
+def test_request_runs_in_the_client_environment(api, ran, monkeypatch, tmp_path):
+    # The daemon was started by an earlier step -- its GITHUB_OUTPUT is not the one of the calling step
+    monkeypatch.setenv("GITHUB_OUTPUT", str(tmp_path / "start-step"))
+    monkeypatch.setenv("GITHUB_EVENT_NAME", "release")
+    _env = dict(daemon.client_env(), GITHUB_OUTPUT=str(tmp_path / "this-step"), GITHUB_REPOSITORY="stub/other", GITHUB_EVENT_NAME=None)
+
+    _response = daemon.handle({"argv": ["validate-version", "--github-output"], "cwd": str(tmp_path), "env": _env}, daemon._State())
+
+    assert _response["code"] == 0
+    _seen = ran[0][1]
+    assert (_seen["GITHUB_OUTPUT"], _seen["GITHUB_REPOSITORY"], _seen["GITHUB_EVENT_NAME"]) == (str(tmp_path / "this-step"), "stub/other", None)
+    # Restored for the next request
+    assert (os.environ["GITHUB_OUTPUT"], os.environ["GITHUB_REPOSITORY"], os.environ["GITHUB_EVENT_NAME"]) == (str(tmp_path / "start-step"), "stub/repo", "release")
+
+
+def test_pinned_environment_is_refused(ran):
+    _env = dict(daemon.client_env(), GITHUB_WORKSPACE="/somewhere/else")
+
+    _response = daemon.handle({"argv": ["sha", "--release"], "env": _env}, daemon._State())
+
+    assert _response["code"] == 2
+    assert "GITHUB_WORKSPACE" in _response["stderr"]
+    assert not ran
+
+
+def test_another_token_replaces_the_transport(api, ran, monkeypatch):
+    monkeypatch.setenv("GH_TOKEN", "test")
+    _state = daemon._State()
+
+    daemon.handle({"argv": ["sha", "--release"], "env": dict(daemon.client_env(), GH_TOKEN="test")}, _state)
+    assert transport._transport is api # Same token -- the warm transport is kept
+
+    daemon.handle({"argv": ["sha", "--release"], "env": dict(daemon.client_env(), GH_TOKEN="other")}, _state)
+    assert transport._transport is None # Built again with the client's token on the next call
+    assert _state.token == "other"
+
+
+def test_client_times_out_without_running_the_command_again(monkeypatch, capsys):
+    # A wedged daemon -- it accepts the connection, and never answers
+    _path = os.path.join(tempfile.mkdtemp(prefix="sre-"), "d.sock")
+    _server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    _server.bind(_path)
+    _server.listen(1)
+    monkeypatch.setattr(daemon, "SOCKET", _path)
+    monkeypatch.setattr(daemon, "COMMAND_TIMEOUT", 0.2)
+    monkeypatch.setattr(daemon, "_run_command", lambda argv: pytest.fail("The command was run again in-process."))
+
+    try:
+        assert daemon.main(["promote", "--release"]) == 1
+    finally:
+        _server.close()
+
+    assert "did not answer promote --release within 0.2s" in capsys.readouterr().err
+
+
+def test_no_daemon_runs_the_command_in_process(monkeypatch):
+    monkeypatch.setattr(daemon, "SOCKET", os.path.join(tempfile.mkdtemp(prefix="sre-"), "none.sock"))
+    monkeypatch.setattr(daemon, "_run_command", lambda argv: 7)
+
+    assert daemon.main(["sha", "--release"]) == 7
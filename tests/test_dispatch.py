@@ -0,0 +1,146 @@
+"""Tests for the deploy dispatch -- matching runs to dispatches, and tracking them (dispatch.py) -- @manscaped-dev/<repo>"""
+import json
+
+import pytest
+
+import common
+import dispatch
+
+from replay import StubGitHub, serve
+
+
+def _service(name: str, repo: str = "stub/api", workflow: str = "deploy.yml", conclusion: str = "success") -> dict:
+    return {"name": name, "repo": repo, "workflow": workflow, "ref": "main", "inputs": {"service": name, "tag": "{tag}", "conclusion": conclusion}}
+
+
+def _run_inputs(stub: StubGitHub, run_id: int) -> dict:
+    return next(r["inputs"] for r in stub.runs if r["id"] == run_id)
+
+
+@pytest.fixture(params=["graphql", "rest"])
+def tracking(request, monkeypatch):
+    """The runs are tracked with one GraphQL query, or (rest) with the listings."""
+    monkeypatch.setattr(common, "RELEASE_QUERY", request.param)
+    monkeypatch.setattr(dispatch, "RELEASE_QUERY", request.param)
+    return request.param
+
+
+def _dispatch(services: list[dict], **kwargs) -> list[dict]:
+    return dispatch.dispatch_services(services, tag="v1.7.0", **dict({"timeout": 10, "interval": 0.05, "max_interval": 0.2}, **kwargs))
+
+
+def test_services_of_one_workflow_are_matched_in_dispatch_order(api, stub, tracking):
+    # Dispatched within the same second -- the listing cannot tell the runs apart by created_at
+    _services = [_service("api-a", conclusion="failure"), _service("api-b"), _service("api-c")]
+
+    _results = _dispatch(_services)
+
+    assert [i["status"] for i in _results] == ["failed", "success", "success"]
+    assert len({i["run_id"] for i in _results}) == 3
+    for i in _results:
+        assert _run_inputs(stub, i["run_id"]) == {"service": i["name"], "tag": "v1.7.0", "conclusion": i["inputs"]["conclusion"]}
+    assert _results[0]["conclusion"] == "failure"
+    assert _results[0]["error"] == "The run concluded failure."
+
+
+def test_services_of_many_workflows(api, stub, tracking):
+    _services = [_service("api"), _service("web", repo="stub/web"), _service("worker", workflow="worker.yml", conclusion="cancelled")]
+
+    _results = _dispatch(_services)
+
+    assert [(i["name"], i["status"], i["conclusion"]) for i in _results] == [("api", "success", "success"), ("web", "success", "success"), ("worker", "failed", "cancelled")]
+    for i in _results:
+        assert _run_inputs(stub, i["run_id"])["service"] == i["name"]
+        assert i["seconds"]["total"] >= i["seconds"]["dispatch"]
+        assert i["seconds"]["queued"] is not None and i["seconds"]["running"] is not None
+
+
+def test_older_runs_are_not_claimed(api, stub, tracking):
+    _first = _dispatch([_service("api")])
+    _second = _dispatch([_service("api")])
+
+    assert [i["status"] for i in _first + _second] == ["success", "success"]
+    assert _second[0]["run_id"] != _first[0]["run_id"]
+
+
+def test_graphql_tracks_every_run_in_one_query(api, stub, monkeypatch):
+    monkeypatch.setattr(dispatch, "RELEASE_QUERY", "graphql")
+    stub.run_seconds = (0.3, 0.3) # Every run is found before any of them completes
+    _queries = []
+    _graphql = api.graphql
+    monkeypatch.setattr(api, "graphql", lambda query, variables=None: _queries.append(len(variables["ids"])) or _graphql(query, variables))
+
+    _results = _dispatch([_service(f"api-{i}", repo=f"stub/api-{i}") for i in range(4)])
+
+    assert {i["status"] for i in _results} == {"success"}
+    assert max(_queries) == 4 # One query per poll for the runs of every service, not one per run
+
+
+def test_run_that_does_not_complete_times_out(stub, api, tracking):
+    stub.run_seconds = (0.05, 30)
+
+    _results = _dispatch([_service("api")], timeout=0.5)
+
+    assert _results[0]["status"] == "timeout"
+    assert _results[0]["run_id"] is not None
+    assert _results[0]["error"] == "The run did not complete within 0.5s."
+    assert _results[0]["seconds"]["total"] is None
+
+
+def test_run_that_is_never_found_times_out(api, stub, tracking):
+    stub.inject("502", count=1000, path="repos/stub/api/actions/workflows/deploy.yml/runs")
+
+    _results = _dispatch([_service("api"), _service("web", repo="stub/web")], timeout=0.5)
+
+    assert [(i["name"], i["status"]) for i in _results] == [("api", "timeout"), ("web", "success")]
+    assert _results[0]["run_id"] is None
+    assert _results[0]["error"] == "No run of deploy.yml was found within 0.5s."
+
+
+def test_failed_dispatch_is_recorded(api, stub, tracking):
+    stub.inject("502", count=1000, path="repos/stub/web/actions/workflows/deploy.yml/dispatches")
+
+    _results = _dispatch([_service("api"), _service("web", repo="stub/web")])
+
+    assert [(i["name"], i["status"]) for i in _results] == [("api", "success"), ("web", "failed")]
+    assert _results[1]["error"].startswith("Unable to dispatch deploy.yml (HTTP 502)")
+    assert len(stub.runs) == 1
+
+
+def test_dispatch_is_not_resent_after_it_was_accepted(api, stub, tracking):
+    # GitHub started the run, then the gateway answered 502 -- resending would deploy the service twice
+    stub.inject("502-accepted", path="repos/stub/api/actions/workflows/deploy.yml/dispatches")
+
+    _results = _dispatch([_service("api")], timeout=0.5)
+
+    assert len(stub.runs) == 1
+    assert _results[0]["status"] == "failed"
+    assert _results[0]["error"].startswith("Unable to dispatch deploy.yml (HTTP 502)")
+    assert _results[0]["run_id"] is None
+    assert api.metrics()["retries"] == 0
+
+
+def test_rate_limited_dispatch_is_retried(api, stub, tracking):
+    # A rate limit is answered before the dispatch runs, so it is safe to send again
+    stub.inject("429", path="repos/stub/api/actions/workflows/deploy.yml/dispatches", seconds=0)
+
+    _results = _dispatch([_service("api")])
+
+    assert _results[0]["status"] == "success"
+    assert len(stub.runs) == 1
+    assert api.metrics()["retries"] == 1
+
+
+def test_load_services(tmp_path, monkeypatch):
+    monkeypatch.setattr(dispatch, "WORKFLOW", "deploy.yml")
+    _path = tmp_path / "services.json"
+    _path.write_text(json.dumps(["stub/api", {"repo": "stub/web", "name": "web", "workflow": "web.yml", "ref": "release", "inputs": {"tag": "{tag}", "replicas": 2}}]))
+
+    assert dispatch.load_services(str(_path)) == [
+        {"name": "stub/api", "repo": "stub/api", "workflow": "deploy.yml", "ref": "main", "inputs": {}},
+        {"name": "web", "repo": "stub/web", "workflow": "web.yml", "ref": "release", "inputs": {"tag": "{tag}", "replicas": "2"}},
+    ]
+
+    _path.write_text(json.dumps([{"name": "no-repo"}]))
+    with pytest.raises(SystemExit):
+        dispatch.load_services(str(_path))
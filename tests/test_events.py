@@ -0,0 +1,59 @@
+"""Tests for applying the release event of the run to the cached snapshot (events.py, common.get_releases) -- @manscaped-dev/<repo>"""
+import json
+import time
+
+import pytest
+
+import cache
+import common
+import events
+
+
+@pytest.fixture
+def edited(stub, monkeypatch, tmp_path):
+    """A `release` run -- the draft's notes were edited (the latest release cannot have moved)."""
+    _release = dict(stub.releases[0], name="v1.9.0 (edited)")
+    _path = tmp_path / "event.json"
+    _path.write_text(json.dumps({"action": "edited", "release": _release, "repository": {"full_name": "stub/repo"}}))
+    monkeypatch.setenv("GITHUB_EVENT_NAME", "release")
+    monkeypatch.setenv("GITHUB_EVENT_PATH", str(_path))
+    monkeypatch.setattr(events, "_events", {})
+    return _release
+
+
+def _age_snapshot(seconds: float) -> None:
+    _path = cache._snapshot_path("stub/repo")
+    with open(_path, "r", encoding="utf-8") as f:
+        _snapshot = json.load(f)
+    _snapshot["fetchedAt"] = time.time() - seconds
+    with open(_path, "w", encoding="utf-8") as f:
+        json.dump(_snapshot, f)
+
+
+def _draft_name() -> str:
+    return next(i["name"] for i in cache.load_snapshot("stub/repo")["releases"] if i.get("isDraft"))
+
+
+def test_event_is_applied_to_a_fresh_snapshot(api, stub, monkeypatch, edited):
+    monkeypatch.delenv("GITHUB_EVENT_NAME")
+    common.get_releases() # The snapshot, before the run's event
+    monkeypatch.setenv("GITHUB_EVENT_NAME", "release")
+    stub.calls.clear()
+
+    common.get_releases()
+
+    assert stub.calls == {} # The delta, no listing
+    assert _draft_name() == "v1.9.0 (edited)"
+
+
+def test_event_does_not_make_an_old_snapshot_fresh(api, stub, monkeypatch, edited):
+    monkeypatch.delenv("GITHUB_EVENT_NAME")
+    common.get_release_snapshot(revalidate=True) # A snapshot with an ETag
+    _age_snapshot(cache.CACHE_TTL + 60) # Expired, but young enough for the delta (EVENT_MAX_AGE)
+    monkeypatch.setenv("GITHUB_EVENT_NAME", "release")
+    stub.calls.clear()
+
+    assert any(i["name"] == "v1.9.0 (edited)" for i in common.get_releases())
+    assert stub.calls == {"GET": 1} # The snapshot is still revalidated -- one conditional request, a 304
+    assert _draft_name() == "v1.9.0 (edited)"
+
@@ -0,0 +1,61 @@
+"""Tests for the local tag resolution (gitrefs.py) -- @manscaped-dev/<repo>"""
+import os
+
+import gitrefs
+
+from conftest import git
+
+
+def _object_path(checkout, sha: str) -> str:
+    return os.path.join(checkout, ".git", "objects", sha[:2], sha[2:])
+
+
+def test_packed_refs(checkout):
+    _commit = git(checkout, "rev-parse", "HEAD")
+    git(checkout, "tag", "v1.0.0")
+    git(checkout, "tag", "-a", "v1.1.0", "-m", "v1.1.0")
+    git(checkout, "pack-refs", "--all") # "# pack-refs with: peeled fully-peeled sorted"
+
+    assert gitrefs.resolve_tag("v1.0.0") == _commit
+    assert gitrefs.resolve_tag("v1.1.0") == _commit # From the ^ peel line
+    assert gitrefs.resolve_tag("v9.9.9") is None
+
+
+def test_loose_refs(checkout):
+    _commit = git(checkout, "rev-parse", "HEAD")
+    git(checkout, "tag", "v1.0.0")
+    git(checkout, "tag", "-a", "v1.1.0", "-m", "v1.1.0")
+
+    assert gitrefs.resolve_tag("v1.0.0") == _commit
+    assert gitrefs.resolve_tag("v1.1.0") == _commit # Peeled from the tag object
+
+    os.remove(_object_path(checkout, git(checkout, "rev-parse", "v1.1.0")))
+    assert gitrefs.resolve_tag("v1.1.0") is None # The tag object cannot be read -- the API resolves it
+
+
+def _unpeeled_packed_refs(checkout, refs: dict) -> None:
+    # An older git, or another tool, may write packed-refs without the peeled trait -- and without peel lines
+    with open(os.path.join(checkout, ".git", "packed-refs"), "w", encoding="ascii") as f:
+        f.write("# pack-refs with: sorted \n")
+        f.writelines(f"{sha} refs/tags/{tag}\n" for tag, sha in sorted(refs.items()))
+
+
+def test_unpeeled_packed_refs(checkout):
+    _commit = git(checkout, "rev-parse", "HEAD")
+    git(checkout, "tag", "-a", "v1.1.0", "-m", "v1.1.0")
+    _tag_object = git(checkout, "rev-parse", "v1.1.0")
+    os.remove(os.path.join(checkout, ".git", "refs", "tags", "v1.1.0"))
+    _unpeeled_packed_refs(checkout, {"v1.0.0": _commit, "v1.1.0": _tag_object})
+
+    assert gitrefs.resolve_tag("v1.0.0") == _commit # The object is a commit
+    assert gitrefs.resolve_tag("v1.1.0") == _commit # Peeled from the tag object
+
+
+def test_unpeeled_packed_refs_with_an_unreadable_tag_object(checkout):
+    git(checkout, "tag", "-a", "v1.1.0", "-m", "v1.1.0")
+    _tag_object = git(checkout, "rev-parse", "v1.1.0")
+    os.remove(os.path.join(checkout, ".git", "refs", "tags", "v1.1.0"))
+    os.remove(_object_path(checkout, _tag_object)) # i.e. ~> deltified in a pack
+    _unpeeled_packed_refs(checkout, {"v1.1.0": _tag_object})
+
+    assert gitrefs.resolve_tag("v1.1.0") is None # Not the tag object's sha -- the API resolves it
@@ -0,0 +1,32 @@
+"""Tests for the profile breakdown (profiling.py) -- @manscaped-dev/<repo>"""
+import json
+import cProfile
+import pstats
+
+import pytest
+
+import profiling
+import schema
+
+
+def _profile(monkeypatch, decoder: str) -> dict:
+    monkeypatch.setattr(schema, "DECODER", decoder)
+    monkeypatch.setattr(schema, "_fast", None)
+    _body = json.dumps([{"tagName": f"v1.0.{i}", "name": "x" * 64} for i in range(20000)]).encode()
+    schema.loads(_body) # orjson is imported outside the profile
+
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+    schema.loads(_body)
+    _profiler.disable()
+    return profiling.breakdown(pstats.Stats(_profiler))
+
+
+@pytest.mark.parametrize("decoder", ["json", "orjson"])
+def test_large_listing_decode_is_attributed(monkeypatch, decoder):
+    if decoder == "orjson":
+        pytest.importorskip("orjson")
+
+    _breakdown = _profile(monkeypatch, decoder)
+
+    assert _breakdown["decode"] > _breakdown["python"]
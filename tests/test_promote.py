@@ -0,0 +1,47 @@
+"""Tests for applying a saved promotion plan (promote.py --plan) -- @manscaped-dev/<repo>"""
+import json
+
+import pytest
+
+import promote
+
+
+def _write(tmp_path, content) -> str:
+    _path = tmp_path / "promotion-plan.json"
+    _path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+    return str(_path)
+
+
+def test_saved_plan_is_applied(api, stub, tmp_path):
+    _path = _write(tmp_path, promote.plan_promotion(["release"]))
+    _patches = stub.calls.get("PATCH", 0)
+
+    assert promote.main(["--plan", _path]) == 0
+
+    assert stub.calls["PATCH"] == _patches + 1
+    _released = next(i for i in stub.releases if i["tag_name"] == "v1.8.0")
+    assert _released["prerelease"] is False
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        None, # No file -- i.e. ~> the pre-promotion job had no plan output
+        "",
+        "{not json",
+        "[]",
+        {"repo": "stub/repo", "etag": None},
+        {"repo": "stub/repo", "etag": None, "transitions": []},
+        {"repo": "stub/repo", "etag": None, "transitions": [{"stage": "release", "tagName": "v1.8.0"}]},
+        {"repo": "stub/repo", "etag": None, "transitions": [{"stage": "deploy", "tagName": "v1.8.0", "databaseId": 1, "before": {}, "after": {}}]},
+    ],
+)
+def test_invalid_plan_fails_before_any_call(api, stub, tmp_path, capsys, content):
+    _path = str(tmp_path / "missing.json") if content is None else _write(tmp_path, content)
+
+    with pytest.raises(SystemExit) as e:
+        promote.main(["--plan", _path])
+
+    assert e.value.code == 1
+    assert "[ERROR] - " in capsys.readouterr().out
+    assert stub.calls == {}
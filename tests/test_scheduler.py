@@ -0,0 +1,181 @@
+"""Tests for the API scheduler -- rate limit backoff, adaptive concurrency and metrics (transport.Scheduler) -- @manscaped-dev/<repo>"""
+import time
+import threading
+
+import pytest
+
+import transport
+
+LATEST = "repos/stub/repo/releases/latest"
+DISPATCH = "repos/stub/repo/actions/workflows/deploy.yml/dispatches"
+
+
+class InFlight(transport.Transport):
+    """Wraps a backend, and records the most calls it had in flight at once."""
+
+    def __init__(self, backend: transport.Transport, delay: float = 0.05):
+        self.backend = backend
+        self.name = backend.name
+        self.delay = delay
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def request(self, method: str, path: str, body: dict = None, headers: dict = None, idempotent: bool = True) -> transport.Response:
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        try:
+            time.sleep(self.delay) # Long enough for the calls to overlap when the scheduler lets them
+            return self.backend.request(method, path, body=body, headers=headers, idempotent=idempotent)
+        finally:
+            with self._lock:
+                self.current -= 1
+
+
+def _parallel(func, calls: int) -> list:
+    _results = [None] * calls
+    _threads = [threading.Thread(target=lambda n=n: _results.__setitem__(n, func())) for n in range(calls)]
+    for i in _threads:
+        i.start()
+    for i in _threads:
+        i.join()
+    return _results
+
+
+def test_429_is_retried_and_halves_the_concurrency(api, stub):
+    stub.inject("429", count=2, seconds=0)
+
+    assert api.request("GET", LATEST).status == 200
+
+    _metrics = api.metrics()
+    assert (_metrics["requests"], _metrics["retries"], _metrics["rate_limited"]) == (3, 2, 2)
+    assert _metrics["concurrency"] == 2 # 8 --> 4 --> 2, and one success is not a window yet
+    assert stub.calls == {"GET": 3}
+
+
+def test_retry_after_holds_every_call(api, stub):
+    stub.inject("secondary", path=LATEST, seconds=1)
+    _limited = threading.Thread(target=api.request, args=("GET", LATEST))
+
+    _start = time.monotonic()
+    _limited.start()
+    time.sleep(0.2) # The secondary rate limit is in effect now
+    assert api.request("GET", "rate_limit").status == 200
+    _held = time.monotonic() - _start
+    _limited.join()
+
+    assert _held >= 0.9 # Not only the limited call -- every call waits for the Retry-After
+    _metrics = api.metrics()
+    assert (_metrics["rate_limited"], _metrics["retries"]) == (1, 1)
+    assert _metrics["waited"] >= 0.7
+
+
+def test_primary_rate_limit_waits_for_the_reset(api, stub):
+    stub.inject("primary", seconds=0)
+
+    _start = time.monotonic()
+    assert api.request("GET", LATEST).status == 200
+
+    assert time.monotonic() - _start <= 2.5 # The reset is now -- held for about a second, not the backoff of a retry storm
+    _metrics = api.metrics()
+    assert (_metrics["rate_limited"], _metrics["retries"]) == (1, 1)
+    assert _metrics["remaining"] == {"core": 0}
+
+
+def test_graphql_rate_limit_is_retried(api, stub):
+    stub.inject("graphql", path="graphql")
+
+    _data = api.graphql("query { viewer { login } }")
+
+    assert _data is not None
+    assert api.metrics()["rate_limited"] == 1
+    assert stub.calls == {"POST": 2}
+
+
+def test_server_errors_are_retried_without_shrinking(api, stub):
+    stub.inject("502", count=2)
+
+    assert api.request("GET", LATEST).status == 200
+
+    _metrics = api.metrics()
+    assert (_metrics["server_errors"], _metrics["retries"], _metrics["rate_limited"]) == (2, 2, 0)
+    assert _metrics["concurrency"] == 8
+
+
+def test_non_idempotent_call_is_not_resent_after_a_server_error(api, stub):
+    stub.inject("502-accepted", path=DISPATCH)
+
+    assert api.request("POST", DISPATCH, body={"ref": "main"}, idempotent=False).status == 502
+
+    assert len(stub.runs) == 1 # The call ran once, and was not sent again
+    assert (api.metrics()["server_errors"], api.metrics()["retries"]) == (1, 0)
+
+
+def test_non_idempotent_call_is_not_resent_after_a_connection_error(api, stub):
+    _scheduler = transport.Scheduler(transport.HttpTransport(token="test", api_url="http://127.0.0.1:9")) # Nothing listens there
+
+    with pytest.raises(OSError):
+        _scheduler.request("POST", DISPATCH, body={"ref": "main"}, idempotent=False)
+
+    assert (_scheduler.metrics()["requests"], _scheduler.metrics()["connection_errors"], _scheduler.metrics()["retries"]) == (1, 1, 0)
+
+
+@pytest.mark.parametrize("kind", ["429", "secondary"])
+def test_non_idempotent_call_is_retried_on_a_rate_limit(api, stub, kind):
+    # Rejected before it ran -- safe to send again
+    stub.inject(kind, path=DISPATCH, seconds=0)
+
+    assert api.request("POST", DISPATCH, body={"ref": "main"}, idempotent=False).status == 204
+
+    assert len(stub.runs) == 1
+    assert api.metrics()["retries"] == 1
+
+
+def test_gives_up_after_the_retries(api, stub):
+    _scheduler = transport.Scheduler(api.transport, retries=2)
+    stub.inject("502", count=5)
+
+    assert _scheduler.request("GET", LATEST).status == 502
+    assert (_scheduler.metrics()["requests"], _scheduler.metrics()["retries"]) == (3, 2)
+
+
+def test_gives_up_on_a_wait_over_max_wait(api, stub, monkeypatch, capsys):
+    monkeypatch.setattr(transport, "MAX_WAIT", 5)
+    stub.inject("429", seconds=60)
+
+    assert api.request("GET", LATEST).status == 429
+    assert "giving up" in capsys.readouterr().out
+    assert api.metrics()["retries"] == 0
+
+
+def test_concurrency_shrinks_and_recovers(api, stub):
+    _backend = InFlight(api.transport)
+    _scheduler = transport.Scheduler(_backend, concurrency=8)
+    stub.inject("429", count=2, seconds=0)
+    assert _scheduler.request("GET", LATEST).status == 200
+    assert _scheduler.metrics()["concurrency"] == 2
+
+    _backend.peak = 0
+    assert _parallel(lambda: _scheduler.request("GET", "rate_limit").status, 8) == [200] * 8
+    assert _backend.peak <= 3 # The limit grows by one step per window of successes while the calls run
+
+    for _ in range(40):
+        _scheduler.request("GET", "rate_limit")
+    assert _scheduler.metrics()["concurrency"] == 8 # Back to the maximum, and no further
+
+    _backend.peak = 0
+    assert _parallel(lambda: _scheduler.request("GET", "rate_limit").status, 16) == [200] * 16
+    assert 2 < _backend.peak <= 8
+
+
+@pytest.mark.parametrize("kind", ["429", "secondary", "primary", "502"])
+def test_metrics_count_every_attempt(api, stub, kind):
+    stub.inject(kind, seconds=0)
+
+    assert api.request("GET", LATEST).status == 200
+
+    _metrics = api.metrics()
+    assert _metrics["requests"] == sum(stub.calls.values()) == 2
+    assert _metrics["latency"] > 0
+    assert _metrics["connection_errors"] == 0
@@ -0,0 +1,27 @@
+"""Tests for the cold start of the sre-release subcommands (cli.py) -- @manscaped-dev/<repo>"""
+import os
+import sys
+import subprocess
+
+import pytest
+
+import cli
+
+# Modules that would blow the budget if a subcommand imported them up front
+HEAVY_IMPORTS = ("asyncio", "orjson", "icecream")
+
+
+@pytest.mark.parametrize("command", list(cli.COMMANDS))
+def test_startup_within_budget(command, capsys):
+    _status = cli.check_startup(runs=3, commands=[command])
+    assert _status == 0, capsys.readouterr().out
+
+
+@pytest.mark.parametrize("command", list(cli.COMMANDS))
+def test_startup_imports_stay_lazy(command):
+    # Deterministic, unlike the wall time -- `-X importtime` lists every module the subcommand imported
+    r = subprocess.run([sys.executable, "-X", "importtime", cli.__file__, command, "--help"], capture_output=True, text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"))
+    assert r.returncode == 0, r.stderr
+
+    _imported = {i.rsplit("|", 1)[-1].strip() for i in r.stderr.splitlines() if i.startswith("import time:")}
+    assert not _imported.intersection(HEAVY_IMPORTS)
@@ -0,0 +1,139 @@
+"""Tests for the pooled HTTP transport, the gh fallback and the release listings (transport.py, common.py) -- @manscaped-dev/<repo>"""
+import os
+import threading
+
+import pytest
+
+import common
+import transport
+
+from conftest import PYTHON
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Counts the connections the HTTP transport opens."""
+    _opened = []
+    _connect = transport.HttpTransport._connect
+
+    def _counting(self):
+        _opened.append(1)
+        return _connect(self)
+
+    monkeypatch.setattr(transport.HttpTransport, "_connect", _counting)
+    return _opened
+
+
+def test_http_reuses_one_connection(api, stub, connections):
+    for _ in range(5):
+        assert api.request("GET", "repos/stub/repo/releases/latest").status == 200
+
+    assert len(connections) == 1
+    assert stub.calls == {"GET": 5}
+
+
+def test_http_pool_is_shared_by_threads(api, stub, connections):
+    _statuses = []
+    _threads = [threading.Thread(target=lambda: _statuses.extend(api.request("GET", "rate_limit").status for _ in range(5))) for _ in range(4)]
+    for i in _threads:
+        i.start()
+    for i in _threads:
+        i.join()
+
+    assert _statuses == [200] * 20
+    assert len(connections) <= 4 # One per thread at most -- returned to the pool after every call
+
+
+def test_http_reconnects_once_on_a_stale_connection(api, stub, connections):
+    assert api.request("GET", "rate_limit").status == 200
+    api.transport._pool.queue[0].sock.close() # The server dropped the idle keep-alive connection
+
+    assert api.request("GET", "rate_limit").status == 200
+    assert len(connections) == 2
+    assert api.metrics()["connection_errors"] == 0
+
+
+@pytest.mark.parametrize("query, calls", [("graphql", {"POST": 4}), ("rest", {"GET": 5})])
+def test_full_listing_pages(api, stub, monkeypatch, query, calls):
+    monkeypatch.setattr(common, "RELEASE_QUERY", query)
+
+    _tags = [i.tagName for i in common.iter_releases("stub/repo", full=True, per_page=3)]
+
+    assert _tags == [f"v1.{i}.0" for i in range(9, -1, -1)]
+    assert stub.calls == calls # 4 pages of 3 -- REST reads releases/latest first
+
+
+@pytest.mark.parametrize("query, calls", [("graphql", {"POST": 1}), ("rest", {"GET": 2})])
+def test_listing_stops_once_the_roles_are_found(api, stub, monkeypatch, query, calls):
+    monkeypatch.setattr(common, "RELEASE_QUERY", query)
+
+    _releases = list(common.iter_releases("stub/repo", per_page=3))
+
+    assert [i.tagName for i in _releases] == ["v1.9.0", "v1.8.0", "v1.7.0"]
+    assert (_releases[0].isDraft, _releases[1].isPrerelease, _releases[2].isLatest) == (True, True, True)
+    assert stub.calls == calls
+
+
+def test_graphql_listing_carries_ids_and_commits(api, stub):
+    _index = common.get_release_index("stub/repo", use_cache=False)
+
+    assert _index.latest.tagName == "v1.7.0"
+    assert _index.prerelease.commitSha == stub._sha("v1.8.0")
+    assert _index.draft.commitSha is None # The draft's tag does not exist yet
+
+    stub.calls.clear()
+    assert common.get_release_commit_sha(_index.prerelease, repo="stub/repo") == stub._sha("v1.8.0")
+    assert common.get_release_id("v1.8.0", releases=_index, repo="stub/repo") == "RE_9"
+    assert stub.calls == {} # Both served from the listing
+
+
+def test_releases_by_tag_is_one_query(api, stub):
+    _releases = common.get_releases_by_tag(["v1.2.0", "v1.9.0", "v9.9.9"], repo="stub/repo")
+
+    assert [i["tagName"] for i in _releases] == ["v1.2.0", "v1.9.0"]
+    assert stub.calls == {"POST": 1}
+
+
+def test_etag_revalidation(api, stub):
+    assert common.get_release_snapshot("stub/repo")[0] is None
+    assert stub.calls == {"POST": 1} # Cold -- nothing to revalidate, so no probe: the listing alone
+
+    stub.calls.clear()
+    _etag, _releases = common.get_release_snapshot("stub/repo", revalidate=True)
+    assert _etag is not None
+    assert stub.calls == {"GET": 1, "POST": 1} # The probe has no ETag to match -- a 200, then the listing
+
+    stub.calls.clear()
+    assert common.get_releases("stub/repo") == _releases
+    assert stub.calls == {} # Within the TTL -- served from the snapshot
+
+    assert common.get_release_snapshot("stub/repo", revalidate=True) == (_etag, _releases)
+    assert stub.calls == {"GET": 1} # 304 -- no listing
+
+    stub.calls.clear()
+    common.edit_release(common.get_release_index("stub/repo").prerelease, repo="stub/repo", prerelease=False, make_latest="true")
+    _new_etag, _changed = common.get_release_changes("stub/repo", etag=_etag)
+
+    assert _new_etag != _etag
+    assert common.latest_release(_changed).tagName == "v1.8.0"
+    assert stub.calls == {"PATCH": 1, "GET": 1, "POST": 1}
+
+
+def test_gh_fallback_without_a_token(stub, monkeypatch, capsys):
+    for i in ("GH_TOKEN", "GITHUB_TOKEN"):
+        monkeypatch.delenv(i, raising=False)
+    monkeypatch.setenv("SRE_TRANSPORT", "http")
+    monkeypatch.setenv("GITHUB_API_URL", stub.url)
+    monkeypatch.setenv("PATH", os.pathsep.join([os.path.join(PYTHON, "bench"), os.environ["PATH"]])) # The fake gh
+    monkeypatch.setattr(transport, "_transport", None)
+
+    _transport = transport.get_transport()
+    assert _transport.name == "gh"
+    assert "falling back to gh" in capsys.readouterr().out
+
+    _index = common.get_release_index("stub/repo", use_cache=False)
+    assert (_index.draft.tagName, _index.prerelease.tagName, _index.latest.tagName) == ("v1.9.0", "v1.8.0", "v1.7.0")
+
+    _etag = _transport.request("GET", "repos/stub/repo/releases").headers["etag"]
+    assert _transport.request("GET", "repos/stub/repo/releases", headers={"If-None-Match": _etag}).status == 304
+    assert _transport.request("GET", "repos/stub/repo/releases/tags/v0.0.1").status == 404 # gh exits 1, the status is still read
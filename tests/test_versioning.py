@@ -0,0 +1,59 @@
+"""Tests for validating the registrant version against the releases (registrant-github-version.py) -- @manscaped-dev/<repo>"""
+import json
+import importlib
+
+import pytest
+
+versioning = importlib.import_module("registrant-github-version")
+
+
+@pytest.fixture
+def checkout(tmp_path):
+    """A checkout with a root pyproject.toml at the stub's draft version, and a nested package without any release yet."""
+    (tmp_path / "pyproject.toml").write_text('[tool.poetry]\nname = "stub"\nversion = "1.9.0"\n')
+    (tmp_path / "packages" / "api").mkdir(parents=True)
+    (tmp_path / "packages" / "api" / "package.json").write_text(json.dumps({"name": "api", "version": "0.2.0"}))
+    return tmp_path
+
+
+@pytest.fixture
+def output(tmp_path, monkeypatch):
+    _path = tmp_path / "github-output"
+    _path.write_text("")
+    monkeypatch.setenv("GITHUB_OUTPUT", str(_path))
+    return _path
+
+
+def test_root_registrant_is_the_version(api, checkout, output):
+    # The nested package.json would fail its own stream (the first version is 0.1.0) -- without --discover it is not a stream
+    assert versioning.main(["--root", str(checkout), "--github-output"]) == 0
+    assert output.read_text() == "version=1.9.0\n"
+
+
+def test_discover_validates_the_nested_packages(api, checkout, output):
+    assert versioning.main(["--root", str(checkout), "--github-output", "--discover"]) == 1
+
+    (checkout / "packages" / "api" / "package.json").write_text(json.dumps({"name": "api", "version": "0.1.0", "private": True})) # Another size -- the parse cache keys on it
+    assert versioning.main(["--root", str(checkout), "--github-output", "--discover"]) == 0
+    assert output.read_text().splitlines()[-1] == f"versions={json.dumps({'.': '1.9.0', 'packages/api': '0.1.0'})}"
+
+
+@pytest.mark.parametrize("discover", [[], ["--discover"]])
+def test_missing_root_registrant_fails(api, checkout, capsys, discover):
+    (checkout / "pyproject.toml").unlink() # Only the nested package is left
+
+    with pytest.raises(SystemExit) as e:
+        versioning.main(["--root", str(checkout), *discover])
+
+    assert e.value.code == 1
+    assert "No versioning file found" in capsys.readouterr().out
+
+
+def test_latest_is_the_same_in_both_modes(api, stub):
+    # GitHub can mark an older release as latest -- it is the latest release in both modes, not the newest published one
+    stub.latest_id = stub.by_tag["v1.5.0"]["id"]
+
+    _root = versioning.get_stream_versions([""])[""]
+
+    assert versioning.get_stream_versions(["", "api-"])[""] == _root
+    assert str(_root[0]) == "1.5.0"